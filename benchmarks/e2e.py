@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+GitGoblin end-to-end benchmark
+
+Builds a synthetic repository with a local bare remote, points the goblin at
+the stub AI server, fires scripted edit storms at a running GoblinWatcher and
+reports save-to-commit and commit-to-push latency, throughput, git
+subprocesses per commit, AI fallback messages and peak RSS as JSON:
+
+    python benchmarks/e2e.py --files 2000 --storms 5 --edits 40 > result.json
+
+Compare two results with your favourite JSON diff to spot regressions
+between releases.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import gitgoblin  # noqa: E402
+from gitgoblin.config import GoblinConfig  # noqa: E402
+from gitgoblin.core import GoblinWatcher  # noqa: E402
+from gitgoblin.stubserver import StubAIServer  # noqa: E402
+
+
+BRANCH = 'main'
+
+
+class ForkCounter:
+    """Count every subprocess the goblin starts"""
+
+    def __init__(self):
+        self.count = 0
+        self._original = subprocess.Popen
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        counter = self
+
+        class CountingPopen(self._original):
+            def __init__(self, *args, **kwargs):
+                with counter._lock:
+                    counter.count += 1
+                super().__init__(*args, **kwargs)
+
+        subprocess.Popen = CountingPopen
+        return self
+
+    def __exit__(self, *exc):
+        subprocess.Popen = self._original
+
+
+def git(args, cwd):
+    """Run a setup git command"""
+    subprocess.run(['git'] + args, cwd=cwd, check=True, capture_output=True)
+
+
+def make_repo(root, files, dirs, lines, seed):
+    """Create a synthetic repository and a bare remote it pushes to"""
+    rng = random.Random(seed)
+    repo = root / 'repo'
+    remote = root / 'remote.git'
+    repo.mkdir()
+
+    git(['init', '-q'], repo)
+    git(['symbolic-ref', 'HEAD', f'refs/heads/{BRANCH}'], repo)
+    for key, value in (('user.name', 'Goblin Bench'), ('user.email', 'bench@gitgoblin.invalid'),
+                       ('commit.gpgsign', 'false')):
+        git(['config', key, value], repo)
+
+    directories = [Path('.')]
+    for index in range(max(0, dirs)):
+        parent = rng.choice(directories)
+        directories.append(parent / f'pkg{index}')
+    paths = []
+    for index in range(files):
+        relative = rng.choice(directories) / f'module{index}.py'
+        (repo / relative).parent.mkdir(parents=True, exist_ok=True)
+        body = ''.join(f'value_{index}_{line} = {rng.randint(0, 10 ** 6)}\n' for line in range(lines))
+        (repo / relative).write_text(body)
+        paths.append(relative.as_posix())
+    (repo / '.gitignore').write_text('build/\n*.log\n')
+
+    git(['add', '-A'], repo)
+    git(['commit', '-q', '-m', 'Synthetic repository'], repo)
+    git(['init', '-q', '--bare', str(remote)], root)
+    git(['remote', 'add', 'origin', str(remote)], repo)
+    git(['push', '-q', '-u', 'origin', BRANCH], repo)
+    return repo, remote, paths
+
+
+def read_ref(git_dir, name=f'refs/heads/{BRANCH}'):
+    """Read a loose ref without forking"""
+    try:
+        return (Path(git_dir) / name).read_text().strip()
+    except OSError:
+        return None
+
+
+def percentiles(samples):
+    """p50/p99/max of a list of seconds, in milliseconds"""
+    if not samples:
+        return {'count': 0, 'p50': None, 'p99': None, 'max': None}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))] * 1000
+
+    return {
+        'count': len(ordered),
+        'p50': round(rank(50), 2),
+        'p99': round(rank(99), 2),
+        'max': round(ordered[-1] * 1000, 2),
+    }
+
+
+def peak_rss_kb(who):
+    """Peak resident set size in KiB (ru_maxrss is bytes on macOS)"""
+    value = resource.getrusage(who).ru_maxrss
+    return value // 1024 if sys.platform == 'darwin' else value
+
+
+def run_benchmark(args):
+    root = Path(tempfile.mkdtemp(prefix='goblin-bench-'))
+    stub = None
+    try:
+        repo, remote, paths = make_repo(root, args.files, args.dirs, args.lines, args.seed)
+
+        config = GoblinConfig(repo)
+        settings = {
+            'batch_mode': args.batch,
+            'push_min_interval': args.push_interval,
+            'heuristic_min_confidence': args.heuristic_min_confidence,
+            'ai_commits_enabled': args.ai,
+        }
+        if args.ai:
+            stub = StubAIServer(
+                port=0, latency=args.ai_latency, jitter=args.ai_jitter,
+                error_rate=args.ai_error_rate, seed=args.seed
+            ).start()
+            # The default limiter is sized for Groq's free tier; against the
+            # stub it would turn most commits into fallback messages
+            settings.update({
+                'ai_backend': 'local', 'ai_base_url': stub.base_url,
+                'ai_requests_per_minute': args.ai_requests_per_minute,
+                'ai_rate_limit_wait': args.ai_rate_limit_wait,
+            })
+        for key, value in settings.items():
+            config.set_config(key, value)
+
+        watcher = GoblinWatcher(repo, debounce_seconds=args.debounce)
+        git_dir = repo / '.git'
+
+        # Commit times, straight from the goblin's commit path
+        commits = []
+        record = watcher._record
+
+        def timed_record(file_paths, make_message):
+            committed = record(file_paths, make_message)
+            if committed:
+                commits.append((read_ref(git_dir), time.monotonic(), list(file_paths)))
+            return committed
+
+        watcher._record = timed_record
+
+        # Commits whose AI message never came and got a fallback instead
+        fallbacks = []
+        consult = watcher._consult_ai
+
+        def counted_consult(file_path, ai_future=None):
+            message = consult(file_path, ai_future)
+            if message is None and args.ai:
+                fallbacks.append(file_path)
+            return message
+
+        watcher._consult_ai = counted_consult
+
+        # Push times, from polling the bare remote's ref
+        pushes = []
+        polling = threading.Event()
+
+        def poll_remote():
+            last = read_ref(remote)
+            while not polling.is_set():
+                current = read_ref(remote)
+                if current != last:
+                    pushes.append((current, time.monotonic()))
+                    last = current
+                time.sleep(0.002)
+
+        log = open(os.devnull, 'w') if args.quiet else sys.stderr
+        with ForkCounter() as forks, contextlib.redirect_stdout(log):
+            loop = threading.Thread(
+                target=watcher.run, kwargs={'hoard_mode': args.no_push, 'batch_mode': args.batch},
+                name='goblin-bench-watcher', daemon=True
+            )
+            loop.start()
+            while watcher._handler is None and loop.is_alive():
+                time.sleep(0.01)
+            time.sleep(0.2)
+            poller = threading.Thread(target=poll_remote, daemon=True)
+            poller.start()
+
+            forks.count = 0
+            rng = random.Random(args.seed)
+            saves = {}
+            started = time.monotonic()
+            for storm in range(args.storms):
+                for edit in range(args.edits):
+                    path = rng.choice(paths)
+                    with open(repo / path, 'a') as f:
+                        f.write(f'storm_{storm}_{edit} = {rng.random()}\n')
+                    saves.setdefault(path, []).append(time.monotonic())
+                    if args.edit_interval:
+                        time.sleep(args.edit_interval)
+                time.sleep(args.storm_gap)
+
+            # Wait for every save to be committed, then for the last push
+            deadline = time.monotonic() + args.settle_timeout
+            saved_paths = set(saves)
+            while time.monotonic() < deadline:
+                committed = {p for _, _, files in commits for p in files}
+                if saved_paths <= committed and (args.no_push or (commits and read_ref(remote) == commits[-1][0])):
+                    break
+                time.sleep(0.05)
+            finished = time.monotonic()
+            watcher.stop()
+            loop.join(timeout=30)
+            polling.set()
+            subprocess_count = forks.count
+
+        # Save -> commit: each save counts until the first commit after it
+        save_latency = []
+        pending = {path: list(times) for path, times in saves.items()}
+        for _, committed_at, files in commits:
+            for path in files:
+                times = pending.get(path, [])
+                while times and times[0] <= committed_at:
+                    save_latency.append(committed_at - times.pop(0))
+        uncommitted = sum(len(times) for times in pending.values())
+
+        # Commit -> push: a commit is out once the remote reaches it or a later one
+        order = {sha: index for index, (sha, _, _) in enumerate(commits)}
+        push_latency = []
+        for index, (sha, committed_at, _) in enumerate(commits):
+            for pushed_sha, pushed_at in pushes:
+                if order.get(pushed_sha, -1) >= index:
+                    push_latency.append(max(0.0, pushed_at - committed_at))
+                    break
+
+        elapsed = max(1e-9, finished - started)
+        git_version = subprocess.run(['git', '--version'], capture_output=True, text=True).stdout.strip()
+        return {
+            'gitgoblin': gitgoblin.__version__,
+            'python': platform.python_version(),
+            'git': git_version,
+            'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'quiet')},
+            'saves': sum(len(times) for times in saves.values()),
+            'uncommitted_saves': uncommitted,
+            'commits': len(commits),
+            'pushes': len(pushes),
+            'duration_seconds': round(elapsed, 3),
+            'commits_per_second': round(len(commits) / elapsed, 3),
+            'save_to_commit_ms': percentiles(save_latency),
+            'commit_to_push_ms': percentiles(push_latency),
+            'subprocesses': subprocess_count,
+            'subprocesses_per_commit': round(subprocess_count / len(commits), 2) if commits else None,
+            'peak_rss_kb': {
+                'goblin': peak_rss_kb(resource.RUSAGE_SELF),
+                'children': peak_rss_kb(resource.RUSAGE_CHILDREN),
+            },
+            'ai_requests': stub.requests if stub else 0,
+            'ai_fallback_messages': len(fallbacks),
+        }
+    finally:
+        if stub:
+            stub.stop()
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+        else:
+            print(f"Kept benchmark repository at {root}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='End-to-end GitGoblin benchmark')
+    parser.add_argument('--files', type=int, default=500, help='files in the synthetic repository')
+    parser.add_argument('--dirs', type=int, default=50, help='directories to spread them over')
+    parser.add_argument('--lines', type=int, default=40, help='lines per file')
+    parser.add_argument('--storms', type=int, default=3, help='edit storms to fire')
+    parser.add_argument('--edits', type=int, default=30, help='edits per storm')
+    parser.add_argument('--edit-interval', type=float, default=0.01, help='seconds between edits in a storm')
+    parser.add_argument('--storm-gap', type=float, default=1.0, help='seconds between storms')
+    parser.add_argument('--debounce', type=float, default=0.3, help='goblin debounce seconds')
+    parser.add_argument('--batch', action='store_true', help='benchmark batch commit mode')
+    parser.add_argument('--no-push', action='store_true', help='hoard mode: commit without pushing')
+    parser.add_argument('--push-interval', type=float, default=0.5, help='push_min_interval for the run')
+    parser.add_argument('--no-ai', dest='ai', action='store_false', help='skip the stub AI endpoint')
+    parser.add_argument('--ai-latency', type=float, default=0.15, help='stub AI seconds per completion')
+    parser.add_argument('--ai-jitter', type=float, default=0.05, help='extra random stub AI latency')
+    parser.add_argument('--ai-error-rate', type=float, default=0.0, help='share of stub AI requests that fail')
+    parser.add_argument('--ai-requests-per-minute', type=float, default=60000,
+                        help='client rate limit against the stub (burst is a sixth of it)')
+    parser.add_argument('--ai-rate-limit-wait', type=float, default=5,
+                        help='seconds a request may wait for the rate limiter')
+    parser.add_argument('--heuristic-min-confidence', type=float, default=0.8,
+                        help='offline guesses this sure skip the AI (1 sends everything to it)')
+    parser.add_argument('--settle-timeout', type=float, default=60, help='seconds to wait for the goblin to catch up')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--keep', action='store_true', help='keep the synthetic repository')
+    parser.add_argument('--quiet', action='store_true', help='hide the goblin output (normally on stderr)')
+    parser.add_argument('--output', '-o', default=None, help='write JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    result = json.dumps(run_benchmark(args), indent=2)
+    if args.output:
+        Path(args.output).write_text(result + '\n')
+    else:
+        print(result)
+
+
+if __name__ == '__main__':
+    main()
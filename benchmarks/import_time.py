@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+GitGoblin import-time budget
+
+Lightweight subcommands (crystalball, enchant --show, whisper, banish) run
+from shell prompts and editor hooks, so importing the CLI must stay cheap and
+must not drag in the watcher or the AI client. This measures
+``python -X importtime -c "import gitgoblin.cli"`` (best of several runs),
+checks that no heavy module was loaded, and exits non-zero when either
+check fails:
+
+    python benchmarks/import_time.py --budget-ms 100
+
+The JSON report goes to stdout, like benchmarks/e2e.py.
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Only needed once the goblin actually watches or talks to an AI
+HEAVY_MODULES = ('watchdog', 'requests', 'urllib3', 'daemon', 'gitgoblin.core', 'gitgoblin.ai_commit',
+                 'gitgoblin.hive')
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+
+def python(args, **kwargs):
+    """Run the current interpreter with the repository on its path"""
+    return subprocess.run([sys.executable] + args, cwd=ROOT, capture_output=True, text=True, **kwargs)
+
+
+def import_profile(module):
+    """(cumulative microseconds, {direct import: microseconds}) from one -X importtime run"""
+    result = python(['-X', 'importtime', '-c', f'import {module}'])
+    if result.returncode != 0:
+        raise SystemExit(f"importing {module} failed:\n{result.stderr}")
+    # importtime lists children before their parent, one indent level deeper
+    children = {}
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        depth = (len(match.group(3)) - 1) // 2
+        if depth == 0:
+            if match.group(4) == module:
+                return int(match.group(2)), children
+            children = {}
+        elif depth == 1:
+            children[match.group(4)] = int(match.group(2))
+    return 0, {}
+
+
+def loaded_modules(module):
+    """Every module in sys.modules after importing one"""
+    result = python(['-c', f'import json, sys, {module}; print(json.dumps(sorted(sys.modules)))'])
+    return json.loads(result.stdout)
+
+
+def command_ms(args, runs):
+    """Best wall time of a gitgoblin invocation, in milliseconds"""
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        python(['-c', 'from gitgoblin.cli import main; main()'] + args)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='GitGoblin CLI import-time budget')
+    parser.add_argument('--module', default='gitgoblin.cli', help='module whose import is budgeted')
+    parser.add_argument('--budget-ms', type=float, default=100.0, help='most milliseconds the import may take')
+    parser.add_argument('--runs', type=int, default=5, help='runs per measurement; the best one counts')
+    args = parser.parse_args(argv)
+
+    runs = max(1, args.runs)
+    profiles = [import_profile(args.module) for _ in range(runs)]
+    total_us, children = min(profiles, key=lambda profile: profile[0])
+    import_ms = total_us / 1000
+    heavy = [name for name in loaded_modules(args.module)
+             if any(name == prefix or name.startswith(prefix + '.') for prefix in HEAVY_MODULES)]
+    slowest = sorted(((us, name) for name, us in children.items()), reverse=True)[:10]
+
+    report = {
+        'python': sys.version.split()[0],
+        'module': args.module,
+        'import_ms': round(import_ms, 1),
+        'budget_ms': args.budget_ms,
+        'heavy_modules_loaded': heavy,
+        'slowest_imports_ms': {name: round(us / 1000, 1) for us, name in slowest},
+        'command_ms': {
+            '--help': command_ms(['--help'], runs),
+            'whisper status': command_ms(['whisper', 'status'], runs),
+        },
+    }
+    report['ok'] = import_ms <= args.budget_ms and not heavy
+    print(json.dumps(report, indent=2))
+    if not report['ok']:
+        reason = f"{import_ms:.1f}ms > {args.budget_ms:g}ms" if import_ms > args.budget_ms else f"loaded {', '.join(heavy)}"
+        print(f"Import budget exceeded: {reason}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,7 +6,15 @@ A mischievous little goblin that watches your files and commits them to GitHub
 __version__ = '1.0.0'
 __author__ = 'GitGoblin Master (sahhoutiamine)'
 
-from .core import GoblinWatcher
-from .utils import GoblinStatus
-
 __all__ = ['GoblinWatcher', 'GoblinStatus']
+
+
+def __getattr__(name):
+    # Imported on first use, so 'import gitgoblin' does not pull in watchdog
+    if name == 'GoblinWatcher':
+        from .core import GoblinWatcher
+        return GoblinWatcher
+    if name == 'GoblinStatus':
+        from .utils import GoblinStatus
+        return GoblinStatus
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
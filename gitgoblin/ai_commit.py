@@ -1,75 +1,273 @@
 """
 GitGoblin AI Commit Message Generator
-Uses Groq API to generate descriptive commit messages
+Uses Groq API (or any OpenAI-compatible backend) to generate descriptive commit messages
 """
 
 import subprocess
 import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from .backends import make_backend
+from .diffbudget import budget_diff
+from .heuristics import changes_from_diff, classify
+from .index import GitIndex, GitIndexError
+from .msgcache import cache_key
+from .ratelimit import AIUnavailable, CircuitBreaker, TokenBucket, backoff_delay, parse_duration
+
+
+# Bump whenever _create_prompt changes, so cached messages are not reused
+PROMPT_VERSION = 2
+
+# Untracked files whose content goes into the diff; the rest are only named
+MAX_NEW_FILE_DIFFS = 20
 
 
 class AICommitGenerator:
     """Generate commit messages using Groq AI"""
     
-    def __init__(self, api_key, repo_path='.'):
+    def __init__(self, api_key, repo_path='.', pool_size=4, connect_timeout=3.05, read_timeout=30, cache=None,
+                 max_retries=2, requests_per_minute=30, rate_limit_wait=2, breaker_threshold=3,
+                 prompt_token_budget=1000, diff_max_bytes=262144, diff_timeout=10, min_confidence=0.8,
+                 backend=None):
         self.api_key = api_key
         self.repo_path = Path(repo_path).resolve()
-        self.api_url = "https://api.groq.com/openai/v1/chat/completions"
+        
+        # Where prompts go and how they are worded on the wire
+        self.backend = backend or make_backend('groq', api_key=api_key)
+        self.api_url = self.backend.chat_url
+        self.models_url = self.backend.models_url
+        self.model = self.backend.model
+        
+        # Optional MessageCache so a diff seen before skips the API entirely
+        self.cache = cache
+        
+        # One pooled keep-alive session per generator, created on first use
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self._session = None
+        self._session_lock = threading.Lock()
+        self.requests_sent = 0
+        
+        # Politeness: a request budget, bounded retries and a circuit breaker
+        self.max_retries = max_retries
+        self.rate_limit_wait = rate_limit_wait
+        self.limiter = TokenBucket(requests_per_minute)
+        self.breaker = CircuitBreaker(probe=self.warm, failure_threshold=breaker_threshold)
+        
+        # Tokens of diff the prompt may carry
+        self.prompt_token_budget = prompt_token_budget
+        
+        # Bytes of raw diff read from git before the rest is dropped, and
+        # seconds git diff may take before it is killed
+        self.diff_max_bytes = diff_max_bytes
+        self.diff_timeout = diff_timeout
+        
+        # Offline guesses at least this sure skip the API (None: always ask)
+        self.min_confidence = min_confidence
+    
+    def _get_session(self):
+        """Get the pooled HTTP session, creating it on first use"""
+        with self._session_lock:
+            if self._session is None:
+                try:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                except ImportError:
+                    raise ImportError("requests library is required. Install with: pip install requests")
+                
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=False)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update(self.backend.headers())
+                self._session = session
+            return self._session
+    
+    def warm(self):
+        """Open a connection ahead of the first commit so it skips the TCP/TLS handshake
+
+        Also serves as the circuit breaker's health probe.
+        """
+        try:
+            response = self._get_session().get(self.models_url, timeout=self.timeout)
+            response.close()
+            return response.status_code != 429 and response.status_code < 500
+        except Exception:
+            return False
+    
+    def connection_stats(self):
+        """Requests sent vs. connections opened, to confirm keep-alive reuse"""
+        stats = {'requests': self.requests_sent, 'connections': 0, 'reused': 0}
+        if self._session is None:
+            return stats
+        try:
+            # Only inspect pools that exist: connection_from_url would create
+            # a fresh, empty one on current requests
+            pools = self._session.get_adapter(self.api_url).poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    stats['connections'] += pool.num_connections
+                    stats['reused'] += max(0, pool.num_requests - pool.num_connections)
+        except Exception:
+            pass
+        return stats
+    
+    def close(self):
+        """Close every pooled connection and write the message cache's counters"""
+        self.breaker.stop()
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+        if self.cache is not None:
+            self.cache.flush()
     
     def get_git_diff(self, file_path=None):
-        """Get git diff for the changes"""
+        """Get git diff for the changes
+
+        Staged and unstaged changes come from one ``git diff HEAD`` pass read
+        straight off the pipe: each file keeps at most a share of
+        ``diff_max_bytes`` and reading stops once the whole budget is spent,
+        so a minified bundle or data dump never lands in memory whole.
+        Untracked files, which that pass leaves out because nothing stages
+        them before the message is asked for, are diffed against /dev/null.
+        """
+        paths = list(file_path) if isinstance(file_path, (list, tuple)) else [file_path] if file_path else []
+        
+        # Binary files are spotted up front and never diffed at all
+        binary = [path for path in paths if self._looks_binary(path)]
+        text_paths = [path for path in paths if path not in binary]
+        notes = ''.join(f"diff --git a/{path} b/{path}\nBinary files a/{path} and b/{path} differ\n" for path in binary)
+        if paths and not text_paths:
+            return notes.strip()
+        
         try:
-            if file_path:
-                # Get diff for specific file
-                result = subprocess.run(
-                    ['git', 'diff', '--cached', file_path],
-                    cwd=self.repo_path,
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
-            else:
-                # Get diff for all staged changes
-                result = subprocess.run(
-                    ['git', 'diff', '--cached'],
-                    cwd=self.repo_path,
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
-            
-            diff = result.stdout.strip()
-            
-            # If no staged changes, get unstaged diff
-            if not diff:
-                if file_path:
-                    result = subprocess.run(
-                        ['git', 'diff', file_path],
-                        cwd=self.repo_path,
-                        capture_output=True,
-                        text=True,
-                        timeout=10
-                    )
-                else:
-                    result = subprocess.run(
-                        ['git', 'diff'],
-                        cwd=self.repo_path,
-                        capture_output=True,
-                        text=True,
-                        timeout=10
-                    )
-                diff = result.stdout.strip()
-            
-            return diff
+            diff = self._stream_diff(['git', 'diff', '--no-color', '--no-ext-diff', 'HEAD'] + self._path_args(text_paths))
+            if diff is None:
+                # Unborn branch: everything is in the index or nowhere
+                diff = self._stream_diff(['git', 'diff', '--no-color', '--no-ext-diff', '--cached'] + self._path_args(text_paths))
+            diff = diff or ''
+            diff += self._untracked_diff(text_paths, self.diff_max_bytes - len(diff.encode('utf-8')))
+            return (notes + diff).strip()
         except Exception as e:
             print(f"⚠️  Could not get git diff: {e}")
-            return ""
+            return notes.strip()
+    
+    def _looks_binary(self, file_path):
+        """Whether a working tree file has a NUL byte in its first 8000 bytes, as git judges it"""
+        try:
+            with open(self.repo_path / file_path, 'rb') as f:
+                return b'\0' in f.read(8000)
+        except OSError:
+            return False
+    
+    def _untracked_diff(self, paths, budget):
+        """New-file diffs for the untracked files at or below paths (all of them without paths)"""
+        result = subprocess.run(
+            ['git', 'ls-files', '-z', '--others', '--exclude-standard'] + self._path_args(paths),
+            cwd=self.repo_path,
+            capture_output=True,
+            timeout=self.diff_timeout
+        )
+        new_files = [path for path in result.stdout.decode('utf-8', 'surrogateescape').split('\0') if path]
+        diff = ''
+        for index, path in enumerate(new_files):
+            if index >= MAX_NEW_FILE_DIFFS or budget <= 0:
+                # Named, so the shape of the change still shows
+                diff += f"diff --git a/{path} b/{path}\nnew file mode 100644\n"
+                continue
+            part = self._stream_diff(
+                ['git', 'diff', '--no-color', '--no-ext-diff', '--no-index', '--', '/dev/null', path], budget
+            ) or ''
+            diff += part
+            budget -= len(part.encode('utf-8'))
+        return diff
+    
+    def _stream_diff(self, args, budget=None):
+        """Read a diff from git within the byte budget and the deadline; None if git failed"""
+        budget = self.diff_max_bytes if budget is None else budget
+        file_budget = max(budget // 4, 4096)
+        max_line = 4096
+        kept = []
+        kept_bytes = 0
+        file_bytes = 0
+        skipping = False
+        
+        proc = subprocess.Popen(args, cwd=self.repo_path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        # A hung git diff (lock wait, network filesystem) is killed like an
+        # over-budget one, so an AI worker never blocks on it forever
+        timed_out = threading.Event()
+        
+        def expire():
+            timed_out.set()
+            if proc.poll() is None:
+                proc.kill()
+        
+        timer = threading.Timer(self.diff_timeout, expire)
+        timer.daemon = True
+        timer.start()
+        try:
+            partial = False
+            while True:
+                line = proc.stdout.readline(max_line)
+                if not line:
+                    break
+                continued, partial = partial, not line.endswith(b'\n')
+                if continued:
+                    # Tail of an over-long line (minified code): drop it
+                    continue
+                if partial:
+                    line = line + b'\n'
+                if line.startswith(b'diff --git '):
+                    file_bytes = 0
+                    skipping = False
+                elif skipping:
+                    continue
+                elif file_bytes + len(line) > file_budget:
+                    # This file had its share; the rest of it is skipped
+                    kept.append(b'@@ ... @@ (diff truncated by the goblin)\n')
+                    skipping = True
+                    continue
+                kept.append(line)
+                kept_bytes += len(line)
+                file_bytes += len(line)
+                if kept_bytes >= budget:
+                    break
+        finally:
+            timer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            returncode = proc.wait(timeout=10)
+        
+        if timed_out.is_set():
+            print(f"⚠️  git diff took longer than {self.diff_timeout:g}s, the goblin stopped reading")
+        if returncode not in (0, -9) and not kept:
+            return None
+        return b''.join(kept).decode('utf-8', 'replace')
     
     def get_file_status(self, file_path=None):
         """Get status of files"""
+        # For specific files the in-process index reader answers without
+        # forking; staged-only changes still need git
+        if file_path:
+            try:
+                paths = list(file_path) if isinstance(file_path, (list, tuple)) else [file_path]
+                changes = GitIndex(self.repo_path).status(paths)
+                if changes:
+                    return '\n'.join(
+                        f"?? {path}" if code == '?' else f" {code} {path}" for code, path in changes
+                    )
+            except (GitIndexError, OSError):
+                pass
+        
         try:
             result = subprocess.run(
-                ['git', 'status', '--porcelain', file_path] if file_path else ['git', 'status', '--porcelain'],
+                # AI workers run this next to the commit loop: never take index.lock
+                ['git', '--no-optional-locks', 'status', '--porcelain'] + self._path_args(file_path),
                 cwd=self.repo_path,
                 capture_output=True,
                 text=True,
@@ -80,8 +278,20 @@ class AICommitGenerator:
             print(f"⚠️  Could not get git status: {e}")
             return ""
     
+    @staticmethod
+    def _path_args(file_path):
+        """Turn a path, a list of paths or None into git pathspec arguments"""
+        if not file_path:
+            return []
+        if isinstance(file_path, (list, tuple)):
+            return ['--'] + list(file_path)
+        return ['--', file_path]
+    
     def generate_commit_message(self, file_path=None):
-        """Generate a descriptive commit message using Groq AI"""
+        """Generate a descriptive commit message using Groq AI
+
+        file_path may be a single path or a list of paths (batch commit).
+        """
         try:
             # Get git diff
             diff = self.get_git_diff(file_path)
@@ -90,14 +300,34 @@ class AICommitGenerator:
             if not diff and not status:
                 return None
             
+            # Routine changes (docs, tests, tooling...) need no network at all
+            if self.min_confidence is not None:
+                paths = list(file_path) if isinstance(file_path, (list, tuple)) else [file_path] if file_path else []
+                guess = classify(changes_from_diff(diff, paths))
+                if guess and guess.confidence >= self.min_confidence:
+                    return guess.message
+            
+            # A diff the goblin has already seen gets the same inscription
+            key = cache_key(diff, status, PROMPT_VERSION, self.model) if self.cache else None
+            if key:
+                cached = self.cache.get(key)
+                if cached:
+                    return cached
+            
             # Prepare the prompt for Groq
             prompt = self._create_prompt(diff, status, file_path)
             
             # Call Groq API
             commit_message = self._call_groq_api(prompt)
             
+            if key and commit_message:
+                self.cache.put(key, commit_message)
+            
             return commit_message
             
+        except AIUnavailable:
+            # Fail fast; the caller's fallback message takes over
+            return None
         except Exception as e:
             print(f"⚠️  AI generation failed: {e}")
             return None
@@ -116,76 +346,159 @@ Generate a clear, descriptive commit message following these rules:
 
 """
         
-        if file_path:
+        if isinstance(file_path, (list, tuple)):
+            prompt += "\nFiles modified (one commit for all of them):\n"
+            prompt += "".join(f"- {path}\n" for path in file_path)
+        elif file_path:
             prompt += f"\nFile modified: {file_path}\n"
         
         if status:
             prompt += f"\nGit Status:\n{status}\n"
         
         if diff:
-            # Limit diff size to avoid token limits
-            diff_preview = diff[:3000] if len(diff) > 3000 else diff
-            prompt += f"\nGit Diff:\n```\n{diff_preview}\n```\n"
+            # Fit the most informative hunks of every file into the token budget
+            summary, diff_preview = budget_diff(diff, self.prompt_token_budget)
+            if summary:
+                prompt += f"\nChange summary (added, removed, file):\n{summary}\n"
+            if diff_preview:
+                prompt += f"\nGit Diff (most relevant hunks):\n```\n{diff_preview}\n```\n"
         
         prompt += "\nGenerate ONLY the commit message, no explanations or additional text:"
         
         return prompt
     
     def _call_groq_api(self, prompt):
-        """Call Groq API to generate commit message"""
-        try:
-            import requests
-        except ImportError:
-            raise ImportError("requests library is required. Install with: pip install requests")
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
-        payload = {
-            "model": "llama-3.3-70b-versatile",
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant that generates concise, descriptive git commit messages following conventional commits format."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.7,
-            "max_tokens": 200
-        }
+        """Call the AI backend (Groq by default) to generate commit message"""
+        session = self._get_session()
+        import requests  # already loaded by _get_session; needed for its exception types
         
-        try:
-            response = requests.post(
-                self.api_url,
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            response.raise_for_status()
+        payload = self.backend.build_payload(prompt)
+        
+        if not self.breaker.allow():
+            raise AIUnavailable("the AI circuit is open")
+        
+        for attempt in range(self.max_retries + 1):
+            if not self.limiter.acquire(self.rate_limit_wait):
+                raise AIUnavailable("the AI rate limit is exhausted")
             
-            result = response.json()
-            commit_message = result['choices'][0]['message']['content'].strip()
+            try:
+                with self._session_lock:
+                    self.requests_sent += 1
+                response = session.post(
+                    self.api_url,
+                    json=payload,
+                    timeout=self.timeout
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                print(f"❌ API request failed: {e}")
+                self.breaker.record_failure()
+                if attempt == self.max_retries or not self.breaker.allow():
+                    raise
+                time.sleep(backoff_delay(attempt + 1))
+                continue
             
-            # Clean up the message (remove quotes if present)
-            commit_message = commit_message.strip('"').strip("'")
+            self.limiter.update(response.headers)
             
-            return commit_message
+            # Rate limits and server errors are worth another try
+            if response.status_code == 429 or response.status_code >= 500:
+                print(f"❌ API request failed: HTTP {response.status_code}")
+                self.breaker.record_failure()
+                retry_after = parse_duration(response.headers.get('retry-after')) or 0
+                delay = max(backoff_delay(attempt + 1), retry_after)
+                if attempt == self.max_retries or not self.breaker.allow() or delay > self.rate_limit_wait * 4:
+                    raise AIUnavailable(f"HTTP {response.status_code} from the AI realm")
+                time.sleep(delay)
+                continue
             
-        except requests.exceptions.RequestException as e:
-            print(f"❌ API request failed: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"Response: {e.response.text}")
-            raise
-        except (KeyError, json.JSONDecodeError) as e:
-            print(f"❌ Failed to parse API response: {e}")
-            raise
+            try:
+                response.raise_for_status()
+                
+                result = response.json()
+                commit_message = self.backend.parse_message(result).strip()
+                
+                # Clean up the message (remove quotes if present)
+                commit_message = commit_message.strip('"').strip("'")
+                
+                self.breaker.record_success()
+                return commit_message
+                
+            except requests.exceptions.RequestException as e:
+                print(f"❌ API request failed: {e}")
+                if hasattr(e, 'response') and e.response is not None:
+                    print(f"Response: {e.response.text}")
+                raise
+            except (KeyError, IndexError, TypeError, json.JSONDecodeError) as e:
+                print(f"❌ Failed to parse API response: {e}")
+                raise
     
     def generate_sneak_commit_message(self):
         """Generate commit message for sneak command (all changes)"""
         return self.generate_commit_message(file_path=None)
+
+
+class AIMessagePool:
+    """Generate commit messages on a bounded pool of worker threads
+
+    Each request gets a deadline counted from submission; ``wait`` raises
+    concurrent.futures.TimeoutError once it has passed so the caller can use
+    its timestamp fallback while the slow request finishes in the background.
+    """
+    
+    def __init__(self, generator, workers=4, deadline=10, executor=None):
+        self.generator = generator
+        self.deadline = deadline
+        # A shared executor (the multi-repo hive's) is left running on shutdown
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='goblin-ai')
+        
+        # future -> the generator it runs on, until it finishes
+        self._inflight = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, file_path):
+        """Start generating a message for a path or list of paths"""
+        generator = self.generator
+        with self._lock:
+            future = self.executor.submit(generator.generate_commit_message, file_path)
+            self._inflight[future] = generator
+        future.goblin_deadline = time.monotonic() + self.deadline
+        future.add_done_callback(self._finished)
+        return future
+    
+    def _finished(self, future):
+        with self._lock:
+            self._inflight.pop(future, None)
+    
+    def retire(self, generator):
+        """Close a replaced generator once the requests still running on it finish"""
+        with self._lock:
+            running = [future for future, used in self._inflight.items() if used is generator]
+        if not running:
+            generator.close()
+            return
+        remaining = [len(running)]
+        lock = threading.Lock()
+        
+        def done(_):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                generator.close()
+        
+        for future in running:
+            future.add_done_callback(done)
+    
+    def wait(self, future):
+        """Wait for a submitted message until its deadline"""
+        return future.result(timeout=max(0, future.goblin_deadline - time.monotonic()))
+    
+    def shutdown(self):
+        """Stop the workers without waiting for requests still in flight"""
+        if not self._owns_executor:
+            return
+        try:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        except TypeError:
+            # cancel_futures needs Python 3.9+
+            self.executor.shutdown(wait=False)
@@ -0,0 +1,134 @@
+"""
+GitGoblin AI Backends - Where the goblin sends its prompts
+"""
+
+
+# Known services: base URL, default model and whether they need a key
+PRESETS = {
+    'groq': {
+        'base_url': 'https://api.groq.com/openai/v1',
+        'model': 'llama-3.3-70b-versatile',
+        'needs_key': True,
+    },
+    'openai': {
+        'base_url': 'https://api.openai.com/v1',
+        'model': 'gpt-4o-mini',
+        'needs_key': True,
+    },
+    'ollama': {
+        'base_url': 'http://127.0.0.1:11434/v1',
+        'model': 'llama3.2',
+        'needs_key': False,
+    },
+    # The stub server in gitgoblin.stubserver
+    'local': {
+        'base_url': 'http://127.0.0.1:8765/v1',
+        'model': 'goblin-stub',
+        'needs_key': False,
+    },
+}
+
+SYSTEM_PROMPT = (
+    "You are a helpful assistant that generates concise, descriptive git commit messages "
+    "following conventional commits format."
+)
+
+
+class AIBackend:
+    """The wire format of one chat completion service
+
+    Subclasses describe where requests go, how they authenticate and how
+    payloads and responses look; AICommitGenerator owns the HTTP session,
+    retries and rate limits around them.
+    """
+
+    name = 'custom'
+
+    def __init__(self, base_url, model, api_key=None, auth_header='Authorization', auth_scheme='Bearer'):
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.api_key = api_key
+        self.auth_header = auth_header
+        self.auth_scheme = auth_scheme
+
+    @property
+    def chat_url(self):
+        raise NotImplementedError
+
+    @property
+    def models_url(self):
+        """A cheap URL for warm-up and health probes"""
+        raise NotImplementedError
+
+    def headers(self):
+        """Headers sent with every request"""
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        if self.api_key and self.auth_header:
+            scheme = f"{self.auth_scheme} " if self.auth_scheme else ''
+            headers[self.auth_header] = f"{scheme}{self.api_key}"
+        return headers
+
+    def build_payload(self, prompt):
+        """Request body for a prompt"""
+        raise NotImplementedError
+
+    def parse_message(self, data):
+        """Commit message text out of a decoded response body"""
+        raise NotImplementedError
+
+
+class OpenAICompatibleBackend(AIBackend):
+    """Any service speaking the OpenAI chat completions API (Groq, OpenAI, Ollama, vLLM...)"""
+
+    name = 'openai-compatible'
+
+    def __init__(self, base_url, model, api_key=None, auth_header='Authorization', auth_scheme='Bearer',
+                 temperature=0.7, max_tokens=200):
+        super().__init__(base_url, model, api_key, auth_header, auth_scheme)
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    @property
+    def chat_url(self):
+        return f"{self.base_url}/chat/completions"
+
+    @property
+    def models_url(self):
+        return f"{self.base_url}/models"
+
+    def build_payload(self, prompt):
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens
+        }
+
+    def parse_message(self, data):
+        return data['choices'][0]['message']['content']
+
+
+def needs_key(name):
+    """Whether a backend preset refuses requests without an API key"""
+    return PRESETS.get(name, {}).get('needs_key', False)
+
+
+def make_backend(name='groq', api_key=None, base_url=None, model=None, auth_header='Authorization',
+                 auth_scheme='Bearer'):
+    """Build a backend from a preset name, with any setting overridden"""
+    preset = PRESETS.get(name)
+    if preset is None and not base_url:
+        raise ValueError(f"Unknown AI backend '{name}' (known: {', '.join(PRESETS)}); set ai_base_url for a custom one")
+    preset = preset or {}
+    backend = OpenAICompatibleBackend(
+        base_url or preset['base_url'],
+        model or preset.get('model', ''),
+        api_key=api_key,
+        auth_header=auth_header,
+        auth_scheme=auth_scheme
+    )
+    backend.name = name
+    return backend
@@ -4,12 +4,13 @@ GitGoblin CLI - Your mischievous git automation companion
 """
 
 import click
+import json
 import sys
 import re
 from pathlib import Path
-from .core import GoblinWatcher
 from .utils import GoblinStatus, print_banner, print_success, print_error, print_info
 from .config import GoblinConfig
+from . import control
 
 
 @click.group(invoke_without_command=True)
@@ -24,16 +25,22 @@ def cli(ctx):
         click.echo("  🔮 crystalball - Peer into the vault of hoarded treasures")
         click.echo("  🧙 enchant     - Bestow AI wisdom upon the goblin")
         click.echo("  🛑 banish      - Cast the goblin back into the void")
+        click.echo("  🗣️  whisper     - Whisper orders to a running goblin")
+        click.echo("  🪞 fsmonitor   - Let git ask the goblin what changed")
+        click.echo("  🐝 hive        - One goblin haunting many dungeons")
         click.echo("\n✨ Recite 'gitgoblin <spell> --help' to learn more secrets\n")
 
 
 @cli.command()
 @click.option('--path', '-p', default='.', help='Dungeon path (repository)')
-@click.option('--debounce', '-d', default=2, help='Seconds to wait for silence')
+@click.option('--debounce', '-d', default=None, type=float, help='Seconds to wait for silence (default: 2, or debounce_seconds in the config)')
 @click.option('--daemon', '-bg', is_flag=True, help='Run as a lingering spirit')
 @click.option('--ritual', is_flag=True, help='Perform the ritual of ascension (v1.1.1)')
 @click.option('--hoard', is_flag=True, help='Only hoard treasures locally, do not push')
-def summon(path, debounce, daemon, ritual, hoard):
+@click.option('--batch/--no-batch', default=None, help='Hoard all files ready together as one commit')
+@click.option('--batch-size', default=None, type=int, help='Most files the goblin stuffs into one batch')
+@click.option('--batch-window', default=None, type=float, help='Most seconds a batch may keep growing')
+def summon(path, debounce, daemon, ritual, hoard, batch, batch_size, batch_window):
     """
     👹 Awaken GitGoblin to haunt your files
     
@@ -50,12 +57,17 @@ def summon(path, debounce, daemon, ritual, hoard):
     click.echo("👹 Preparing the summoning circles...\n")
     
     try:
+        from .core import GoblinWatcher
         watcher = GoblinWatcher(path, debounce)
+        if batch_size is not None:
+            watcher.batch_max_files = batch_size
+        if batch_window is not None:
+            watcher.batch_max_seconds = batch_window
         
         if daemon:
             click.echo("🌙 The Goblin is now a lingering spirit in the shadows...")
             click.echo("💡 Tip: Use 'gitgoblin banish' to cast it away\n")
-            watcher.run_daemon()
+            watcher.run_daemon(batch_mode=batch)
         else:
             if ritual:
                 click.echo("🕯️  The Goblin is now watching for changes to perform the Ritual...")
@@ -70,7 +82,7 @@ def summon(path, debounce, daemon, ritual, hoard):
             
             click.echo("💡 Press Ctrl+C to send the goblin back to sleep\n")
             click.echo("-" * 60)
-            watcher.run(ritual_mode=ritual, hoard_mode=hoard)
+            watcher.run(ritual_mode=ritual, hoard_mode=hoard, batch_mode=batch)
             
     except ValueError as e:
         print_error(f"The summoning failed: {e}")
@@ -97,6 +109,7 @@ def sneak(path, message):
     click.echo("🗡️  The Goblin is preparing a stealthy snatch...\n")
     
     try:
+        from .core import GoblinWatcher
         watcher = GoblinWatcher(path)
         success = watcher.sneak_commit(message)
         
@@ -113,17 +126,21 @@ def sneak(path, message):
 
 @cli.command()
 @click.option('--path', '-p', default='.', help='Dungeon path (repository)')
-def crystalball(path):
+@click.option('--watch', '-w', is_flag=True, help='Keep gazing, refreshing in place')
+@click.option('--interval', '-n', default=2.0, type=float, help='Seconds between refreshes with --watch')
+def crystalball(path, watch, interval):
     """
     🔮 Peer into the Goblin's cavern and check its hoard
     
     Look deep into the crystal ball to see recent hoards,
     push times, and the state of your precious code.
     """
-    click.echo("🔮 Focusing your mind on the crystal ball...\n")
-    
     try:
         status = GoblinStatus(path)
+        if watch:
+            status.watch(max(0.2, interval))
+            return
+        click.echo("🔮 Focusing your mind on the crystal ball...\n")
         status.display()
         
     except Exception as e:
@@ -132,7 +149,8 @@ def crystalball(path):
 
 
 @cli.command()
-def banish():
+@click.option('--path', '-p', default='.', help='Dungeon path (repository)')
+def banish(path):
     """
     🛑 Cast the Goblin back into the void
     
@@ -142,8 +160,15 @@ def banish():
     click.echo("🔥 Reciting the banishment ritual...\n")
     
     try:
-        watcher = GoblinWatcher('.')
-        stopped = watcher.stop_daemon()
+        # A goblin with a whisper socket is asked to leave and waited for;
+        # older goblins only leave a pid behind
+        response = control.request(path, 'shutdown')
+        if response and response.get('ok'):
+            stopped = True
+            if not control.wait_until_gone(path):
+                print_info("⏳ The goblin is still finishing its last hoard...")
+        else:
+            stopped = control.stop_pid_file(Path(path).resolve() / '.git' / 'gitgoblin.pid')
         
         if stopped:
             print_success("The GitGoblin has been banished from this realm!")
@@ -157,12 +182,92 @@ def banish():
         sys.exit(1)
 
 
+@cli.command()
+@click.argument('command', type=click.Choice(control.COMMANDS))
+@click.option('--path', '-p', default='.', help='Dungeon path (repository)')
+@click.option('--json', 'as_json', is_flag=True, help='Print the raw answer as JSON')
+def whisper(command, path, as_json):
+    """
+    🗣️ Whisper orders to a running goblin
+    
+    status, pending, metrics, flush (hoard and push everything now),
+    pause, resume or shutdown. Answers come back over the goblin's
+    socket in .git/gitgoblin.sock.
+    """
+    response = control.request(path, command, timeout=10.0)
+    if response is None:
+        print_info("👻 No goblin is listening in this dungeon.")
+        sys.exit(1)
+    if as_json:
+        click.echo(json.dumps(response, indent=2))
+    elif not response.get('ok'):
+        print_error(f"The goblin refused: {response.get('error')}")
+    elif command == 'pending':
+        for change in response['changes']:
+            click.echo(f"   {change['kind'] or 'cancelled':<9} {change['path']} (settles in {change['settles_in']:.1f}s)")
+        click.echo(f"🪙 {len(response['changes'])} change(s) debouncing, {response['pushes']} commit(s) awaiting a push")
+    elif command == 'flush':
+        print_success(f"Hoarding {response['changes']} change(s) and pushing {response['pushes']} commit(s) now")
+    elif command in ('pause', 'resume'):
+        print_success("The goblin slumbers, still watching" if response['paused'] else "The goblin hungers again")
+    elif command == 'shutdown':
+        print_success("The goblin is leaving the dungeon")
+    else:
+        for key, value in sorted(response.items()):
+            if key != 'ok':
+                click.echo(f"   {key}: {json.dumps(value) if isinstance(value, (dict, list)) else value}")
+    if not response.get('ok'):
+        sys.exit(1)
+
+
+@cli.command()
+@click.option('--path', '-p', default='.', help='Dungeon path (repository)')
+@click.option('--enable/--disable', default=None, help='Let git ask the goblin what changed, or stop it')
+def fsmonitor(path, enable):
+    """
+    🪞 Lend the goblin's eyes to git
+    
+    Installs a core.fsmonitor hook so git status and git add ask a
+    running goblin which files changed instead of checking every one.
+    Without a goblin watching, git simply looks at everything itself.
+    """
+    from . import fsmonitor as goblin_fsmonitor
+    
+    try:
+        if enable is None:
+            if goblin_fsmonitor.is_installed(path):
+                click.echo("🪞 Git asks the goblin what changed")
+                click.echo(f"   hook: {goblin_fsmonitor.hook_path(path)}")
+                click.echo(f"   goblin: {'👁️  watching' if control.request(path, 'status') else '💤 not watching, git scans everything'}")
+            else:
+                click.echo("🪞 Git checks every file itself (enable with: gitgoblin fsmonitor --enable)")
+            return
+        
+        if enable:
+            if not goblin_fsmonitor.install(path):
+                print_error("Git refused the goblin's hook.")
+                sys.exit(1)
+            print_success("Git will ask the goblin what changed!")
+            click.echo("💡 Tip: git config core.untrackedCache true lets git skip unchanged directories too")
+        elif goblin_fsmonitor.uninstall(path):
+            print_success("Git checks every file itself again.")
+        else:
+            print_info("The goblin's hook was not installed here.")
+            
+    except Exception as e:
+        print_error(f"The mirror cracked: {e}")
+        sys.exit(1)
+
+
 @cli.command()
 @click.option('--path', '-p', default='.', help='Dungeon path')
 @click.option('--api-key', '-k', default=None, help='The Secret Key of AI wisdom')
 @click.option('--enable/--disable', default=None, help='Give/take the goblin its voice')
 @click.option('--show', is_flag=True, help='Reveal current enchantments')
-def enchant(path, api_key, enable, show):
+@click.option('--backend', default=None, help='AI realm to consult: groq, openai, ollama, local or custom')
+@click.option('--model', default=None, help='Model the AI realm should use')
+@click.option('--base-url', default=None, help='Base URL of an OpenAI-compatible AI realm')
+def enchant(path, api_key, enable, show, backend, model, base_url):
     """
     🧙 Bestow AI wisdom upon the common GitGoblin
     
@@ -183,9 +288,23 @@ def enchant(path, api_key, enable, show):
             
             ai_enabled = config.is_ai_enabled()
             click.echo(f"  AI Voice: {'✅ Enabled' if ai_enabled else '❌ Silenced'}")
+            try:
+                realm = config.get_ai_backend()
+                click.echo(f"  AI Realm: {realm.name} ({realm.model} at {realm.base_url})")
+            except ValueError as e:
+                click.echo(f"  AI Realm: ⚠️  {e}")
             click.echo()
             return
         
+        for key, value in (('ai_backend', backend), ('ai_model', model), ('ai_base_url', base_url)):
+            if value is not None:
+                if not config.set_config(key, value):
+                    print_error("The enchantment failed to take hold.")
+                    sys.exit(1)
+        if backend or model or base_url:
+            realm = config.get_ai_backend()
+            print_success(f"The Goblin will consult {realm.name} ({realm.model} at {realm.base_url})")
+        
         if api_key:
             if config.set_api_key(api_key):
                 print_success("The Secret Key has been inscribed into the configuration!")
@@ -197,7 +316,7 @@ def enchant(path, api_key, enable, show):
         
         if enable is not None:
             current_key = config.get_api_key()
-            if not current_key and enable:
+            if not current_key and enable and config.needs_api_key():
                 print_error("You cannot wake the voice without a Secret Key!")
                 click.echo("💡 Tip: Bestow a key first: gitgoblin enchant --api-key YOUR_KEY")
                 sys.exit(1)
@@ -213,23 +332,115 @@ def enchant(path, api_key, enable, show):
                 print_error("The enchantment failed to take hold.")
                 sys.exit(1)
         
-        if not api_key and enable is None and not show:
+        if not api_key and enable is None and not show and not (backend or model or base_url):
             click.echo("🧙 The Master's Guide to Enchantment\n")
             click.echo("Runes:")
             click.echo("  --api-key, -k    Bestow a Secret Key (Groq API)")
             click.echo("  --enable         Awaken the AI voice")
             click.echo("  --disable        Silence the AI voice")
             click.echo("  --show           Reveal current enchantments")
+            click.echo("  --backend        Choose the AI realm (groq, openai, ollama, local)")
+            click.echo("  --model          Choose the realm's model")
+            click.echo("  --base-url       Point at any OpenAI-compatible realm")
             click.echo("\nIncantations:")
             click.echo("  gitgoblin enchant --api-key sk-your-key")
             click.echo("  gitgoblin enchant --enable")
             click.echo("  gitgoblin enchant --show")
+        elif control.request(path, 'reload'):
+            # A running goblin would notice within a second anyway
+            print_info("The lurking goblin already feels the new enchantment.")
             
     except Exception as e:
         print_error(f"Enchantment failed: {e}")
         sys.exit(1)
 
 
+@cli.group()
+def hive():
+    """
+    🐝 One goblin haunting many dungeons
+    
+    Register repositories with 'hive add', then 'hive start' watches
+    them all from a single process. Repositories can be added and
+    removed while the hive runs.
+    """
+
+
+@hive.command('add')
+@click.argument('paths', nargs=-1, required=True)
+def hive_add(paths):
+    """Add dungeons (repositories) to the hive"""
+    from .hive import HiveRegistry
+    registry = HiveRegistry()
+    for path in paths:
+        try:
+            if registry.add(path):
+                print_success(f"The hive will haunt {Path(path).resolve()}")
+            else:
+                print_info(f"The hive already haunts {Path(path).resolve()}")
+        except ValueError as e:
+            print_error(str(e))
+            sys.exit(1)
+
+
+@hive.command('remove')
+@click.argument('paths', nargs=-1, required=True)
+def hive_remove(paths):
+    """Release dungeons from the hive"""
+    from .hive import HiveRegistry
+    registry = HiveRegistry()
+    for path in paths:
+        if registry.remove(path):
+            print_success(f"The hive releases {Path(path).resolve()}")
+        else:
+            print_info(f"The hive was not haunting {Path(path).resolve()}")
+
+
+@hive.command('list')
+def hive_list():
+    """Show the dungeons in the hive"""
+    from .hive import HiveRegistry
+    repos = HiveRegistry().repos()
+    if not repos:
+        print_info("The hive is empty. Add a dungeon: gitgoblin hive add <path>")
+        return
+    click.echo(f"🐝 The hive haunts {len(repos)} dungeon(s):")
+    for repo in repos:
+        click.echo(f"   {repo}")
+
+
+@hive.command('start')
+@click.option('--daemon', '-bg', is_flag=True, help='Run the hive as a lingering spirit')
+@click.option('--hoard', is_flag=True, help='Only hoard treasures locally, do not push')
+def hive_start(daemon, hoard):
+    """Watch every dungeon in the hive from one process"""
+    from .hive import GoblinHive
+    print_banner()
+    try:
+        swarm = GoblinHive(hoard_mode=hoard)
+        if daemon:
+            click.echo("🌙 The hive is now a lingering spirit in the shadows...")
+            click.echo("💡 Tip: Use 'gitgoblin hive stop' to cast it away\n")
+            swarm.run_daemon()
+        else:
+            click.echo("💡 Press Ctrl+C to send the hive back to sleep\n")
+            click.echo("-" * 60)
+            swarm.run()
+    except Exception as e:
+        print_error(f"The hive collapsed: {e}")
+        sys.exit(1)
+
+
+@hive.command('stop')
+def hive_stop():
+    """Cast the background hive back into the void"""
+    from .hive import hive_home
+    if control.stop_pid_file(hive_home() / 'hive.pid'):
+        print_success("The hive has been banished!")
+    else:
+        print_info("👻 There is no hive buzzing currently.")
+
+
 def main():
     """Main entry point"""
     cli()
@@ -4,7 +4,138 @@ GitGoblin Configuration Management
 
 import os
 import json
+import tempfile
+import threading
 from pathlib import Path
+from .backends import make_backend, needs_key
+
+
+# Defaults for tunables read through GoblinConfig.get_config
+DEFAULTS = {
+    'debounce_seconds': 2,
+    'batch_mode': False,
+    'batch_max_files': 50,
+    'batch_max_seconds': 10,
+    'push_min_interval': 5,
+    'push_max_backoff': 300,
+    'push_timeout': 30,
+    'plumbing_commits': True,
+    'ai_workers': 4,
+    'ai_deadline_seconds': 10,
+    'ai_backend': 'groq',
+    'ai_base_url': None,
+    'ai_model': None,
+    'ai_auth_header': 'Authorization',
+    'ai_auth_scheme': 'Bearer',
+    'ai_pool_size': 4,
+    'ai_connect_timeout': 3.05,
+    'ai_read_timeout': 30,
+    'ai_max_retries': 2,
+    'ai_requests_per_minute': 30,
+    'ai_rate_limit_wait': 2,
+    'ai_breaker_threshold': 3,
+    'ai_prompt_token_budget': 1000,
+    'ai_diff_max_bytes': 262144,
+    'ai_diff_timeout': 10,
+    'heuristic_min_confidence': 0.8,
+    'message_cache': True,
+    'message_cache_entries': 256,
+    'message_cache_bytes': 1_000_000,
+    'journal': True,
+    'journal_compact_bytes': 262144,
+}
+
+
+class _ConfigFile:
+    """The parsed contents of one config file, shared by every GoblinConfig in the process
+
+    The file is only parsed again when its mtime, size or inode changes, and
+    it is always replaced atomically, so readers never see half of it.
+    Any reader may notice that another process changed it, but listeners
+    only hear about it, with (old, new) contents, when ``dispatch`` runs.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.data = {}
+        self.listeners = []
+        self._stamp = False
+        self._pending = None
+        self._lock = threading.RLock()
+    
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+    
+    def _read(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"⚠️  Could not load config: {e}")
+            return {}
+    
+    def current(self):
+        """The contents, re-read first if the file changed on disk"""
+        stamp = self._stat()
+        with self._lock:
+            if stamp == self._stamp:
+                return self.data
+            old, first = self.data, self._stamp is False
+            self.data, self._stamp = self._read(), stamp
+            if not first:
+                # Several reloads before a dispatch collapse into one change
+                since = self._pending[0] if self._pending else old
+                self._pending = (since, self.data)
+            return self.data
+    
+    def dispatch(self):
+        """Tell listeners about a change noticed since the last dispatch, outside the lock"""
+        with self._lock:
+            pending, self._pending = self._pending, None
+            listeners = list(self.listeners)
+        if pending and pending[0] != pending[1]:
+            for listener in listeners:
+                listener(*pending)
+    
+    def update(self, values):
+        """Merge values into the file and write it atomically"""
+        with self._lock:
+            data = dict(self.current(), **values)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(self.path.parent), prefix='.gitgoblin.config.')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            # Listeners hear about writes from this process too, on the next dispatch
+            since = self._pending[0] if self._pending else self.data
+            self._pending = (since, data)
+            self.data, self._stamp = data, self._stat()
+
+
+# One _ConfigFile per config path for the whole process
+_FILES = {}
+_FILES_LOCK = threading.Lock()
+
+
+def _shared_file(path):
+    with _FILES_LOCK:
+        shared = _FILES.get(path)
+        if shared is None:
+            shared = _FILES[path] = _ConfigFile(path)
+        return shared
 
 
 class GoblinConfig:
@@ -13,38 +144,46 @@ class GoblinConfig:
     def __init__(self, repo_path='.'):
         self.repo_path = Path(repo_path).resolve()
         self.config_file = self.repo_path / '.git' / 'gitgoblin.config.json'
-        self.config = self._load_config()
+        self._file = _shared_file(self.config_file)
     
-    def _load_config(self):
-        """Load configuration from file"""
-        if self.config_file.exists():
-            try:
-                with open(self.config_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"⚠️  Could not load config: {e}")
-                return {}
-        return {}
-    
-    def _save_config(self):
-        """Save configuration to file"""
+    @property
+    def config(self):
+        """The current settings (shared, and re-read when the file changes)"""
+        return self._file.current()
+    
+    def _update(self, **values):
+        """Save settings"""
         try:
-            # Ensure .git directory exists
-            self.config_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
+            self._file.update(values)
             return True
         except Exception as e:
             print(f"⚠️  Could not save config: {e}")
             return False
     
+    def refresh(self):
+        """Re-read the file if another process changed it and tell the listeners
+        
+        Listeners run on the calling thread, so only the thread that owns
+        them (the watcher's config poller) should call this.
+        """
+        self._file.current()
+        self._file.dispatch()
+    
+    def add_listener(self, listener):
+        """Call listener(old, new) whenever the file changes under a running goblin"""
+        with self._file._lock:
+            self._file.listeners.append(listener)
+    
+    def remove_listener(self, listener):
+        """Stop calling a listener added with add_listener"""
+        with self._file._lock:
+            if listener in self._file.listeners:
+                self._file.listeners.remove(listener)
+    
     def set_api_key(self, api_key):
         """Set Groq API key"""
-        self.config['groq_api_key'] = api_key
         # Also set as generic ai_api_key for flexibility
-        self.config['ai_api_key'] = api_key
-        return self._save_config()
+        return self._update(groq_api_key=api_key, ai_api_key=api_key)
     
     def get_api_key(self):
         """Get AI API key (Groq or legacy DeepSeek)"""
@@ -73,8 +212,7 @@ class GoblinConfig:
     
     def enable_ai_commits(self, enabled=True):
         """Enable or disable AI-generated commit messages"""
-        self.config['ai_commits_enabled'] = enabled
-        return self._save_config()
+        return self._update(ai_commits_enabled=enabled)
     
     def is_ai_enabled(self):
         """Check if AI commits are enabled"""
@@ -86,9 +224,79 @@ class GoblinConfig:
     
     def set_config(self, key, value):
         """Set a configuration value"""
-        self.config[key] = value
-        return self._save_config()
+        return self._update(**{key: value})
     
     def get_config(self, key, default=None):
         """Get a configuration value"""
+        if default is None:
+            default = DEFAULTS.get(key)
         return self.config.get(key, default)
+
+    def is_batch_enabled(self):
+        """Check if batch commit mode is enabled"""
+        return self.get_config('batch_mode')
+
+    def get_batch_limits(self):
+        """Get (max files, max seconds) for a single batch commit"""
+        return (
+            int(self.get_config('batch_max_files')),
+            float(self.get_config('batch_max_seconds'))
+        )
+
+    def needs_api_key(self):
+        """Whether the configured AI backend refuses requests without a key"""
+        return needs_key(self.get_config('ai_backend'))
+
+    def get_ai_backend(self):
+        """Build the configured AI backend (groq, openai, ollama, local or a custom base URL)"""
+        return make_backend(
+            self.get_config('ai_backend'),
+            api_key=self.get_api_key(),
+            base_url=self.get_config('ai_base_url'),
+            model=self.get_config('ai_model'),
+            auth_header=self.get_config('ai_auth_header'),
+            auth_scheme=self.get_config('ai_auth_scheme')
+        )
+
+    def get_ai_http_settings(self):
+        """Get keyword arguments for the AI client's HTTP session, retries and limits"""
+        return {
+            'pool_size': int(self.get_config('ai_pool_size')),
+            'connect_timeout': float(self.get_config('ai_connect_timeout')),
+            'read_timeout': float(self.get_config('ai_read_timeout')),
+            'max_retries': int(self.get_config('ai_max_retries')),
+            'requests_per_minute': float(self.get_config('ai_requests_per_minute')),
+            'rate_limit_wait': float(self.get_config('ai_rate_limit_wait')),
+            'breaker_threshold': int(self.get_config('ai_breaker_threshold')),
+            'prompt_token_budget': int(self.get_config('ai_prompt_token_budget')),
+            'diff_max_bytes': int(self.get_config('ai_diff_max_bytes')),
+            'diff_timeout': float(self.get_config('ai_diff_timeout')),
+            'min_confidence': self._optional_float('heuristic_min_confidence'),
+        }
+
+    def _optional_float(self, key):
+        """A float setting where null is a meaningful value of its own"""
+        value = self.get_config(key)
+        return None if value is None else float(value)
+
+    def get_message_cache_settings(self):
+        """Get keyword arguments for the AI message cache"""
+        return {
+            'max_entries': int(self.get_config('message_cache_entries')),
+            'max_bytes': int(self.get_config('message_cache_bytes')),
+        }
+
+    def get_ai_pool_settings(self):
+        """Get keyword arguments for the AI message worker pool"""
+        return {
+            'workers': int(self.get_config('ai_workers')),
+            'deadline': float(self.get_config('ai_deadline_seconds')),
+        }
+
+    def get_push_settings(self):
+        """Get keyword arguments for the background push scheduler"""
+        return {
+            'min_interval': float(self.get_config('push_min_interval')),
+            'max_backoff': float(self.get_config('push_max_backoff')),
+            'timeout': float(self.get_config('push_timeout')),
+        }
@@ -0,0 +1,267 @@
+"""
+GitGoblin Control Channel - Whisper to a running goblin over a Unix socket
+
+A goblin started with ``summon`` listens on ``.git/gitgoblin.sock``. Each
+connection carries one JSON request line, e.g. ``{"command": "status"}``,
+and gets one JSON response line back, always with an ``ok`` field.
+"""
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from pathlib import Path
+
+from . import __version__
+
+
+SOCKET_NAME = 'gitgoblin.sock'
+
+COMMANDS = ('status', 'pending', 'metrics', 'flush', 'pause', 'resume', 'reload', 'shutdown')
+
+# Spoken by hooks rather than people; not offered by whisper
+HOOK_COMMANDS = ('fsmonitor',)
+
+# sun_path holds 108 bytes on Linux and 104 on macOS
+MAX_SOCKET_PATH = 100
+
+
+def socket_path(repo_path='.'):
+    """Where the goblin of a repository listens"""
+    return Path(repo_path).resolve() / '.git' / SOCKET_NAME
+
+
+def request(repo_path, command, timeout=2.0):
+    """Send one command to a running goblin; None when none is listening"""
+    path = socket_path(repo_path)
+    if not hasattr(socket, 'AF_UNIX') or not path.exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall(json.dumps({'command': command}).encode() + b'\n')
+            data = b''
+            while not data.endswith(b'\n'):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        return json.loads(data)
+    except (OSError, ValueError):
+        return None
+
+
+def wait_until_gone(repo_path, timeout=10.0):
+    """Wait for a goblin to finish shutting down; False if it is still there"""
+    path = socket_path(repo_path)
+    deadline = time.monotonic() + timeout
+    while path.exists():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def stop_pid_file(pid_file, timeout=5.0):
+    """SIGTERM the goblin named in a pid file and wait for it to exit; False if none was running
+
+    The fallback for goblins without a control socket.
+    """
+    pid_file = Path(pid_file)
+    try:
+        pid = int(pid_file.read_text().strip())
+        os.kill(pid, signal.SIGTERM)
+    except (ProcessLookupError, ValueError):
+        # A leftover pid file only confuses crystalball
+        try:
+            pid_file.unlink()
+        except OSError:
+            pass
+        return False
+    except OSError:
+        return False
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            os.kill(pid, 0)
+        except OSError:
+            break
+        time.sleep(0.05)
+    return True
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    """Read one request line, answer with one response line"""
+
+    def handle(self):
+        try:
+            message = json.loads(self.rfile.readline(65536))
+            command = message['command']
+        except (ValueError, KeyError, TypeError):
+            response = {'ok': False, 'error': 'bad request'}
+        else:
+            response = self.server.control.dispatch(command, message)
+        self.wfile.write(json.dumps(response).encode() + b'\n')
+
+
+class _ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class GoblinControl:
+    """Answer control requests for a running GoblinWatcher
+
+    Commands:
+        status    what the goblin is doing
+        pending   changes still debouncing and commits waiting for a push
+        metrics   the stage latency snapshot, flushed first
+        flush     settle every pending change and push now
+        pause     keep watching, but stop committing
+        resume    commit again
+        reload    apply config file changes now
+        shutdown  finish up and exit
+
+    And, for git's core.fsmonitor hook:
+        fsmonitor paths changed since ``token``
+    """
+
+    def __init__(self, watcher, hoard_mode=False, batch_mode=False, ritual_mode=False, on_shutdown=None):
+        self.watcher = watcher
+        # What 'shutdown' does; a hive lets go of the repo instead of stopping
+        self.on_shutdown = on_shutdown
+        self.path = socket_path(watcher.repo_path)
+        self.modes = {'hoard_mode': hoard_mode, 'batch_mode': batch_mode, 'ritual_mode': ritual_mode}
+        self.started_at = time.time()
+        self._server = None
+        self._thread = None
+        self._inode = None
+
+    def start(self):
+        """Start listening; False if the socket cannot be used"""
+        if not hasattr(socket, 'AF_UNIX'):
+            return False
+        if len(str(self.path)) > MAX_SOCKET_PATH:
+            print("⚠️  The dungeon path is too deep for the goblin's whisper socket")
+            return False
+        if self.path.exists():
+            if request(self.watcher.repo_path, 'status') is not None:
+                print("⚠️  Another goblin already answers whispers in this dungeon")
+                return False
+            # Left behind by a goblin that did not get to clean up
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+        # Only the owner may whisper: the socket can shut the goblin down
+        umask = os.umask(0o177)
+        try:
+            self._server = _ControlServer(str(self.path), _ControlHandler)
+        except OSError as e:
+            print(f"⚠️  The goblin cannot open its whisper socket: {e}")
+            return False
+        finally:
+            os.umask(umask)
+        self._server.control = self
+        self._inode = os.stat(self.path).st_ino
+        self._thread = threading.Thread(target=self._server.serve_forever, name='goblin-control', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop listening and remove the socket"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        try:
+            # Never remove a socket a newer goblin has bound in the meantime
+            if os.stat(self.path).st_ino == self._inode:
+                self.path.unlink()
+        except OSError:
+            pass
+
+    def dispatch(self, command, message=None):
+        """Run one command and build its response"""
+        if command not in COMMANDS and command not in HOOK_COMMANDS:
+            return {'ok': False, 'error': f"unknown command: {command}"}
+        try:
+            if command in HOOK_COMMANDS:
+                response = getattr(self, f'_{command}')(message or {})
+            else:
+                response = getattr(self, f'_{command}')()
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+        response['ok'] = True
+        return response
+
+    def _status(self):
+        handler = self.watcher._handler
+        pusher = self.watcher.pusher
+        config = self.watcher.config
+        return dict(
+            self.modes,
+            pid=os.getpid(),
+            version=__version__,
+            repo=str(self.watcher.repo_path),
+            started_at=self.started_at,
+            uptime=time.time() - self.started_at,
+            paused=bool(handler and handler.paused),
+            debounce=self.watcher.debounce_seconds,
+            ai_enabled=bool(self.watcher.ai_generator and config.is_ai_enabled()),
+            pending_changes=len(handler.pending_changes()) if handler else 0,
+            pending_pushes=pusher.pending() if pusher else 0,
+        )
+
+    def _pending(self):
+        handler = self.watcher._handler
+        pusher = self.watcher.pusher
+        changes = handler.pending_changes() if handler else []
+        return {
+            'changes': [{'path': path, 'kind': kind, 'settles_in': left} for path, kind, left in changes],
+            'pushes': pusher.pending() if pusher else 0,
+        }
+
+    def _metrics(self):
+        from .metrics import load_metrics
+        self.watcher.metrics.flush(force=True)
+        return {'metrics': load_metrics(self.watcher.repo_path)}
+
+    def _flush(self):
+        handler = self.watcher._handler
+        pusher = self.watcher.pusher
+        return {
+            'changes': handler.settle_now() if handler else 0,
+            'pushes': pusher.push_now() if pusher else 0,
+        }
+
+    def _pause(self):
+        if self.watcher._handler:
+            self.watcher._handler.pause()
+        return {'paused': True}
+
+    def _resume(self):
+        if self.watcher._handler:
+            self.watcher._handler.resume()
+        return {'paused': False}
+
+    def _reload(self):
+        # Applied by the watcher's config thread, or the hive loop
+        applied = self.watcher.reload_config()
+        return {'debounce': self.watcher.debounce_seconds, 'applied': applied}
+
+    def _shutdown(self):
+        (self.on_shutdown or self.watcher.stop)()
+        return {'stopping': True}
+
+    def _fsmonitor(self, message):
+        fsmonitor = self.watcher.fsmonitor
+        if fsmonitor is None:
+            raise RuntimeError('the goblin is not watching')
+        token, paths = fsmonitor.changed_since(str(message.get('token', '')))
+        return {'token': token, 'paths': paths}
@@ -4,150 +4,652 @@ GitGoblin Core - File watching and git automation
 
 import os
 import time
+import heapq
+import threading
 import subprocess
-import signal
 import re
 from pathlib import Path
 from datetime import datetime
-from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from .ai_commit import AICommitGenerator
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from .ai_commit import AICommitGenerator, AIMessagePool
 from .config import GoblinConfig
+from .msgcache import MessageCache
+from .pusher import GoblinPusher
+from .events import ChangeCoalescer
+from .ignore import GoblinIgnore
+from .watches import GoblinWatchTree, make_observer
+from .gitsession import GitSession, GitSessionError
+from .index import GitIndex, GitIndexError
+from .heuristics import classify, collect_changes
+from .metrics import GoblinMetrics
+from .journal import GoblinJournal
+from .fsmonitor import GoblinFsmonitor
+from .control import GoblinControl, stop_pid_file
+
+
+# How long a batch waits for more files to settle before it is committed
+BATCH_SETTLE_SECONDS = 0.5
+
+# How often a running goblin checks its config file for changes
+CONFIG_POLL_SECONDS = 1.0
+
+# Settings the AI generator is built from; changing one rebuilds it
+AI_LIVE_KEYS = ('ai_commits_enabled', 'ai_workers', 'ai_deadline_seconds')
+AI_BUILD_KEYS = ('groq_api_key', 'deepseek_api_key', 'heuristic_min_confidence', 'message_cache',
+                 'message_cache_entries', 'message_cache_bytes')
 
 
 class GoblinFileHandler(FileSystemEventHandler):
-    """Handles file system events for GitGoblin"""
+    """Handles file system events for GitGoblin
+
+    Raw create/modify/delete/move events are folded into one net change per
+    path by a ChangeCoalescer. Every change (re)arms a debounce deadline on a
+    min-heap. The watch loop
+    sleeps on a condition variable until the earliest deadline expires, so it
+    is idle while nothing is pending and wakes exactly when a file settles.
+    """
     
     def __init__(self, repo_path, debounce_seconds=2):
         self.repo_path = Path(repo_path).resolve()
         self.debounce_seconds = debounce_seconds
-        self.pending_files = set()
-        self.last_change_time = {}
+        self.coalescer = ChangeCoalescer()
+        self.ignore = GoblinIgnore(self.repo_path)
+        
+        # Set by the watcher when watches are pruned per directory, when
+        # debounce waits should be timed, when changes are journaled and
+        # when git's fsmonitor hook asks what changed
+        self.watch_tree = None
+        self.metrics = None
+        self.journal = None
+        self.fsmonitor = None
+        
+        # Called, under the lock, when the next deadline moves earlier; the
+        # multi-repo hive uses it to wake its dispatcher
+        self.on_armed = None
+        
+        # (deadline, path) entries; stale ones are skipped when popped
+        self._deadlines = []
+        self._cond = threading.Condition()
+        self._woken = False
         
+        # While paused, changes keep being collected but nothing settles;
+        # settle_now makes everything pending settle at once
+        self.paused = False
+        self._settle_all = False
+    
+    @property
+    def pending_files(self):
+        """Paths with a net change that has not settled yet"""
+        with self._cond:
+            return set(self.coalescer.changes)
+    
+    def pending_changes(self):
+        """(path, kind, seconds until it settles) for every unsettled change"""
+        now = time.monotonic()
+        with self._cond:
+            return sorted(
+                (path, record.kind, max(0.0, record.changed_at + self.debounce_seconds - now))
+                for path, record in self.coalescer.changes.items()
+            )
+    
+    def _posix(self, path):
+        """Repo-relative '/'-separated path for an event path, or None if outside"""
+        if not path:
+            return None
+        try:
+            return Path(path).relative_to(self.repo_path).as_posix()
+        except ValueError:
+            return None
+    
+    def _relative(self, path, is_dir=False):
+        """Repo-relative path for an event path, or None if it should be ignored"""
+        posix_path = self._posix(path)
+        if posix_path is None or posix_path == '.':
+            return None
+        
+        if self.ignore.is_source(posix_path):
+            # An ignore file changed: recompile before judging anything else
+            self.ignore.invalidate()
+            if self.watch_tree:
+                self.watch_tree.replan()
+            if self.fsmonitor:
+                # Directories may have gained or lost their watches
+                self.fsmonitor.forget()
+        else:
+            self.ignore.refresh_if_stale()
+        
+        if self._should_ignore(posix_path, is_dir):
+            return None
+        return str(Path(posix_path))
+    
+    def _touched(self, event):
+        """Tell git's fsmonitor about every path an event touched, ignored or not"""
+        if self.fsmonitor is None:
+            return
+        for path in (event.src_path, getattr(event, 'dest_path', None)):
+            posix_path = self._posix(path)
+            if posix_path:
+                self.fsmonitor.touched(posix_path, event.is_directory)
+    
     def on_modified(self, event):
         """Called when a file is modified"""
         if event.is_directory:
             return
+        self._touched(event)
         
-        file_path = Path(event.src_path)
-        
-        if self._should_ignore(file_path):
+        relative_path = self._relative(event.src_path)
+        if relative_path is None:
             return
         
-        relative_path = file_path.relative_to(self.repo_path)
-        self.pending_files.add(str(relative_path))
-        self.last_change_time[str(relative_path)] = time.time()
+        with self._cond:
+            self._arm(self.coalescer.modified(relative_path, time.monotonic()))
         
         print(f"👁️  Goblin spotted changes in: {relative_path}")
     
-    def _should_ignore(self, file_path):
-        """Check if file should be ignored"""
-        ignore_patterns = [
-            '.git', '__pycache__', '.pyc', '.pyo', '.pyd',
-            '.DS_Store', '.swp', '~', '.tmp', 'node_modules',
-            '.vscode', '.idea', '.env', '.log', '.pid'
-        ]
+    def on_created(self, event):
+        """Called when a file or directory is created"""
+        self._touched(event)
+        if event.is_directory and self.watch_tree:
+            created = self._posix(event.src_path)
+            if created:
+                self.watch_tree.directory_created(created)
         
-        path_str = str(file_path)
-        return any(pattern in path_str for pattern in ignore_patterns)
+        relative_path = self._relative(event.src_path, event.is_directory)
+        if relative_path is None:
+            return
+        
+        with self._cond:
+            self._arm(self.coalescer.created(relative_path, event.is_directory, time.monotonic()))
+        
+        print(f"👁️  Goblin spotted a new treasure: {relative_path}")
     
-    def get_pending_files(self):
-        """Get files that are ready to be committed"""
-        current_time = time.time()
+    def on_deleted(self, event):
+        """Called when a file or directory is deleted"""
+        self._touched(event)
+        if event.is_directory and self.watch_tree:
+            removed = self._posix(event.src_path)
+            if removed:
+                self.watch_tree.directory_removed(removed)
+        
+        relative_path = self._relative(event.src_path, event.is_directory)
+        if relative_path is None:
+            return
+        
+        with self._cond:
+            self._arm(self.coalescer.deleted(relative_path, event.is_directory, time.monotonic()))
+        
+        print(f"👁️  Goblin spotted a treasure vanish: {relative_path}")
+    
+    def on_moved(self, event):
+        """Called when a file or directory is renamed"""
+        self._touched(event)
+        if event.is_directory and self.watch_tree:
+            removed = self._posix(event.src_path)
+            created = self._posix(getattr(event, 'dest_path', None))
+            if removed:
+                self.watch_tree.directory_removed(removed)
+            if created:
+                self.watch_tree.directory_created(created)
+        
+        src_path = self._relative(event.src_path, event.is_directory)
+        dest_path = self._relative(getattr(event, 'dest_path', None), event.is_directory)
+        if src_path is None and dest_path is None:
+            return
+        
+        with self._cond:
+            live = self.coalescer.moved(src_path, dest_path, event.is_directory, time.monotonic())
+            self._arm(live)
+        
+        if dest_path is None:
+            print(f"👁️  Goblin spotted a treasure vanish: {src_path}")
+        else:
+            print(f"👁️  Goblin spotted a treasure move: {src_path or '?'} → {dest_path}")
+    
+    def _arm(self, paths):
+        """(Re)arm debounce deadlines for live paths (caller holds the lock)"""
+        if self.journal and paths:
+            self.journal.changed(paths)
+        wake = False
+        for relative_path in paths:
+            deadline = self.coalescer.changes[relative_path].changed_at + self.debounce_seconds
+            wake = wake or not self._deadlines or deadline < self._deadlines[0][0]
+            heapq.heappush(self._deadlines, (deadline, relative_path))
+        if wake:
+            self._cond.notify_all()
+            if self.on_armed:
+                self.on_armed()
+    
+    def _should_ignore(self, relative_path, is_dir=False):
+        """Check if a repo-relative path is ignored by git's rules"""
+        return self.ignore.is_ignored(relative_path, is_dir)
+    
+    def _pop_ready(self, now):
+        """Pop every path whose debounce expired (caller holds the lock)"""
         ready_files = []
+        heap = self._deadlines
+        changes = self.coalescer.changes
         
-        for file_path in list(self.pending_files):
-            if current_time - self.last_change_time[file_path] >= self.debounce_seconds:
+        if self.paused:
+            return ready_files
+        if self._settle_all:
+            self._settle_all = False
+            heap.clear()
+            for file_path, record in list(changes.items()):
+                self.coalescer.pop(file_path)
                 ready_files.append(file_path)
-                self.pending_files.remove(file_path)
-                del self.last_change_time[file_path]
+                if self.metrics:
+                    self.metrics.observe('debounce', now - record.changed_at)
+            return ready_files
+        
+        while heap and heap[0][0] <= now:
+            deadline, file_path = heapq.heappop(heap)
+            record = changes.get(file_path)
+            # Cancelled, or a later change re-armed this path and its newer
+            # entry is still queued
+            if record is None or record.changed_at + self.debounce_seconds > deadline:
+                continue
+            self.coalescer.pop(file_path)
+            ready_files.append(file_path)
+            if self.metrics:
+                self.metrics.observe('debounce', now - record.changed_at)
         
         return ready_files
+    
+    def next_deadline(self):
+        """Monotonic time at which the next pending file settles, or None"""
+        with self._cond:
+            if self.paused or not self._deadlines:
+                return None
+            return time.monotonic() if self._settle_all else self._deadlines[0][0]
+    
+    def get_pending_files(self):
+        """Get files that are ready to be committed"""
+        with self._cond:
+            return self._pop_ready(time.monotonic())
+    
+    def wake(self):
+        """Make a blocked wait_for_ready return early"""
+        with self._cond:
+            self._woken = True
+            self._cond.notify_all()
+    
+    def restore(self, paths):
+        """Pick up changes a previous goblin saw but never committed"""
+        now = time.monotonic()
+        with self._cond:
+            for relative_path in paths:
+                if os.path.lexists(self.repo_path / relative_path):
+                    self._arm(self.coalescer.modified(relative_path, now))
+                else:
+                    self._arm(self.coalescer.deleted(relative_path, False, now))
+    
+    def set_debounce(self, seconds):
+        """Change the debounce; pending changes are re-armed with the new one"""
+        with self._cond:
+            self.debounce_seconds = seconds
+            self._deadlines = [
+                (record.changed_at + seconds, path) for path, record in self.coalescer.changes.items()
+            ]
+            heapq.heapify(self._deadlines)
+            self._cond.notify_all()
+            if self.on_armed:
+                self.on_armed()
+    
+    def pause(self):
+        """Keep collecting changes, but let none of them settle"""
+        with self._cond:
+            self.paused = True
+    
+    def resume(self):
+        """Let changes settle again; anything overdue settles right away"""
+        with self._cond:
+            self.paused = False
+            self._cond.notify_all()
+            if self.on_armed:
+                self.on_armed()
+    
+    def settle_now(self):
+        """Treat every pending change as settled without waiting out its debounce"""
+        with self._cond:
+            if not self.coalescer.changes:
+                return 0
+            self._settle_all = True
+            self._cond.notify_all()
+            if self.on_armed:
+                self.on_armed()
+            return len(self.coalescer.changes)
+    
+    def wait_for_ready(self, timeout=None):
+        """Block until at least one file settles, or until timeout seconds pass"""
+        end = None if timeout is None else time.monotonic() + timeout
+        
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                ready_files = self._pop_ready(now)
+                if ready_files:
+                    return ready_files
+                if self._woken:
+                    self._woken = False
+                    return []
+                
+                wait = None
+                if self._deadlines and not self.paused:
+                    wait = self._deadlines[0][0] - now
+                if end is not None:
+                    remaining = end - now
+                    if remaining <= 0:
+                        return []
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
 
 
 class GoblinWatcher:
     """Main GitGoblin watcher class"""
     
-    def __init__(self, repo_path='.', debounce_seconds=2):
+    def __init__(self, repo_path='.', debounce_seconds=None):
         self.repo_path = Path(repo_path).resolve()
-        self.debounce_seconds = debounce_seconds
         self.pid_file = self.repo_path / '.git' / 'gitgoblin.pid'
         
         # Load configuration
         self.config = GoblinConfig(repo_path)
+        # Without an explicit debounce the config decides, and may change it later
+        self._debounce_from_config = debounce_seconds is None
+        if debounce_seconds is None:
+            debounce_seconds = float(self.config.get_config('debounce_seconds'))
+        self.debounce_seconds = debounce_seconds
+        self.batch_max_files, self.batch_max_seconds = self.config.get_batch_limits()
         
-        # Initialize AI commit generator if API key is available
-        api_key = self.config.get_api_key()
-        self.ai_generator = AICommitGenerator(api_key, repo_path) if api_key else None
+        # Background push scheduler, git plumbing session and AI worker
+        # pool, only alive while the watch loop runs
+        self.pusher = None
+        self.git_session = None
+        self.ai_pool = None
+        self._ai_executor = None
+        self._config_poll = None
+        self._config_waker = None
+        self._config_cond = threading.Condition()
+        self._config_asked = 0
+        self._config_done = 0
+        self.journal = None
+        self.fsmonitor = None
+        
+        # Per-stage timings, exported under .git/ for crystalball and Prometheus
+        self.metrics = GoblinMetrics(self.repo_path)
+        
+        # Lets another thread end the watch loop (see stop)
+        self._stop_requested = threading.Event()
+        self._handler = None
+        
+        # AI commit generator, rebuilt when its settings change
+        self.ai_generator = self._build_ai_generator()
         
         # Verify git repository
         if not (self.repo_path / '.git').exists():
             raise ValueError(f"Not a git repository: {repo_path}")
     
-    def generate_commit_message(self, file_path):
+    def _build_ai_generator(self):
+        """The AI commit generator for the current config, or None without a usable backend"""
+        # Only when an API key is available (or the configured backend,
+        # e.g. a local server, needs none)
+        api_key = self.config.get_api_key()
+        if not api_key and self.config.needs_api_key():
+            return None
+        cache = None
+        if self.config.get_config('message_cache'):
+            cache = MessageCache(self.repo_path, **self.config.get_message_cache_settings())
+        try:
+            return AICommitGenerator(
+                api_key, self.repo_path, cache=cache, backend=self.config.get_ai_backend(),
+                **self.config.get_ai_http_settings()
+            )
+        except ValueError as e:
+            print(f"⚠️  {e}")
+            return None
+    
+    def _config_changed(self, old, new):
+        """Apply settings changed in the config file while the goblin runs"""
+        changed = sorted(key for key in set(old) | set(new) if old.get(key) != new.get(key))
+        print(f"🔁 The Goblin feels a new enchantment: {', '.join(changed)}")
+        
+        if self._debounce_from_config and 'debounce_seconds' in changed:
+            self.debounce_seconds = float(self.config.get_config('debounce_seconds'))
+            if self._handler is not None:
+                self._handler.set_debounce(self.debounce_seconds)
+        
+        if self.pusher and any(key.startswith('push_') for key in changed):
+            self.pusher.configure(**self.config.get_push_settings())
+        
+        if self.ai_pool and 'ai_deadline_seconds' in changed:
+            self.ai_pool.deadline = self.config.get_ai_pool_settings()['deadline']
+        
+        if any(key in AI_BUILD_KEYS or (key.startswith('ai_') and key not in AI_LIVE_KEYS) for key in changed):
+            self._rebuild_ai()
+    
+    def _rebuild_ai(self):
+        """Swap in an AI generator built from the new config"""
+        old = self.ai_generator
+        pool = self.ai_pool
+        self.ai_generator = self._build_ai_generator()
+        if self._handler is not None:
+            if self.ai_generator and self.ai_pool:
+                self.ai_pool.generator = self.ai_generator
+            elif self.ai_generator:
+                self.ai_pool = AIMessagePool(
+                    self.ai_generator, executor=self._ai_executor, **self.config.get_ai_pool_settings()
+                )
+            elif self.ai_pool:
+                self.ai_pool.shutdown()
+                self.ai_pool = None
+        if old and pool:
+            # Workers may still be mid-request on the old session
+            pool.retire(old)
+        elif old:
+            old.close()
+    
+    def _poll_config(self, stop):
+        """Check the config file for changes until stopped
+        
+        The only thread that applies config changes, so listeners never
+        race each other or whoever happened to read the file first.
+        """
+        while True:
+            with self._config_cond:
+                if self._config_asked == self._config_done:
+                    self._config_cond.wait(CONFIG_POLL_SECONDS)
+            if stop.is_set():
+                return
+            self.apply_config()
+    
+    def apply_config(self):
+        """Apply config file changes and answer the reloads asked for so far
+        
+        Only for the thread that owns config changes: the poller, or the
+        hive loop for its repos.
+        """
+        with self._config_cond:
+            asked = self._config_asked
+        self.config.refresh()
+        with self._config_cond:
+            self._config_done = asked
+            self._config_cond.notify_all()
+    
+    def config_pending(self):
+        """Whether a reload was asked for that apply_config has not answered yet"""
+        with self._config_cond:
+            return self._config_asked > self._config_done
+    
+    def reload_config(self, timeout=2.0):
+        """Have the config thread apply file changes now; False if it is not running or too slow"""
+        with self._config_cond:
+            waker = self._config_waker
+            if self._config_poll is None and waker is None:
+                return False
+            self._config_asked += 1
+            asked = self._config_asked
+            self._config_cond.notify_all()
+        if waker:
+            waker()
+        with self._config_cond:
+            return self._config_cond.wait_for(lambda: self._config_done >= asked, timeout)
+    
+    def _consult_ai(self, file_path, ai_future=None):
+        """Get an AI message, waiting on a prefetched request if there is one"""
+        if not (self.ai_generator and self.config.is_ai_enabled()):
+            return None
+        try:
+            if ai_future is not None and self.ai_pool:
+                print("🤖 The Goblin awaits the AI spirits' inscription...")
+                ai_message = self.ai_pool.wait(ai_future)
+            elif self.ai_pool:
+                # Through the pool, so a config reload never closes the generator under it
+                print("🤖 The Goblin is consulting the AI spirits for an inscription...")
+                ai_message = self.ai_pool.wait(self.ai_pool.submit(file_path))
+            else:
+                print("🤖 The Goblin is consulting the AI spirits for an inscription...")
+                ai_message = self.ai_generator.generate_commit_message(file_path)
+            if ai_message:
+                return ai_message
+            print("⚠️  The spirits are silent, using a common grumble")
+        except FutureTimeoutError:
+            print("⌛ The spirits took too long, using a simple timestamp grumble")
+        except Exception as e:
+            print(f"⚠️  The AI enchantment flickered: {e}")
+            print("📝 Using a simple timestamp grumble")
+        return None
+    
+    def _prefetch_messages(self, groups):
+        """Start AI requests for several upcoming commits at once
+
+        Returns one future per group (None when AI is off), so commits can be
+        finalized in order while their messages are generated concurrently.
+        """
+        if not (self.ai_pool and self.ai_generator and self.config.is_ai_enabled()):
+            return [None] * len(groups)
+        return [self.ai_pool.submit(group[0] if len(group) == 1 else group) for group in groups]
+    
+    def generate_commit_message(self, file_path, ai_future=None):
         """Generate a commit message using AI or fallback to simple message"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         # Try AI generation if enabled and available
-        if self.ai_generator and self.config.is_ai_enabled():
-            try:
-                print("🤖 The Goblin is consulting the AI spirits for an inscription...")
-                ai_message = self.ai_generator.generate_commit_message(file_path)
-                if ai_message:
-                    return ai_message
-                else:
-                    print("⚠️  The spirits are silent, using a common grumble")
-            except Exception as e:
-                print(f"⚠️  The AI enchantment flickered: {e}")
-                print("📝 Using a simple timestamp grumble")
+        ai_message = self._consult_ai(file_path, ai_future)
+        if ai_message:
+            return ai_message
         
-        # Fallback to simple message
+        # Fallback to a message guessed from the paths and diff shape
+        message = self._heuristic_message([file_path])
+        if message:
+            return message
+        return f"Updated {file_path} at {timestamp}"
+    
+    def _heuristic_message(self, file_paths):
+        """Offline conventional commit message for paths, or None"""
         try:
-            # Get diff stats
-            result = subprocess.run(
-                ['git', 'diff', '--stat', 'HEAD', file_path],
+            guess = classify(collect_changes(self.repo_path, file_paths))
+        except (OSError, subprocess.SubprocessError, ValueError):
+            return None
+        return guess.message if guess else None
+    
+    def generate_batch_message(self, file_paths, ai_future=None):
+        """Generate one commit message covering a whole batch of files"""
+        if len(file_paths) == 1:
+            return self.generate_commit_message(file_paths[0], ai_future)
+        
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        # Try AI generation if enabled and available
+        ai_message = self._consult_ai(file_paths, ai_future)
+        if ai_message:
+            return ai_message
+        
+        # Fallback to a guess, then to a summary of the batch
+        message = self._heuristic_message(file_paths)
+        if message:
+            return message
+        shown = ', '.join(file_paths[:3])
+        if len(file_paths) > 3:
+            shown += f", +{len(file_paths) - 3} more"
+        return f"Updated {len(file_paths)} files ({shown}) at {timestamp}"
+    
+    def _stage(self, file_paths):
+        """Stage paths, recording additions, edits and deletions alike
+
+        Paths that are gone are removed from the index with --ignore-unmatch,
+        so a file that never made it into git cannot fail the whole add.
+        """
+        present = [p for p in file_paths if os.path.lexists(self.repo_path / p)]
+        gone = [p for p in file_paths if p not in present]
+        
+        if present:
+            subprocess.run(
+                ['git', 'add', '-A', '--'] + present,
                 cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                timeout=5
+                check=True,
+                timeout=10,
+                capture_output=True
             )
-            
-            diff_stat = result.stdout.strip()
-            
-            # Simple message based on changes
-            if '+' in diff_stat and '-' in diff_stat:
-                message = f"Modified {file_path}"
-            elif '+' in diff_stat:
-                message = f"Added content to {file_path}"
-            elif '-' in diff_stat:
-                message = f"Removed content from {file_path}"
-            else:
-                message = f"Updated {file_path}"
-            
-            return f"{message} at {timestamp}"
-            
-        except:
-            return f"Updated {file_path} at {timestamp}"
-    
-    def commit_and_push(self, file_path, push=True):
-        """Commit and (optionally) push a file to the GitHub vault"""
-        try:
-            print(f"🪙 Hoarding gems from: {file_path}")
-            
-            # Stage
+        if gone:
             subprocess.run(
-                ['git', 'add', file_path],
+                ['git', 'rm', '-r', '-q', '--cached', '--ignore-unmatch', '--'] + gone,
                 cwd=self.repo_path,
                 check=True,
                 timeout=10,
                 capture_output=True
             )
-            
-            # Generate message
-            commit_message = self.generate_commit_message(file_path)
+    
+    def _has_staged_changes(self):
+        """Check whether the index differs from HEAD"""
+        result = subprocess.run(
+            ['git', 'diff', '--cached', '--quiet'],
+            cwd=self.repo_path,
+            timeout=10
+        )
+        return result.returncode != 0
+    
+    def _record(self, file_paths, make_message):
+        """Stage and commit paths, returning False when there was nothing to commit
+
+        The long-lived git session builds the commit through plumbing pipes
+        when it can represent the paths exactly; otherwise, or if a pipe
+        fails, porcelain git add/commit does the job.
+        """
+        commit_message = None
+        
+        metrics = self.metrics
+        
+        if self.git_session and self.git_session.supports(file_paths):
+            try:
+                with metrics.stage('stage'):
+                    prepared = self.git_session.prepare(file_paths)
+                if prepared is None:
+                    return False
+                with metrics.stage('message'):
+                    commit_message = make_message()
+                print(f"💬 {commit_message}")
+                with metrics.stage('commit'):
+                    self.git_session.commit(prepared, commit_message)
+                metrics.count('commits')
+                return True
+            except GitSessionError as e:
+                print(f"⚠️  The plumbing clogged ({e}), using porcelain git")
+                metrics.count('plumbing_fallbacks')
+        
+        with metrics.stage('stage'):
+            self._stage(file_paths)
+            staged = self._has_staged_changes()
+        if not staged:
+            return False
+        
+        # Generate message (unless the plumbing attempt already did)
+        if commit_message is None:
+            with metrics.stage('message'):
+                commit_message = make_message()
             print(f"💬 {commit_message}")
-            
-            # Commit
+        
+        # Commit
+        with metrics.stage('commit'):
             subprocess.run(
                 ['git', 'commit', '-m', commit_message],
                 cwd=self.repo_path,
@@ -155,17 +657,78 @@ class GoblinWatcher:
                 timeout=10,
                 capture_output=True
             )
+        metrics.count('commits')
+        return True
+    
+    def _push_now(self):
+        """Push inline, for one-shot commands that have no push scheduler"""
+        print(f"🚀 Yeeting the hoard to the GitHub abyss...")
+        with self.metrics.stage('push'):
+            subprocess.run(
+                ['git', 'push'],
+                cwd=self.repo_path,
+                check=True,
+                timeout=self.config.get_push_settings()['timeout'],
+                capture_output=True
+            )
+    
+    def _settle(self, file_paths, committed, push):
+        """Tell the journal these paths no longer need a commit"""
+        if self.journal:
+            self.journal.settled(file_paths, committed, push=push and self.pusher is not None)
+    
+    def commit_batch(self, file_paths, push=True, message=None, ai_future=None):
+        """Stage a batch of files together and commit them as a single commit"""
+        try:
+            print(f"🪙 Hoarding a batch of {len(file_paths)} gems")
+            
+            # Stage and commit the whole batch in one go; nothing to commit
+            # means every change in the batch was reverted
+            committed = self._record(file_paths, lambda: message or self.generate_batch_message(file_paths, ai_future))
+            self._settle(file_paths, committed, push)
+            if not committed:
+                print("👻 The batch vanished before it could be hoarded")
+                print("-" * 60)
+                return True
             
             # Push if not in hoard mode
-            if push:
-                print(f"🚀 Yeeting the hoard to the GitHub abyss...")
-                subprocess.run(
-                    ['git', 'push'],
-                    cwd=self.repo_path,
-                    check=True,
-                    timeout=30,
-                    capture_output=True
-                )
+            if push and self.pusher:
+                self.pusher.request()
+                print(f"✅ Hoarded {len(file_paths)} treasures locally, the cloud will follow")
+            elif push:
+                self._push_now()
+                print(f"✅ Successfully hoarded {len(file_paths)} treasures in the cloud")
+            else:
+                print(f"✅ Successfully hoarded {len(file_paths)} treasures in your local vault")
+            print("-" * 60)
+            return True
+            
+        except subprocess.CalledProcessError as e:
+            print(f"❌ The Ritual failed! The Goblin tripped: {e}")
+            print("-" * 60)
+            return False
+        finally:
+            self.metrics.flush()
+    
+    def commit_and_push(self, file_path, push=True, message=None, ai_future=None):
+        """Commit and (optionally) push a file to the GitHub vault"""
+        try:
+            print(f"🪙 Hoarding gems from: {file_path}")
+            
+            # Stage and commit
+            committed = self._record([file_path], lambda: message or self.generate_commit_message(file_path, ai_future))
+            self._settle([file_path], committed, push)
+            if not committed:
+                print(f"👻 The change vanished before it could be hoarded: {file_path}")
+                print("-" * 60)
+                return True
+            
+            # Push if not in hoard mode
+            if push and self.pusher:
+                self.pusher.request()
+                print(f"✅ Hoarded treasures locally, the cloud will follow: {file_path}")
+            elif push:
+                self._push_now()
                 print(f"✅ Successfully hoarded treasures in the cloud: {file_path}")
             else:
                 print(f"✅ Successfully hoarded treasures in your local vault: {file_path}")
@@ -176,33 +739,62 @@ class GoblinWatcher:
             print(f"❌ The Ritual failed! The Goblin tripped: {e}")
             print("-" * 60)
             return False
+        finally:
+            self.metrics.flush()
+    
+    def has_changes(self, file_paths=None):
+        """Check for uncommitted changes, reading the index in-process when possible"""
+        try:
+            dirty = GitIndex(self.repo_path).is_dirty(file_paths)
+        except GitIndexError:
+            dirty = None
+        if dirty is not None:
+            return dirty
+        
+        result = subprocess.run(
+            ['git', '--no-optional-locks', 'status', '--porcelain'] + (['--'] + list(file_paths) if file_paths else []),
+            cwd=self.repo_path,
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+        return bool(result.stdout.strip())
     
     def sneak_commit(self, custom_message=None, push=True):
         """Perform an immediate commit of all changes"""
+        started = time.monotonic()
+        try:
+            committed = self._sneak(custom_message, push)
+        except BaseException:
+            committed = False
+            raise
+        finally:
+            self.metrics.observe('sneak', time.monotonic() - started)
+            if not committed:
+                self.metrics.error('sneak')
+            self.metrics.flush(force=True)
+        return committed
+    
+    def _sneak(self, custom_message, push):
+        """Stage everything, then commit and push it"""
         try:
             # Check for changes
-            result = subprocess.run(
-                ['git', 'status', '--porcelain'],
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            if not result.stdout.strip():
+            if not self.has_changes():
                 print("👻 Nothing to commit - working tree clean")
                 return True
             
             # Stage all changes
             print("🗡️  Staging all changes...")
-            subprocess.run(
-                ['git', 'add', '-A'],
-                cwd=self.repo_path,
-                check=True,
-                timeout=10
-            )
+            with self.metrics.stage('stage'):
+                subprocess.run(
+                    ['git', 'add', '-A'],
+                    cwd=self.repo_path,
+                    check=True,
+                    timeout=10
+                )
             
             # Generate or use custom message
+            message_started = time.monotonic()
             if custom_message:
                 message = custom_message
             elif self.ai_generator and self.config.is_ai_enabled():
@@ -225,25 +817,29 @@ class GoblinWatcher:
                 timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 message = f"🗡️  Stealth commit at {timestamp}"
             
+            self.metrics.observe('message', time.monotonic() - message_started)
             print(f"💬 {message}")
             
             # Commit
-            subprocess.run(
-                ['git', 'commit', '-m', message],
-                cwd=self.repo_path,
-                check=True,
-                timeout=10
-            )
-            
-            # Push
-            if push:
-                print("🚀 Yeeting the entire hoard to the GitHub abyss...")
+            with self.metrics.stage('commit'):
                 subprocess.run(
-                    ['git', 'push'],
+                    ['git', 'commit', '-m', message],
                     cwd=self.repo_path,
                     check=True,
-                    timeout=30
+                    timeout=10
                 )
+            self.metrics.count('commits')
+            
+            # Push
+            if push:
+                print("🚀 Yeeting the entire hoard to the GitHub abyss...")
+                with self.metrics.stage('push'):
+                    subprocess.run(
+                        ['git', 'push'],
+                        cwd=self.repo_path,
+                        check=True,
+                        timeout=self.config.get_push_settings()['timeout']
+                    )
             else:
                 print("✅ Treasures secured in the local vault.")
             
@@ -257,15 +853,7 @@ class GoblinWatcher:
         """Stage changes and generate a commit message for the ritual"""
         try:
             # Check for changes
-            result = subprocess.run(
-                ['git', 'status', '--porcelain'],
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            if not result.stdout.strip():
+            if not self.has_changes():
                 print("👻 Nothing to commit - working tree clean")
                 return None
             
@@ -296,10 +884,154 @@ class GoblinWatcher:
             print(f"❌ Ritual preparation failed: {e}")
             return None
     
-    def run(self, ritual_mode=False, hoard_mode=False):
+    def _ritual_confirm(self, message, file_paths):
+        """Ask the master to seal a prophesied commit, bumping the version on approval"""
+        import click
+        print(f"📜 Prophesied Inscription: {message}")
+        
+        if not click.confirm("Do you wish to seal this treasure in the vault?"):
+            print("🌑 The Goblin retreats. The change remains unrecorded.")
+            # Refused changes must not come back from the journal on the next summon
+            self._settle(file_paths, committed=False, push=False)
+            return False
+        
+        # Perform version bump
+        setup_path = self.repo_path / 'setup.py'
+        if setup_path.exists():
+            content = setup_path.read_text(encoding='utf-8')
+            new_content = re.sub(r"version=['\"]([^'\"]+)['\"]", "version='1.1.1'", content)
+            setup_path.write_text(new_content, encoding='utf-8')
+            print("🆙 The version has ascended to 1.1.1")
+        return True
+    
+    def _flush_batch(self, batch, ritual_mode, hoard_mode, ai_future=None):
+        """Commit everything collected in the current batch window"""
+        if ritual_mode:
+            print(f"\n👁️  The Goblin found changes in {len(batch)} file(s): {', '.join(batch)}")
+            message = self.generate_batch_message(batch, ai_future)
+            if self._ritual_confirm(message, batch):
+                self.commit_batch(batch, push=not hoard_mode, message=message)
+            return
+        self.commit_batch(batch, push=not hoard_mode, ai_future=ai_future)
+    
+    def _flush_batches(self, batches, ritual_mode, hoard_mode):
+        """Commit several batches in order, their AI messages generated concurrently"""
+        for batch, ai_future in zip(batches, self._prefetch_messages(batches)):
+            self._flush_batch(batch, ritual_mode, hoard_mode, ai_future)
+    
+    def start_watching(self, observer, hoard_mode=False, ai_executor=None, poll_config=True, push_gate=None,
+                       config_waker=None):
+        """Schedule this repo's watches on an observer and start its helpers
+
+        Sets up the git plumbing session, the AI worker pool (on a shared
+        executor when one is given) and, unless hoarding, the push
+        scheduler. Config file changes are applied as they happen; pass
+        poll_config=False when the caller runs ``apply_config()`` itself (and
+        config_waker, called when a reload is asked for, to hear about it),
+        and a push_gate semaphore to cap pushes along with other git work.
+        Returns the event handler that collects settled files.
+        """
+        event_handler = GoblinFileHandler(self.repo_path, self.debounce_seconds)
+        event_handler.metrics = self.metrics
+        self._handler = event_handler
+        
+        # Answers git's core.fsmonitor hook from the events seen from here on
+        self.fsmonitor = GoblinFsmonitor(observer)
+        event_handler.fsmonitor = self.fsmonitor
+        
+        # Watch only what git would track; ignored trees get no watches at all
+        event_handler.watch_tree = GoblinWatchTree(observer, event_handler, self.repo_path, event_handler.ignore)
+        self.fsmonitor.watch_tree = event_handler.watch_tree
+        directories, watches, seconds = event_handler.watch_tree.start()
+        print(f"👁️  The Goblin's eyes are on {directories} lairs ({watches} watches, {seconds * 1000:.0f} ms)")
+        
+        if self.config.get_config('plumbing_commits'):
+            self.git_session = GitSession(str(self.repo_path))
+        
+        self._ai_executor = ai_executor
+        if self.ai_generator:
+            self.ai_pool = AIMessagePool(self.ai_generator, executor=ai_executor, **self.config.get_ai_pool_settings())
+            if self.config.is_ai_enabled():
+                # Handshake with the AI realm now, off the watch loop
+                self.ai_pool.executor.submit(self.ai_generator.warm)
+        
+        if self.config.get_config('journal'):
+            self.journal = GoblinJournal(
+                self.repo_path, compact_bytes=int(self.config.get_config('journal_compact_bytes'))
+            )
+        
+        # Commits keep landing locally while pushes happen on their own thread
+        if not hoard_mode:
+            self.pusher = GoblinPusher(
+                self.repo_path, metrics=self.metrics, journal=self.journal, gate=push_gate,
+                **self.config.get_push_settings()
+            )
+            self.pusher.start()
+        
+        # Resume whatever a previous goblin (killed, crashed, rebooted) left unfinished
+        if self.journal:
+            pending, unpushed = self.journal.replay()
+            event_handler.journal = self.journal
+            if pending:
+                print(f"📜 The Goblin remembers {len(pending)} unhoarded change(s) from its last life")
+                event_handler.restore(pending)
+            if unpushed and self.pusher:
+                print(f"📜 The Goblin remembers {unpushed} commit(s) the abyss never received")
+                self.pusher.request(unpushed)
+        
+        # enchant changes the config under a running goblin
+        self.config.add_listener(self._config_changed)
+        if poll_config:
+            stop = threading.Event()
+            thread = threading.Thread(target=self._poll_config, args=(stop,), name='goblin-config', daemon=True)
+            thread.start()
+            self._config_poll = stop
+        else:
+            self._config_waker = config_waker
+        
+        return event_handler
+    
+    def stop_watching(self):
+        """Drop this repo's watches and shut its helpers down"""
+        self.config.remove_listener(self._config_changed)
+        self._config_waker = None
+        if self._config_poll is not None:
+            with self._config_cond:
+                self._config_poll.set()
+                self._config_poll = None
+                self._config_cond.notify_all()
+        if self._handler is not None and self._handler.watch_tree is not None:
+            self._handler.watch_tree.close()
+        if self.pusher:
+            self.pusher.stop()
+            self.pusher = None
+        if self.journal:
+            # Unsettled changes stay in the journal for the next summon
+            self.journal.close()
+            self.journal = None
+        if self.git_session:
+            self.git_session.close()
+            self.git_session = None
+        if self.ai_pool:
+            self.ai_pool.shutdown()
+            self.ai_pool = None
+        if self.ai_generator:
+            stats = self.ai_generator.connection_stats()
+            if stats['requests']:
+                print(f"🔌 AI spirits consulted {stats['requests']} time(s) over {stats['connections']} connection(s)")
+            self.ai_generator.close()
+        self.metrics.close()
+        self.fsmonitor = None
+        self._handler = None
+    
+    def run(self, ritual_mode=False, hoard_mode=False, batch_mode=None):
         """Run the watcher in foreground"""
+        if batch_mode is None:
+            batch_mode = self.config.is_batch_enabled()
+        batch_max_files = max(1, self.batch_max_files)
+        batch_max_seconds = self.batch_max_seconds
+        
         if ritual_mode:
-            import click
             print("🕯️  The Ritual of Observation has begun...")
             print("💡 The Goblin will wait for a save, then prophesy a commit.")
             print("💡 You must seal the fate of each hoard with 'y'.")
@@ -310,44 +1042,92 @@ class GoblinWatcher:
             print("🪙  The Goblin is now in Hoard Mode (Local-only).")
             print("💡 Treasures will be kept in the local vault.")
             print("-" * 60)
+        if batch_mode:
+            print(f"📦 Batch Mode: up to {batch_max_files} files or {batch_max_seconds:g}s per commit.")
 
-        event_handler = GoblinFileHandler(self.repo_path, self.debounce_seconds)
-        observer = Observer()
-        observer.schedule(event_handler, str(self.repo_path), recursive=True)
-        observer.start()
+        observer = make_observer()
+        self._stop_requested.clear()
+        event_handler = self.start_watching(observer, hoard_mode)
+        control = GoblinControl(self, hoard_mode, batch_mode, ritual_mode)
+        control.start()
+        try:
+            observer.start()
+        except OSError as e:
+            # e.g. every inotify instance the user may have is taken
+            print(f"💀 The Goblin cannot open its eyes: {e}")
+            self.stop_watching()
+            control.stop()
+            return
+        
+        batch = []
+        batch_started = None
         
         try:
-            while True:
-                time.sleep(1)
-                ready_files = event_handler.get_pending_files()
-                for file_path in ready_files:
-                    if ritual_mode:
-                        import click
-                        print(f"\n👁️  The Goblin found changes in: {file_path}")
-                        message = self.generate_commit_message(file_path)
-                        print(f"📜 Prophesied Inscription: {message}")
+            try:
+                while not self._stop_requested.is_set():
+                    # Sleep until a file settles; an open batch only waits for
+                    # the burst to go quiet or its window to run out
+                    timeout = None
+                    if batch:
+                        window_left = batch_started + batch_max_seconds - time.monotonic()
+                        timeout = max(0, min(BATCH_SETTLE_SECONDS, window_left))
+                    ready_files = event_handler.wait_for_ready(timeout)
+                    
+                    if batch_mode:
+                        # Keep collecting while files keep becoming ready, then
+                        # commit the window once it goes quiet or hits a limit
+                        for file_path in ready_files:
+                            if file_path not in batch:
+                                batch.append(file_path)
+                        if batch and batch_started is None:
+                            batch_started = time.monotonic()
                         
-                        if click.confirm("Do you wish to seal this treasure in the vault?"):
-                            # Perform version bump
-                            setup_path = self.repo_path / 'setup.py'
-                            if setup_path.exists():
-                                content = setup_path.read_text(encoding='utf-8')
-                                new_content = re.sub(r"version=['\"]([^'\"]+)['\"]", "version='1.1.1'", content)
-                                setup_path.write_text(new_content, encoding='utf-8')
-                                print("🆙 The version has ascended to 1.1.1")
+                        if len(batch) >= batch_max_files:
+                            full = len(batch) - len(batch) % batch_max_files
+                            self._flush_batches(
+                                [batch[i:i + batch_max_files] for i in range(0, full, batch_max_files)],
+                                ritual_mode, hoard_mode
+                            )
+                            batch = batch[full:]
+                            batch_started = time.monotonic() if batch else None
+                        
+                        if batch and (not ready_files or time.monotonic() - batch_started >= batch_max_seconds):
+                            self._flush_batch(batch, ritual_mode, hoard_mode)
+                            batch = []
+                            batch_started = None
+                        continue
+                    
+                    # Ask the AI about every ready file at once, commit them in order
+                    ai_futures = self._prefetch_messages([[file_path] for file_path in ready_files])
+                    for file_path, ai_future in zip(ready_files, ai_futures):
+                        if ritual_mode:
+                            print(f"\n👁️  The Goblin found changes in: {file_path}")
+                            message = self.generate_commit_message(file_path, ai_future)
                             
-                            # Now commit and push
-                            self.commit_and_push(file_path, push=not hoard_mode)
+                            if self._ritual_confirm(message, [file_path]):
+                                # Now commit and push
+                                self.commit_and_push(file_path, push=not hoard_mode, message=message)
                         else:
-                            print("🌑 The Goblin retreats. The change remains unrecorded.")
-                    else:
-                        self.commit_and_push(file_path, push=not hoard_mode)
-        except KeyboardInterrupt:
+                            self.commit_and_push(file_path, push=not hoard_mode, ai_future=ai_future)
+            except KeyboardInterrupt:
+                pass
+            if batch and not ritual_mode:
+                self._flush_batch(batch, ritual_mode, hoard_mode)
             observer.stop()
+        finally:
+            self.stop_watching()
+            # The socket goes last, so 'banish' returns once everything is hoarded
+            control.stop()
         
         observer.join()
     
-    def run_daemon(self):
+    def stop(self):
+        """Ask a running watch loop (possibly on another thread) to finish"""
+        self._stop_requested.set()
+        if self._handler is not None:
+            self._handler.wake()
+    
+    def run_daemon(self, batch_mode=None):
         """Run as background daemon"""
         import daemon
         import daemon.pidfile
@@ -359,25 +1139,8 @@ class GoblinWatcher:
             pidfile=pid_context,
             working_directory=str(self.repo_path)
         ):
-            self.run()
+            self.run(batch_mode=batch_mode)
     
     def stop_daemon(self):
         """Stop the background daemon"""
-        if not self.pid_file.exists():
-            return False
-        
-        try:
-            with open(self.pid_file, 'r') as f:
-                pid = int(f.read().strip())
-            
-            os.kill(pid, signal.SIGTERM)
-            time.sleep(1)
-            
-            if self.pid_file.exists():
-                self.pid_file.unlink()
-            
-            return True
-        except (ProcessLookupError, FileNotFoundError):
-            if self.pid_file.exists():
-                self.pid_file.unlink()
-            return False
+        return stop_pid_file(self.pid_file)
@@ -0,0 +1,200 @@
+"""
+GitGoblin Diff Budget - Picks the most telling hunks of a diff for the AI prompt
+"""
+
+import fnmatch
+import re
+
+
+# Files whose diffs say nothing a commit message needs
+LOCKFILES = {
+    'package-lock.json', 'npm-shrinkwrap.json', 'yarn.lock', 'pnpm-lock.yaml',
+    'poetry.lock', 'Pipfile.lock', 'pdm.lock', 'uv.lock', 'Cargo.lock',
+    'Gemfile.lock', 'composer.lock', 'go.sum', 'mix.lock', 'pubspec.lock',
+    'packages.lock.json', 'flake.lock',
+}
+GENERATED_PATTERNS = (
+    '*.min.js', '*.min.css', '*.map', '*_pb2.py', '*_pb2_grpc.py', '*.pb.go',
+    '*.generated.*', '*.g.dart', '*.designer.cs', 'dist/*', 'build/*',
+    '*/dist/*', '*/build/*', '*.pyc',
+)
+
+# Changed lines that usually carry the intent of a change
+_SIGNAL_LINE = re.compile(
+    r'^\s*(?:def|class|async def|function|func|fn|pub fn|public|private|protected|'
+    r'interface|struct|enum|type|const|let|var|import|from|export|module|package|'
+    r'return|raise|throw|#{1,6} )\b'
+)
+
+_DIFF_HEADER = re.compile(r'^diff --git a/(.*?) b/(.*)$')
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)"""
+    return (len(text) + 3) // 4
+
+
+def is_noise_path(path):
+    """Whether a path is a lockfile or generated file"""
+    name = path.rsplit('/', 1)[-1]
+    if name in LOCKFILES:
+        return True
+    return any(fnmatch.fnmatchcase(path, pattern) for pattern in GENERATED_PATTERNS)
+
+
+class Hunk:
+    """One @@ section of a file diff"""
+
+    __slots__ = ('lines', 'added', 'removed', 'score')
+
+    def __init__(self, lines):
+        self.lines = lines
+        added = [line[1:] for line in lines[1:] if line.startswith('+')]
+        removed = [line[1:] for line in lines[1:] if line.startswith('-')]
+        self.added = len(added)
+        self.removed = len(removed)
+
+        if sorted(''.join(l.split()) for l in added) == sorted(''.join(l.split()) for l in removed):
+            # Only indentation, spacing or blank lines moved around
+            self.score = 0
+            return
+        meaningful = sum(1 for l in added + removed if l.strip())
+        signal = sum(1 for l in added + removed if _SIGNAL_LINE.match(l))
+        # Favour dense hunks: lots of real change, little context
+        self.score = (meaningful + 3 * signal) / (1 + len(lines) / 40.0)
+
+    @property
+    def text(self):
+        return '\n'.join(self.lines)
+
+
+class FileDiff:
+    """The diff of one file: its header, hunks and line counts"""
+
+    __slots__ = ('path', 'header', 'hunks', 'binary')
+
+    def __init__(self, path):
+        self.path = path
+        self.header = []
+        self.hunks = []
+        self.binary = False
+
+    @property
+    def added(self):
+        return sum(h.added for h in self.hunks)
+
+    @property
+    def removed(self):
+        return sum(h.removed for h in self.hunks)
+
+    @property
+    def noise(self):
+        return is_noise_path(self.path)
+
+    def numstat(self):
+        """A git diff --numstat line for this file"""
+        if self.binary:
+            line = f"-\t-\t{self.path}"
+        else:
+            line = f"{self.added}\t{self.removed}\t{self.path}"
+        if self.noise:
+            line += "  (lockfile/generated, skipped)"
+        return line
+
+
+def parse_diff(diff):
+    """Split unified diff text into FileDiff objects"""
+    files = []
+    current = None
+    hunk = None
+    for line in diff.splitlines():
+        match = _DIFF_HEADER.match(line)
+        if match:
+            if current and hunk:
+                current.hunks.append(Hunk(hunk))
+            current = FileDiff(match.group(2))
+            files.append(current)
+            hunk = None
+            continue
+        if current is None:
+            continue
+        if line.startswith('@@'):
+            if hunk:
+                current.hunks.append(Hunk(hunk))
+            hunk = [line]
+        elif hunk is not None:
+            hunk.append(line)
+        else:
+            if line.startswith('Binary files') or line == 'GIT binary patch':
+                current.binary = True
+            current.header.append(line)
+    if current and hunk:
+        current.hunks.append(Hunk(hunk))
+    return files
+
+
+def _header_text(file_diff):
+    """The lines that name a file in the preview (renames and modes kept)"""
+    keep = [l for l in file_diff.header if not l.startswith('index ')]
+    return '\n'.join([f"diff --git a/{file_diff.path} b/{file_diff.path}"] + keep)
+
+
+def budget_diff(diff, token_budget=1000):
+    """Summarise a diff into (numstat summary, preview) within a token budget
+
+    Every file gets a numstat line. The budget then goes to hunks, best
+    scoring first, split evenly between files: files that need less than
+    their share hand the rest on to the others, so a noisy first file can
+    no longer crowd the later ones out of the prompt. Lockfiles, generated
+    files and whitespace-only hunks are left out of the preview.
+    """
+    files = parse_diff(diff)
+    if not files:
+        # Not a git diff we understand; keep the old behaviour
+        limit = token_budget * 4
+        return '', diff[:limit]
+
+    summary = '\n'.join(f.numstat() for f in files)
+    remaining = token_budget - estimate_tokens(summary)
+
+    candidates = []
+    for file_diff in files:
+        if file_diff.noise or file_diff.binary:
+            continue
+        hunks = sorted((h for h in file_diff.hunks if h.score > 0), key=lambda h: -h.score)
+        if hunks:
+            header = _header_text(file_diff)
+            need = estimate_tokens(header) + sum(estimate_tokens(h.text) + 1 for h in hunks)
+            candidates.append((need, file_diff, header, hunks))
+
+    # Smallest files first, so their leftover share goes to the larger ones
+    candidates.sort(key=lambda item: item[0])
+    chosen = {}
+    for index, (need, file_diff, header, hunks) in enumerate(candidates):
+        share = remaining // (len(candidates) - index)
+        cost = estimate_tokens(header)
+        if share <= cost:
+            continue
+        picked = []
+        for hunk in hunks:
+            hunk_cost = estimate_tokens(hunk.text) + 1
+            if cost + hunk_cost <= share:
+                picked.append(hunk)
+                cost += hunk_cost
+            elif not picked:
+                # Show the start of the best hunk rather than nothing at all
+                room = (share - cost) * 4
+                head = hunk.text[:room].rsplit('\n', 1)[0]
+                if head.count('\n') >= 1:
+                    picked.append(Hunk(head.split('\n') + ['...']))
+                    cost += estimate_tokens(head) + 1
+                break
+        if picked:
+            # Keep the hunks in file order so the preview reads naturally
+            order = {id(h): i for i, h in enumerate(file_diff.hunks)}
+            picked.sort(key=lambda h: order.get(id(h), len(order)))
+            chosen[file_diff.path] = header + '\n' + '\n'.join(h.text for h in picked)
+            remaining -= cost
+
+    preview = '\n'.join(chosen[f.path] for f in files if f.path in chosen)
+    return summary, preview
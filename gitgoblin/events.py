@@ -0,0 +1,106 @@
+"""
+GitGoblin Event Coalescing - Folds raw filesystem events into net changes
+"""
+
+
+class PendingChange:
+    """Net change of one path since the goblin first noticed it
+
+    ``existed`` is whether the path existed before its first event (None when
+    that cannot be known, e.g. the target of a move), ``exists`` is whether it
+    exists after the latest one. Directory records stand in for their whole
+    subtree, which git expands when the record is staged.
+    """
+
+    __slots__ = ('existed', 'exists', 'is_dir', 'changed_at')
+
+    def __init__(self, existed, exists, is_dir=False, changed_at=0.0):
+        self.existed = existed
+        self.exists = exists
+        self.is_dir = is_dir
+        self.changed_at = changed_at
+
+    @property
+    def kind(self):
+        """'added', 'modified' or 'deleted', or None when the change cancelled out"""
+        if self.exists:
+            return 'added' if self.existed is False else 'modified'
+        if self.existed is False:
+            return None
+        return 'deleted'
+
+    def __repr__(self):
+        return f"PendingChange({self.kind}, is_dir={self.is_dir})"
+
+
+class ChangeCoalescer:
+    """Per-path state machine for create/modify/delete/move sequences
+
+    Each method folds one event into ``changes`` and returns the paths whose
+    record is still live (and so needs its debounce re-armed). A path that is
+    created and removed again before it settles is dropped entirely, which
+    also collapses the temp-file-then-rename dance many editors use to save.
+    """
+
+    def __init__(self):
+        self.changes = {}
+
+    def _record(self, path, existed, is_dir):
+        """Get the record for path, creating it with the given prior state"""
+        record = self.changes.get(path)
+        if record is None:
+            record = self.changes[path] = PendingChange(existed, True, is_dir)
+        return record
+
+    def created(self, path, is_dir=False, now=0.0):
+        """A file or directory appeared"""
+        record = self._record(path, False, is_dir)
+        record.exists = True
+        record.is_dir = is_dir
+        record.changed_at = now
+        return [path]
+
+    def modified(self, path, now=0.0):
+        """A file's content changed"""
+        record = self._record(path, True, False)
+        record.exists = True
+        record.changed_at = now
+        return [path]
+
+    def deleted(self, path, is_dir=False, now=0.0):
+        """A file or directory disappeared"""
+        record = self._record(path, True, is_dir)
+        record.exists = False
+        record.is_dir = record.is_dir or is_dir
+        record.changed_at = now
+        if is_dir:
+            self._drop_subtree(path)
+        if record.kind is None:
+            del self.changes[path]
+            return []
+        return [path]
+
+    def moved(self, src_path, dest_path, is_dir=False, now=0.0):
+        """A file or directory was renamed; either side may be None if ignored"""
+        live = []
+        if src_path is not None:
+            live += self.deleted(src_path, is_dir, now)
+        if dest_path is not None:
+            record = self._record(dest_path, None, is_dir)
+            record.exists = True
+            record.is_dir = is_dir
+            record.changed_at = now
+            if is_dir:
+                self._drop_subtree(dest_path)
+            live.append(dest_path)
+        return live
+
+    def _drop_subtree(self, dir_path):
+        """Forget records below a directory record that now covers them"""
+        prefix = dir_path.rstrip('/') + '/'
+        for path in [p for p in self.changes if p.startswith(prefix)]:
+            del self.changes[path]
+
+    def pop(self, path):
+        """Remove and return the record for a settled path"""
+        return self.changes.pop(path, None)
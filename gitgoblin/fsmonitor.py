@@ -0,0 +1,236 @@
+"""
+GitGoblin Fsmonitor - Lets git ask the goblin what changed instead of lstat()ing everything
+
+Git supports a ``core.fsmonitor`` hook (protocol version 2): it runs the
+hook with the token it got last time, and the hook prints a new token, a
+NUL, then every path changed since the old token. Paths it does not
+list are trusted to be unchanged, so ``git status`` only looks at what
+the goblin saw move.
+
+The running goblin answers these queries from its event stream over its
+control socket; ``fsmonitor-gitgoblin`` in ``.git/hooks`` is the tiny
+client git runs.
+"""
+
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from .control import SOCKET_NAME
+
+
+HOOK_NAME = 'fsmonitor-gitgoblin'
+
+# Answered by the hook when no goblin is listening; it never matches a
+# live session, so git keeps scanning until one is
+ASLEEP_TOKEN = 'gitgoblin:asleep:0'
+
+# The client git runs. Standard library only and started with -S, so it
+# costs a few milliseconds on every git status.
+HOOK_SCRIPT = '''#!{python} -S
+"""GitGoblin fsmonitor hook (core.fsmonitor, protocol version 2)"""
+
+import json
+import os
+import socket
+import sys
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] != '2':
+        # Only version 2 is spoken; git falls back to scanning
+        return 1
+    git_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    response = None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout({timeout})
+            sock.connect(os.path.join(git_dir, '{socket_name}'))
+            sock.sendall(json.dumps({{'command': 'fsmonitor', 'token': sys.argv[2]}}).encode() + b'\\n')
+            chunks = []
+            while True:
+                chunk = sock.recv(1 << 16)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                if chunk.endswith(b'\\n'):
+                    break
+        response = json.loads(b''.join(chunks))
+    except (OSError, ValueError):
+        pass
+
+    out = sys.stdout.buffer
+    if not response or not response.get('ok'):
+        # No goblin is watching: git has to look at everything itself
+        out.write(b'{asleep}\\0/\\0')
+        return 0
+    out.write(response['token'].encode() + b'\\0')
+    if response['paths'] is None:
+        out.write(b'/\\0')
+    else:
+        for path in response['paths']:
+            out.write(os.fsencode(path) + b'\\0')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+'''
+
+
+class GoblinFsmonitor:
+    """Remember which paths changed, in order, and answer "since token" queries
+
+    Tokens look like ``gitgoblin:<session>:<sequence>``. Every event bumps
+    the sequence and moves its path to the end of an ordered map, so a
+    query walks back only over paths that changed since its token. A token
+    from another session (an older goblin, or none at all), or one older
+    than paths already dropped to stay under ``max_paths``, gets the
+    trivial answer and git scans everything once.
+
+    Directories the watch tree leaves unwatched (ignored ones, which may
+    still hold force-added files) are reported with every answer so git
+    checks them itself.
+    """
+
+    def __init__(self, observer=None, max_paths=100000, sync_seconds=0.05):
+        self.observer = observer
+        self.max_paths = max_paths
+        self.sync_seconds = sync_seconds
+        self.watch_tree = None
+
+        self._lock = threading.Lock()
+        self._changed = OrderedDict()
+        self.queries = 0
+        self.full_scans = 0
+        self.forget()
+
+    def forget(self):
+        """Start a new session; every older token asks git for a full scan"""
+        with self._lock:
+            self._session = f"{os.getpid()}-{os.urandom(4).hex()}"
+            self._sequence = 0
+            self._floor = 0
+            self._changed.clear()
+
+    def token(self):
+        """The token for everything seen so far"""
+        with self._lock:
+            return self._token()
+
+    def _token(self):
+        return f"gitgoblin:{self._session}:{self._sequence}"
+
+    def touched(self, relative_path, is_dir=False):
+        """Record that a repo-relative '/'-separated path changed"""
+        if not relative_path or relative_path == '.':
+            return
+        if relative_path == '.git' or relative_path.startswith('.git/'):
+            return
+        if is_dir:
+            relative_path += '/'
+        with self._lock:
+            self._sequence += 1
+            self._changed[relative_path] = self._sequence
+            self._changed.move_to_end(relative_path)
+            while len(self._changed) > self.max_paths:
+                _, dropped = self._changed.popitem(last=False)
+                self._floor = dropped
+
+    def _sync(self):
+        """Give events already queued in the observer a moment to be recorded"""
+        queue = getattr(self.observer, 'event_queue', None)
+        if queue is None:
+            return
+        deadline = time.monotonic() + self.sync_seconds
+        while queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.002)
+
+    def changed_since(self, token):
+        """(new token, changed paths) since a token; paths is None when git must scan everything"""
+        self._sync()
+        unwatched = []
+        if self.watch_tree:
+            unwatched = [path + '/' for path in self.watch_tree.unwatched() if path != '.git']
+        with self._lock:
+            self.queries += 1
+            new_token = self._token()
+            prefix = f"gitgoblin:{self._session}:"
+            since = None
+            if token.startswith(prefix):
+                try:
+                    since = int(token[len(prefix):])
+                except ValueError:
+                    pass
+            if since is None or since < self._floor or since > self._sequence:
+                self.full_scans += 1
+                return new_token, None
+
+            paths = []
+            for path in reversed(self._changed):
+                if self._changed[path] <= since:
+                    break
+                paths.append(path)
+        return new_token, paths + unwatched
+
+
+def hook_path(repo_path='.'):
+    """Where the hook client is installed"""
+    return Path(repo_path).resolve() / '.git' / 'hooks' / HOOK_NAME
+
+
+def hook_command(repo_path='.'):
+    """The core.fsmonitor value that runs the hook client"""
+    return f"{shlex.quote(sys.executable)} -S {shlex.quote(str(hook_path(repo_path)))}"
+
+
+def _git_config(repo_path, *args):
+    """Run git config; stdout on success, None otherwise"""
+    try:
+        result = subprocess.run(
+            ['git', 'config'] + list(args),
+            cwd=repo_path,
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def is_installed(repo_path='.'):
+    """Whether git asks this repository's goblin through the hook"""
+    return _git_config(repo_path, '--get', 'core.fsmonitor') == hook_command(repo_path)
+
+
+def install(repo_path='.', timeout=2.0):
+    """Write the hook client and point core.fsmonitor at it"""
+    path = hook_path(repo_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(HOOK_SCRIPT.format(
+        python=sys.executable, timeout=timeout, socket_name=SOCKET_NAME, asleep=ASLEEP_TOKEN
+    ))
+    path.chmod(0o755)
+    return (
+        _git_config(repo_path, 'core.fsmonitor', hook_command(repo_path)) is not None
+        and _git_config(repo_path, 'core.fsmonitorHookVersion', '2') is not None
+    )
+
+
+def uninstall(repo_path='.'):
+    """Stop git from asking the goblin; a core.fsmonitor set by someone else is left alone"""
+    if not is_installed(repo_path):
+        return False
+    _git_config(repo_path, '--unset', 'core.fsmonitor')
+    _git_config(repo_path, '--unset', 'core.fsmonitorHookVersion')
+    try:
+        hook_path(repo_path).unlink()
+    except OSError:
+        pass
+    return True
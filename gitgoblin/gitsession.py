@@ -0,0 +1,352 @@
+"""
+GitGoblin Git Session - Long-lived plumbing pipes for the commit loop
+"""
+
+import os
+import stat
+import subprocess
+import threading
+
+
+class GitSessionError(Exception):
+    """A plumbing pipe failed; the caller should fall back to porcelain git"""
+
+
+class PreparedCommit:
+    """A tree built for a set of paths, ready to be turned into a commit"""
+
+    __slots__ = ('parent', 'tree', 'entries')
+
+    def __init__(self, parent, tree, entries):
+        self.parent = parent
+        self.tree = tree
+        # path -> (mode, sha), or None for a removal
+        self.entries = entries
+
+
+class _Pipe:
+    """A git process kept alive for line-oriented request/response traffic"""
+
+    def __init__(self, args, cwd):
+        self.args = args
+        self.cwd = cwd
+        self.proc = None
+
+    def ensure(self):
+        """Spawn the process if it is not running"""
+        if self.proc is None or self.proc.poll() is not None:
+            try:
+                self.proc = subprocess.Popen(
+                    self.args,
+                    cwd=self.cwd,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL
+                )
+            except OSError as e:
+                raise GitSessionError(f"could not start {' '.join(self.args[:2])}: {e}")
+        return self.proc
+
+    def send(self, data):
+        """Write a request and flush it"""
+        proc = self.ensure()
+        try:
+            proc.stdin.write(data)
+            proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self.close()
+            raise GitSessionError(f"{' '.join(self.args[:2])} pipe broke: {e}")
+
+    def readline(self):
+        """Read one response line"""
+        line = self.proc.stdout.readline()
+        if not line:
+            self.close()
+            raise GitSessionError(f"{' '.join(self.args[:2])} exited unexpectedly")
+        return line.rstrip(b'\n')
+
+    def read(self, size):
+        """Read exactly size bytes"""
+        data = self.proc.stdout.read(size)
+        if len(data) != size:
+            self.close()
+            raise GitSessionError(f"{' '.join(self.args[:2])} returned a short read")
+        return data
+
+    def close(self):
+        """Close stdin and reap the process"""
+        proc, self.proc = self.proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+
+
+class GitSession:
+    """Build commits through persistent plumbing pipes instead of porcelain
+
+    ``cat-file --batch`` reads HEAD and its trees, ``hash-object --stdin-paths``
+    writes blobs, ``mktree --batch`` writes the trees along the changed paths
+    and ``update-ref --stdin`` moves HEAD inside a transaction. Only
+    ``commit-tree`` and the final index sync still fork, so a commit costs a
+    few pipe writes plus two short processes instead of a full porcelain
+    add/diff/commit round. Anything the session cannot represent exactly
+    (directories, deleted or not, symlinks, submodules, repos with commit
+    hooks) is reported by ``supports`` so the caller can use porcelain git
+    instead.
+    """
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self._lock = threading.Lock()
+        self._cat_file = _Pipe(['git', 'cat-file', '--batch'], repo_path)
+        self._hash_object = _Pipe(['git', 'hash-object', '-w', '--stdin-paths'], repo_path)
+        self._mktree = _Pipe(['git', 'mktree', '--batch', '-z'], repo_path)
+        self._update_ref = _Pipe(['git', 'update-ref', '-m', 'gitgoblin: commit', '--stdin'], repo_path)
+        self._file_mode = None
+        self._has_hooks = None
+
+        # Counters for the curious
+        self.commits = 0
+        self.forks = 0
+
+    def close(self):
+        """Shut every pipe down"""
+        with self._lock:
+            for pipe in (self._cat_file, self._hash_object, self._mktree, self._update_ref):
+                pipe.close()
+
+    def _git(self, args, data=None):
+        """Run a one-off git command (the fork this session tries to avoid)"""
+        self.forks += 1
+        result = subprocess.run(
+            ['git'] + args,
+            cwd=self.repo_path,
+            input=data,
+            capture_output=True,
+            timeout=10
+        )
+        if result.returncode != 0:
+            raise GitSessionError(result.stderr.decode('utf-8', 'replace').strip() or f"git {args[0]} failed")
+        return result.stdout
+
+    def _hooks_present(self):
+        """Whether commit hooks exist that porcelain git would run"""
+        if self._has_hooks is None:
+            hooks_dir = self._git(['rev-parse', '--git-path', 'hooks']).decode().strip()
+            hooks_dir = os.path.join(self.repo_path, hooks_dir)
+            self._has_hooks = any(
+                os.access(os.path.join(hooks_dir, name), os.X_OK)
+                for name in ('pre-commit', 'prepare-commit-msg', 'commit-msg', 'post-commit')
+            )
+        return self._has_hooks
+
+    def supports(self, file_paths):
+        """Whether every path is a plain file (or a gone one) and no hooks need running"""
+        # hash-object --stdin-paths reads one path per line and unquotes C-style quoting
+        if any('\n' in file_path or file_path.startswith('"') for file_path in file_paths):
+            return False
+        try:
+            if self._hooks_present():
+                return False
+        except (GitSessionError, OSError, subprocess.SubprocessError):
+            return False
+        missing = []
+        for file_path in file_paths:
+            try:
+                st = os.lstat(os.path.join(self.repo_path, file_path))
+            except FileNotFoundError:
+                missing.append(file_path.replace(os.sep, '/'))
+                continue
+            except OSError:
+                return False
+            if not stat.S_ISREG(st.st_mode):
+                return False
+        return not missing or not self._tracked_directories(missing)
+
+    def _tracked_directories(self, paths):
+        """Whether any of the paths is a directory with tracked files below it
+
+        A removed directory needs every index entry under it dropped, which
+        porcelain ``git rm -r --cached`` does and the session does not.
+        """
+        try:
+            listed = self._git(['--literal-pathspecs', 'ls-files', '-z', '--cached', '--'] + paths)
+        except (GitSessionError, OSError, subprocess.SubprocessError):
+            return True
+        exact = {os.fsencode(path) for path in paths}
+        return any(entry and entry not in exact for entry in listed.split(b'\0'))
+
+    def _object(self, name):
+        """Read (sha, type, content) of an object, or (None, None, None) if missing"""
+        self._cat_file.send(name.encode() + b'\n')
+        header = self._cat_file.readline().split()
+        if len(header) < 3:
+            return None, None, None
+        content = self._cat_file.read(int(header[2]))
+        self._cat_file.read(1)
+        return header[0].decode(), header[1].decode(), content
+
+    def _read_tree(self, sha):
+        """Parse a tree object into {name: (mode, sha)}"""
+        _, kind, content = self._object(sha)
+        if kind != 'tree':
+            raise GitSessionError(f"{sha} is not a tree")
+        entries = {}
+        hash_len = len(sha) // 2
+        i = 0
+        while i < len(content):
+            space = content.index(b' ', i)
+            nul = content.index(b'\0', space)
+            mode = content[i:space].decode()
+            name = content[space + 1:nul].decode('utf-8', 'surrogateescape')
+            entries[name] = (mode, content[nul + 1:nul + 1 + hash_len].hex())
+            i = nul + 1 + hash_len
+        return entries
+
+    def _head(self):
+        """Return (commit sha, tree sha) of HEAD, or (None, None) on an unborn branch"""
+        commit_sha, kind, content = self._object('HEAD')
+        if kind is None:
+            return None, None
+        if kind != 'commit':
+            raise GitSessionError("HEAD is not a commit")
+        return commit_sha, content.split(b'\n', 1)[0].split()[1].decode()
+
+    def _mode_for(self, st, old_mode):
+        """Git file mode for a regular file, honouring core.fileMode"""
+        if self._file_mode is None:
+            try:
+                value = self._git(['config', '--bool', 'core.fileMode']).decode().strip()
+            except GitSessionError:
+                value = 'true'
+            self._file_mode = value != 'false'
+        if not self._file_mode and old_mode in ('100644', '100755'):
+            return old_mode
+        return '100755' if st.st_mode & stat.S_IXUSR else '100644'
+
+    def _write_tree(self, entries):
+        """Write a tree from {name: (mode, sha)} through mktree"""
+        body = b''
+        for name, (mode, sha) in entries.items():
+            kind = 'tree' if mode in ('40000', '040000') else 'commit' if mode == '160000' else 'blob'
+            body += f"{mode.zfill(6)} {kind} {sha}\t".encode() + name.encode('utf-8', 'surrogateescape') + b'\0'
+        self._mktree.send(body + b'\0')
+        return self._mktree.readline().decode()
+
+    def _build(self, tree_sha, changes):
+        """Apply {relative path: (mode, sha) or None} below a tree, returning the new tree sha"""
+        entries = self._read_tree(tree_sha) if tree_sha else {}
+        original = dict(entries)
+
+        nested = {}
+        for path, value in changes.items():
+            head, _, rest = path.partition('/')
+            if rest:
+                nested.setdefault(head, {})[rest] = value
+            elif value is None:
+                entries.pop(head, None)
+            else:
+                entries[head] = value
+
+        for name, sub_changes in nested.items():
+            current = entries.get(name)
+            sub_sha = current[1] if current and current[0] in ('40000', '040000') else None
+            new_sha = self._build(sub_sha, sub_changes)
+            if new_sha is None:
+                entries.pop(name, None)
+            else:
+                entries[name] = ('40000', new_sha)
+
+        if not entries:
+            return None
+        if entries == original:
+            return tree_sha
+        return self._write_tree(entries)
+
+    def _lookup(self, tree_sha, path):
+        """(mode, sha) of a path inside a tree, or None"""
+        parts = path.split('/')
+        for depth, name in enumerate(parts):
+            if not tree_sha:
+                return None
+            entry = self._read_tree(tree_sha).get(name)
+            if entry is None or depth == len(parts) - 1:
+                return entry
+            tree_sha = entry[1] if entry[0] in ('40000', '040000') else None
+        return None
+
+    def prepare(self, file_paths):
+        """Hash the given paths and build HEAD's tree with them applied
+
+        Returns a PreparedCommit, or None when the result equals HEAD.
+        """
+        with self._lock:
+            parent, base_tree = self._head()
+            changes = {}
+            for file_path in file_paths:
+                path = file_path.replace(os.sep, '/')
+                full = os.path.join(self.repo_path, file_path)
+                try:
+                    st = os.lstat(full)
+                except FileNotFoundError:
+                    changes[path] = None
+                    continue
+                self._hash_object.send(os.fsencode(file_path) + b'\n')
+                sha = self._hash_object.readline().decode()
+                old = self._lookup(base_tree, path) if base_tree else None
+                changes[path] = (self._mode_for(st, old[0] if old else None), sha)
+
+            tree = self._build(base_tree, changes)
+            if tree is None:
+                self._mktree.send(b'\0')
+                tree = self._mktree.readline().decode()
+            if tree == base_tree:
+                return None
+            return PreparedCommit(parent, tree, changes)
+
+    def commit(self, prepared, message):
+        """Create the commit, move HEAD and sync the index; returns the commit sha"""
+        with self._lock:
+            args = ['commit-tree', prepared.tree, '-F', '-']
+            if prepared.parent:
+                args += ['-p', prepared.parent]
+            sha = self._git(args, message.encode('utf-8')).decode().strip()
+
+            old = prepared.parent or '0' * len(sha)
+            self._update_ref.send(b'start\n')
+            self._update_ref.readline()
+            self._update_ref.send(f"update HEAD {sha} {old}\ncommit\n".encode())
+            if self._update_ref.readline() != b'commit: ok':
+                raise GitSessionError("update-ref refused to move HEAD")
+
+            # HEAD has moved, so from here on the commit stands: failing now
+            # would send the caller to porcelain, which finds nothing to commit
+            self._sync_index(prepared, sha)
+            self.commits += 1
+            return sha
+
+    def _sync_index(self, prepared, sha):
+        """Point the index at the committed blobs so git status agrees
+
+        Falls back to resetting the paths, then the whole index, to HEAD;
+        if even that fails the index is left for git to notice as changes.
+        """
+        lines = b''
+        for path, value in prepared.entries.items():
+            mode, blob = value if value else ('0', '0' * len(sha))
+            lines += f"{mode} {blob}\t".encode() + os.fsencode(path) + b'\0'
+        for args, data in (
+            (['update-index', '-z', '--index-info'], lines),
+            (['reset', '-q', sha, '--'] + list(prepared.entries), None),
+            (['read-tree', sha], None),
+        ):
+            try:
+                self._git(args, data)
+                return True
+            except (GitSessionError, OSError, subprocess.SubprocessError):
+                continue
+        return False
@@ -0,0 +1,208 @@
+"""
+GitGoblin Heuristics - Guesses conventional commit messages without any network
+"""
+
+import os
+import re
+import subprocess
+from pathlib import PurePosixPath
+
+from .diffbudget import LOCKFILES, is_noise_path, parse_diff
+
+
+DOC_EXTENSIONS = {'.md', '.rst', '.txt', '.adoc', '.org'}
+DOC_NAMES = {'readme', 'changelog', 'changes', 'history', 'license', 'copying', 'authors', 'contributing', 'notice'}
+CHORE_NAMES = {
+    'setup.py', 'setup.cfg', 'pyproject.toml', 'manifest.in', 'tox.ini', 'noxfile.py',
+    'requirements.txt', 'makefile', 'dockerfile', 'docker-compose.yml', 'docker-compose.yaml',
+    'package.json', 'tsconfig.json', 'cargo.toml', 'go.mod', 'gemfile', '.gitignore',
+    '.gitattributes', '.editorconfig', '.dockerignore', '.pre-commit-config.yaml',
+} | {name.lower() for name in LOCKFILES}
+CHORE_DIRS = {'.github', '.gitlab', '.circleci', '.vscode', '.idea', 'ci', 'scripts'}
+TEST_DIRS = {'test', 'tests', 'spec', 'specs', '__tests__', 'testing'}
+# Directory names that say nothing as a scope
+GENERIC_DIRS = {'src', 'lib', 'app', 'source', 'pkg', 'internal'}
+
+_TEST_FILE = re.compile(r'(^test_.*|.*_test\.\w+|.*\.(test|spec)\.\w+|conftest\.py)$')
+
+
+class FileChange:
+    """What happened to one path: kind is 'A', 'M', 'D' or 'R'"""
+
+    __slots__ = ('path', 'kind', 'added', 'removed', 'whitespace_only')
+
+    def __init__(self, path, kind='M', added=0, removed=0, whitespace_only=False):
+        self.path = path.replace(os.sep, '/')
+        self.kind = kind
+        self.added = added
+        self.removed = removed
+        self.whitespace_only = whitespace_only
+
+
+class Guess:
+    """A conventional commit message and how sure the goblin is about it"""
+
+    __slots__ = ('type', 'scope', 'description', 'confidence')
+
+    def __init__(self, type, scope, description, confidence):
+        self.type = type
+        self.scope = scope
+        self.description = description
+        self.confidence = confidence
+
+    @property
+    def message(self):
+        scope = f"({self.scope})" if self.scope else ''
+        return f"{self.type}{scope}: {self.description}"
+
+
+def category(path):
+    """Coarse category of a path: 'docs', 'test', 'chore' or 'code'"""
+    parts = PurePosixPath(path.lower()).parts
+    name = parts[-1] if parts else ''
+    stem, ext = os.path.splitext(name)
+    if name in CHORE_NAMES or is_noise_path(path) or any(p in CHORE_DIRS for p in parts[:-1]):
+        return 'chore'
+    if name.startswith('requirements') and ext == '.txt':
+        return 'chore'
+    if ext in ('.yml', '.yaml', '.toml', '.ini', '.cfg', '.lock') and len(parts) == 1:
+        return 'chore'
+    if ext in DOC_EXTENSIONS or stem in DOC_NAMES or 'docs' in parts[:-1]:
+        return 'docs'
+    if _TEST_FILE.match(name) or any(p in TEST_DIRS for p in parts[:-1]):
+        return 'test'
+    return 'code'
+
+
+def scope_for(paths, name_files=True):
+    """The directory all paths share, skipping names that carry no meaning"""
+    dirs = [PurePosixPath(p).parts[:-1] for p in paths]
+    common = []
+    for level in zip(*dirs):
+        if len(set(level)) != 1:
+            break
+        common.append(level[0])
+    for name in reversed(common):
+        if name not in GENERIC_DIRS and name not in TEST_DIRS and not name.startswith('.'):
+            return name
+    if name_files and len(paths) == 1 and not common:
+        # A file at the top of the repo scopes itself
+        stem = os.path.splitext(PurePosixPath(paths[0]).name)[0]
+        return stem.lower() if stem and not stem.startswith('.') else None
+    return None
+
+
+def _subject(changes):
+    """What to name in the description: one file, or a count"""
+    names = [PurePosixPath(c.path).name for c in changes]
+    if len(names) == 1:
+        return names[0]
+    if len(names) == 2:
+        return f"{names[0]} and {names[1]}"
+    return f"{names[0]} and {len(names) - 1} more files"
+
+
+def classify(changes):
+    """Guess a conventional commit for a list of FileChange, or None"""
+    if not changes:
+        return None
+
+    categories = [category(c.path) for c in changes]
+    kinds = {c.kind for c in changes}
+    verb = {'A': 'add', 'D': 'remove', 'R': 'rename'}.get(kinds.pop(), 'update') if len(kinds) == 1 else 'update'
+    subject = _subject(changes)
+    paths = [c.path for c in changes]
+
+    dominant = max(set(categories), key=categories.count)
+    share = categories.count(dominant) / len(categories)
+
+    if all(c.whitespace_only for c in changes):
+        return Guess('style', scope_for(paths), f"tidy formatting in {subject}", 0.9)
+
+    if dominant in ('docs', 'test', 'chore'):
+        scope = None if dominant == 'docs' else scope_for(paths, name_files=False)
+        if dominant == 'test' and scope in TEST_DIRS:
+            scope = None
+        return Guess(dominant, scope, f"{verb} {subject}", round(0.95 * share, 2))
+
+    scope = scope_for(paths)
+    added = sum(c.added for c in changes)
+    removed = sum(c.removed for c in changes)
+    if verb == 'add':
+        # A new source file could be a feature, a fix or a refactor's new
+        # home, so leave the wording to the AI; less still when the diff
+        # never showed its content
+        seen = 0.6 if added else 0.4
+        return Guess('feat', scope, f"add {subject}", round(seen * share, 2))
+    if verb == 'remove':
+        return Guess('refactor', scope, f"remove {subject}", round(0.8 * share, 2))
+    if verb == 'rename':
+        return Guess('refactor', scope, f"rename {subject}", round(0.85 * share, 2))
+
+    # Edits to code: the diff shape hints at intent, but not reliably
+    if removed and added and max(added, removed) <= 5:
+        return Guess('fix', scope, f"adjust {subject}", round(0.45 * share, 2))
+    if removed and 0.7 <= added / removed <= 1.4:
+        return Guess('refactor', scope, f"rework {subject}", round(0.45 * share, 2))
+    if added > removed * 3:
+        return Guess('feat', scope, f"extend {subject}", round(0.5 * share, 2))
+    return Guess('refactor', scope, f"update {subject}", round(0.35 * share, 2))
+
+
+def changes_from_diff(diff, paths=None):
+    """FileChange objects for a unified diff (plus paths the diff leaves out)"""
+    changes = []
+    for file_diff in parse_diff(diff):
+        header = '\n'.join(file_diff.header)
+        if 'new file mode' in header or '--- /dev/null' in header:
+            kind = 'A'
+        elif 'deleted file mode' in header or '+++ /dev/null' in header:
+            kind = 'D'
+        elif 'rename from' in header:
+            kind = 'R'
+        else:
+            kind = 'M'
+        changes.append(FileChange(
+            file_diff.path, kind, file_diff.added, file_diff.removed,
+            bool(file_diff.hunks) and all(h.score == 0 for h in file_diff.hunks)
+        ))
+    seen = {c.path for c in changes}
+    for path in paths or []:
+        # Untracked files do not show up in git diff HEAD
+        if path.replace(os.sep, '/') not in seen:
+            changes.append(FileChange(path, 'A'))
+    return changes
+
+
+def collect_changes(repo_path, paths):
+    """FileChange objects for paths from one git diff --numstat --summary"""
+    result = subprocess.run(
+        ['git', 'diff', '--numstat', '--summary', 'HEAD', '--'] + list(paths),
+        cwd=repo_path,
+        capture_output=True,
+        text=True,
+        errors='replace',
+        timeout=5
+    )
+    changes = {}
+    kinds = {}
+    for line in result.stdout.splitlines():
+        fields = line.split('\t')
+        if len(fields) == 3:
+            added, removed, path = fields
+            changes[path] = FileChange(
+                path, 'M',
+                int(added) if added.isdigit() else 0,
+                int(removed) if removed.isdigit() else 0
+            )
+        elif line.startswith((' create mode', ' delete mode')):
+            kinds[line.split(None, 3)[3]] = 'A' if line.startswith(' create') else 'D'
+    for path, kind in kinds.items():
+        if path in changes:
+            changes[path].kind = kind
+    for path in paths:
+        path = path.replace(os.sep, '/')
+        if path not in changes:
+            exists = os.path.lexists(os.path.join(repo_path, path))
+            changes[path] = FileChange(path, 'A' if exists else 'D')
+    return list(changes.values())
@@ -0,0 +1,374 @@
+"""
+GitGoblin Hive - One daemon haunting many dungeons
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from .control import GoblinControl, stop_pid_file
+
+
+# Settings of the hive itself, next to the repo list in hive.json
+HIVE_DEFAULTS = {
+    'git_workers': 4,
+    'ai_workers': 4,
+    'debounce': 2.0,
+}
+
+# How often the registry file is checked for added or removed repos
+REGISTRY_POLL_SECONDS = 1.0
+
+
+def hive_home():
+    """Directory holding the hive registry and pid file (GITGOBLIN_HOME overrides it)"""
+    return Path(os.environ.get('GITGOBLIN_HOME') or Path.home() / '.gitgoblin')
+
+
+class HiveRegistry:
+    """The repositories the hive watches, kept in ``~/.gitgoblin/hive.json``"""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else hive_home() / 'hive.json'
+
+    def load(self):
+        """The registry contents, with defaults filled in"""
+        data = dict(HIVE_DEFAULTS, repos=[])
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not read the hive registry: {e}")
+        return data
+
+    def stamp(self):
+        """Changes whenever the registry file is rewritten"""
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size, st.st_ino
+        except OSError:
+            return None
+
+    def repos(self):
+        """Registered repository paths"""
+        return list(self.load()['repos'])
+
+    def _save(self, data):
+        """Write the registry atomically so a running hive never reads half of it"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.path.parent), prefix='.hive.')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def add(self, repo_path):
+        """Register a repository; False if it was already there"""
+        repo_path = Path(repo_path).resolve()
+        if not (repo_path / '.git').exists():
+            raise ValueError(f"Not a git repository: {repo_path}")
+        data = self.load()
+        if str(repo_path) in data['repos']:
+            return False
+        data['repos'].append(str(repo_path))
+        self._save(data)
+        return True
+
+    def remove(self, repo_path):
+        """Unregister a repository; False if it was not there"""
+        repo_path = str(Path(repo_path).resolve())
+        data = self.load()
+        if repo_path not in data['repos']:
+            return False
+        data['repos'].remove(repo_path)
+        self._save(data)
+        return True
+
+
+class _HiveRepo:
+    """One repository inside the hive: its watcher and queued work"""
+
+    __slots__ = ('path', 'watcher', 'handler', 'control', 'queue', 'futures', 'busy', 'leaving')
+
+    def __init__(self, path, watcher, handler, control=None):
+        self.path = path
+        self.watcher = watcher
+        self.handler = handler
+        self.control = control
+        self.queue = []
+        self.futures = {}
+        self.busy = False
+        self.leaving = False
+
+
+class GoblinHive:
+    """Watch every registered repository from a single process
+
+    All repositories share one watchdog observer (one inotify instance and
+    one reading thread per repository on Linux), one bounded pool of git
+    workers and one pool of AI workers. Each repo still pushes from its own
+    thread, but commits and pushes share one semaphore of ``git_workers``
+    slots, so no more git processes than that run at once. Settled files are queued per repo;
+    the dispatcher hands out work round-robin, at most one job per repo at a
+    time, so a storm of edits in one repo cannot starve the others. Files
+    that settle while their repo's job runs simply join its next commit.
+    The registry file is re-read while running, so ``gitgoblin hive add``
+    and ``remove`` take effect without a restart. Every repo answers on its
+    own whisper socket, as a lone goblin would; ``banish`` there makes the
+    hive let go of it until the registry changes.
+    """
+
+    def __init__(self, registry=None, hoard_mode=False):
+        self.registry = registry or HiveRegistry()
+        self.hoard_mode = hoard_mode
+        self.pid_file = hive_home() / 'hive.pid'
+        settings = self.registry.load()
+        self.git_workers = max(1, int(settings['git_workers']))
+        self.ai_workers = max(1, int(settings['ai_workers']))
+        self.debounce = float(settings['debounce'])
+
+        self.repos = {}
+        self._rotation = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._in_flight = 0
+        self._banished = set()
+        self._registry_stamp = None
+        self._next_registry_check = 0.0
+        self.observer = None
+        self.git_pool = None
+        self.git_gate = None
+        self.ai_pool = None
+
+    def add_repo(self, repo_path):
+        """Start watching a repository"""
+        from .core import GoblinWatcher
+
+        repo_path = str(Path(repo_path).resolve())
+        if repo_path in self.repos:
+            return
+        try:
+            watcher = GoblinWatcher(repo_path)
+            if 'debounce_seconds' not in watcher.config.get_all_config():
+                # The hive's debounce is only the default for repos without their own
+                watcher.debounce_seconds = self.debounce
+            if watcher.pid_file.exists():
+                print(f"⚠️  {repo_path} also has its own goblin; banish it to avoid double commits")
+            handler = watcher.start_watching(
+                self.observer, self.hoard_mode, ai_executor=self.ai_pool, poll_config=False,
+                push_gate=self.git_gate, config_waker=self._wake.set
+            )
+        except (ValueError, OSError) as e:
+            print(f"⚠️  The hive cannot haunt {repo_path}: {e}")
+            return
+        handler.on_armed = self._wake.set
+
+        # whisper, crystalball and the fsmonitor hook reach the repo here
+        control = GoblinControl(
+            watcher, hoard_mode=self.hoard_mode, batch_mode=watcher.config.is_batch_enabled(),
+            on_shutdown=lambda: self._banish(repo_path)
+        )
+        if not control.start():
+            control = None
+        with self._lock:
+            self.repos[repo_path] = _HiveRepo(repo_path, watcher, handler, control)
+            self._rotation.append(repo_path)
+        print(f"🐝 The hive now haunts {repo_path}")
+
+    def remove_repo(self, repo_path):
+        """Stop watching a repository once its running job (if any) is done"""
+        with self._lock:
+            repo = self.repos.get(repo_path)
+            if repo is None:
+                return
+            repo.leaving = True
+            if repo.busy:
+                return
+            del self.repos[repo_path]
+            self._rotation.remove(repo_path)
+        self._release(repo)
+
+    def _banish(self, repo_path):
+        """Let go of a repository from its own socket; the hive loop does the work"""
+        with self._lock:
+            self._banished.add(repo_path)
+        self._wake.set()
+
+    def _release(self, repo):
+        """Tear a repository's watcher down"""
+        # Whatever settled but was never committed is committed on the way out
+        if repo.queue:
+            files, repo.queue = repo.queue, []
+            try:
+                self._run_job(repo, files)
+            except Exception as e:
+                print(f"❌ The hive tripped in {repo.path}: {e}")
+        repo.watcher.stop_watching()
+        # The socket goes last, so 'banish' returns once everything is hoarded
+        if repo.control:
+            repo.control.stop()
+        print(f"🐝 The hive no longer haunts {repo.path}")
+
+    def _reconcile(self):
+        """Pick up repositories added to or removed from the registry"""
+        stamp = self.registry.stamp()
+        if stamp == self._registry_stamp:
+            return
+        self._registry_stamp = stamp
+        wanted = {str(Path(p).resolve()) for p in self.registry.repos()}
+        for repo_path in sorted(wanted - set(self.repos)):
+            self.add_repo(repo_path)
+        for repo_path in sorted(set(self.repos) - wanted):
+            self.remove_repo(repo_path)
+
+    def _collect(self):
+        """Move settled files into their repo's queue, starting their AI messages"""
+        for repo in list(self.repos.values()):
+            ready = [f for f in repo.handler.get_pending_files() if f not in repo.queue]
+            if not ready:
+                continue
+            repo.queue.extend(ready)
+            if not repo.watcher.config.is_batch_enabled():
+                for file_path, future in zip(ready, repo.watcher._prefetch_messages([[f] for f in ready])):
+                    repo.futures[file_path] = future
+
+    def _dispatch(self):
+        """Hand queued work to the git pool, one job per repo, round-robin"""
+        with self._lock:
+            for _ in range(len(self._rotation)):
+                if self._in_flight >= self.git_workers:
+                    return
+                repo_path = self._rotation[0]
+                self._rotation.rotate(-1)
+                repo = self.repos[repo_path]
+                if repo.busy or not repo.queue:
+                    continue
+                if repo.watcher.config.is_batch_enabled():
+                    take = max(1, repo.watcher.batch_max_files)
+                else:
+                    take = 1
+                files, repo.queue = repo.queue[:take], repo.queue[take:]
+                repo.busy = True
+                self._in_flight += 1
+                self.git_pool.submit(self._job_done_after, repo, files)
+
+    def _run_job(self, repo, files, ai_future=None):
+        """Commit one unit of work for a repository"""
+        push = not self.hoard_mode
+        if len(files) > 1:
+            repo.watcher.commit_batch(files, push=push, ai_future=ai_future)
+        else:
+            for file_path in files:
+                ai_future = ai_future or repo.futures.pop(file_path, None)
+                repo.watcher.commit_and_push(file_path, push=push, ai_future=ai_future)
+
+    def _await_message(self, repo, files):
+        """The job's AI request, waited for (up to its deadline) before any git slot is taken"""
+        future = repo.futures.pop(files[0], None) if len(files) == 1 else None
+        if future is None:
+            future = repo.watcher._prefetch_messages([files])[0]
+        if future is not None:
+            wait([future], timeout=max(0, future.goblin_deadline - time.monotonic()))
+        return future
+
+    def _job_done_after(self, repo, files):
+        """Run a job on a pool thread, then free the repo's slot"""
+        try:
+            # A slow AI must not hold a git slot every other repo is waiting for
+            ai_future = self._await_message(repo, files)
+            with self.git_gate:
+                self._run_job(repo, files, ai_future)
+        except Exception as e:
+            print(f"❌ The hive tripped in {repo.path}: {e}")
+        finally:
+            with self._lock:
+                repo.busy = False
+                self._in_flight -= 1
+                leaving = repo.leaving and repo.path in self.repos
+                if leaving:
+                    del self.repos[repo.path]
+                    self._rotation.remove(repo.path)
+            if leaving:
+                self._release(repo)
+            self._wake.set()
+
+    def _next_wake(self):
+        """Seconds until a file settles or the registry is due a check"""
+        now = time.monotonic()
+        wait = max(0.0, self._next_registry_check - now)
+        for repo in list(self.repos.values()):
+            deadline = repo.handler.next_deadline()
+            if deadline is not None:
+                wait = min(wait, max(0.0, deadline - now))
+        return wait
+
+    def run(self):
+        """Watch every registered repository until stopped"""
+        from .watches import make_observer
+
+        self.observer = make_observer()
+        self.git_pool = ThreadPoolExecutor(max_workers=self.git_workers, thread_name_prefix='goblin-hive-git')
+        self.git_gate = threading.BoundedSemaphore(self.git_workers)
+        self.ai_pool = ThreadPoolExecutor(max_workers=self.ai_workers, thread_name_prefix='goblin-hive-ai')
+        self._stopping.clear()
+        # Started first, so a repo the kernel cannot watch fails on its own in add_repo
+        self.observer.start()
+        self._reconcile()
+        print(f"🐝 The hive is awake: {len(self.repos)} dungeon(s), "
+              f"{self.git_workers} git worker(s), {self.ai_workers} AI worker(s)")
+
+        try:
+            while not self._stopping.is_set():
+                due = time.monotonic() >= self._next_registry_check
+                if due:
+                    self._reconcile()
+                    self._next_registry_check = time.monotonic() + REGISTRY_POLL_SECONDS
+                with self._lock:
+                    banished, self._banished = self._banished, set()
+                for repo_path in sorted(banished):
+                    self.remove_repo(repo_path)
+                # Each repo's own config, changed by 'gitgoblin enchant' or asked for by 'whisper reload'
+                for repo in list(self.repos.values()):
+                    if due or repo.watcher.config_pending():
+                        repo.watcher.apply_config()
+                self._collect()
+                self._dispatch()
+                self._wake.wait(self._next_wake())
+                self._wake.clear()
+        except (KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            self._stopping.set()
+            self.observer.stop()
+            self.git_pool.shutdown(wait=True)
+            self._collect()
+            for repo in list(self.repos.values()):
+                self._release(repo)
+            self.repos.clear()
+            self._rotation.clear()
+            self.ai_pool.shutdown(wait=False)
+            self.observer.join()
+
+    def stop(self):
+        """Ask a running hive (possibly on another thread) to finish"""
+        self._stopping.set()
+        self._wake.set()
+
+    def run_daemon(self):
+        """Run the hive as a background daemon"""
+        import daemon
+        import daemon.pidfile
+
+        self.pid_file.parent.mkdir(parents=True, exist_ok=True)
+        with daemon.DaemonContext(pidfile=daemon.pidfile.TimeoutPIDLockFile(str(self.pid_file))):
+            self.run()
+
+    def stop_daemon(self):
+        """Stop the background hive; False if none is running"""
+        return stop_pid_file(self.pid_file)
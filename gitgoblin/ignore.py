@@ -0,0 +1,265 @@
+"""
+GitGoblin Ignore Matcher - Decides which paths the goblin should not even look at
+"""
+
+import os
+import re
+import subprocess
+import time
+from pathlib import Path
+
+
+# Junk the goblin never hoards, even when the repo forgets to ignore it.
+# These have the lowest precedence, so a repo's "!pattern" can override them.
+BUILTIN_PATTERNS = [
+    '.git',
+    '__pycache__/',
+    '*.py[cod]',
+    '.DS_Store',
+    '*.swp',
+    '*.swx',
+    '*~',
+    '*.tmp',
+    'node_modules/',
+    '.vscode/',
+    '.idea/',
+    '.env',
+    '*.log',
+    '*.pid',
+]
+
+
+class IgnoreRule:
+    """One compiled gitignore pattern"""
+
+    __slots__ = ('regex', 'negated', 'dir_only', 'anchored')
+
+    def __init__(self, regex, negated, dir_only, anchored):
+        self.regex = regex
+        self.negated = negated
+        self.dir_only = dir_only
+        self.anchored = anchored
+
+    def matches(self, relative_path, name, is_dir):
+        """Check a path relative to the rule's base directory"""
+        if self.dir_only and not is_dir:
+            return False
+        return self.regex.match(relative_path if self.anchored else name) is not None
+
+
+def _translate(pattern):
+    """Translate a gitignore glob into a regular expression"""
+    i, n = 0, len(pattern)
+    out = []
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i):
+                at_start = i == 0 or pattern[i - 1] == '/'
+                at_end = i + 2 == n or pattern[i + 2] == '/'
+                if at_start and at_end:
+                    if i + 2 == n:
+                        out.append('.*')
+                        i += 2
+                    else:
+                        # "**/" matches zero or more leading directories
+                        out.append('(?:.*/)?')
+                        i += 3
+                    continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            j = i + 1
+            if j < n and pattern[j] in '!^':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+            if j >= n:
+                out.append('\\[')
+            else:
+                body = pattern[i + 1:j].replace('\\', '\\\\')
+                if body[:1] in '!^':
+                    body = '^' + body[1:]
+                out.append(f'[{body}]')
+                i = j
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return re.compile(''.join(out) + r'\Z')
+
+
+def compile_pattern(line):
+    """Compile one line of a gitignore file, or return None for blanks and comments"""
+    line = line.rstrip('\n').rstrip('\r')
+    # Trailing spaces are dropped unless escaped
+    stripped = line.rstrip(' ')
+    if stripped.endswith('\\') and len(stripped) < len(line):
+        stripped += ' '
+    line = stripped
+    if not line or line.startswith('#'):
+        return None
+
+    negated = line.startswith('!')
+    if negated:
+        line = line[1:]
+    elif line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+
+    anchored = '/' in line
+    line = line.lstrip('/')
+    return IgnoreRule(_translate(line), negated, dir_only, anchored)
+
+
+def compile_lines(lines):
+    """Compile an iterable of gitignore lines into a list of rules"""
+    return [rule for rule in map(compile_pattern, lines) if rule is not None]
+
+
+class GoblinIgnore:
+    """Compiled matcher following git's ignore rules
+
+    Sources, from lowest to highest precedence: the built-in junk patterns,
+    the global core.excludesFile, .git/info/exclude, then every .gitignore
+    from the repository root down to the path's own directory. Per-directory
+    .gitignore files are loaded lazily, and every directory's decision is
+    cached, so events deep inside an ignored tree are rejected by a single
+    dictionary lookup.
+    """
+
+    # Seconds between mtime checks of the global and info/exclude files
+    RECHECK_SECONDS = 1.0
+
+    def __init__(self, repo_path, builtins=True):
+        self.repo_path = Path(repo_path).resolve()
+        # Without the built-in junk patterns the matcher follows git exactly
+        self.builtins = builtins
+        self.exclude_file = self.repo_path / '.git' / 'info' / 'exclude'
+        self.global_file = self._find_global_excludes()
+        self.invalidate()
+
+    def _find_global_excludes(self):
+        """Locate core.excludesFile, falling back to git's XDG default"""
+        try:
+            result = subprocess.run(
+                ['git', 'config', '--path', 'core.excludesFile'],
+                cwd=self.repo_path,
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+            configured = result.stdout.strip()
+            if configured:
+                return Path(configured).expanduser()
+        except (OSError, subprocess.SubprocessError):
+            pass
+        config_home = os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+        return Path(config_home) / 'git' / 'ignore'
+
+    @staticmethod
+    def _stamp(path):
+        """(mtime, size, inode) of a file, or None if it does not exist"""
+        try:
+            st = os.stat(path)
+            return (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _read_rules(path):
+        """Compile a gitignore-style file, treating unreadable files as empty"""
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                return compile_lines(f)
+        except OSError:
+            return []
+
+    def invalidate(self):
+        """Drop every compiled rule and cached decision"""
+        self._base_rules = (
+            (compile_lines(BUILTIN_PATTERNS) if self.builtins else [])
+            + self._read_rules(self.global_file)
+            + self._read_rules(self.exclude_file)
+        )
+        self._stamps = (self._stamp(self.global_file), self._stamp(self.exclude_file))
+        self._checked_at = time.monotonic()
+        self._dir_rules = {}
+        self._dir_cache = {}
+
+    def refresh_if_stale(self):
+        """Rebuild when the global or info/exclude files changed (checked at most once a second)"""
+        now = time.monotonic()
+        if now - self._checked_at < self.RECHECK_SECONDS:
+            return False
+        self._checked_at = now
+        if (self._stamp(self.global_file), self._stamp(self.exclude_file)) != self._stamps:
+            self.invalidate()
+            return True
+        return False
+
+    def is_source(self, relative_path):
+        """Whether a repo-relative path is one of the ignore files themselves"""
+        if relative_path == '.git/info/exclude':
+            return True
+        return relative_path == '.gitignore' or relative_path.endswith('/.gitignore')
+
+    def _rules_for(self, directory):
+        """Rules from a directory's own .gitignore (loaded once)"""
+        rules = self._dir_rules.get(directory)
+        if rules is None:
+            path = self.repo_path / directory / '.gitignore' if directory else self.repo_path / '.gitignore'
+            rules = self._dir_rules[directory] = self._read_rules(path)
+        return rules
+
+    def _match(self, relative_path, is_dir):
+        """Evaluate rules for a path whose parent directories are not ignored"""
+        name = relative_path.rsplit('/', 1)[-1]
+        parts = relative_path.split('/')[:-1]
+
+        # Deepest .gitignore has the highest precedence; last match in a file wins
+        for depth in range(len(parts), -1, -1):
+            directory = '/'.join(parts[:depth])
+            rules = self._rules_for(directory)
+            if not rules:
+                continue
+            local = relative_path[len(directory) + 1:] if directory else relative_path
+            for rule in reversed(rules):
+                if rule.matches(local, name, is_dir):
+                    return not rule.negated
+
+        for rule in reversed(self._base_rules):
+            if rule.matches(relative_path, name, is_dir):
+                return not rule.negated
+        return False
+
+    def _dir_ignored(self, directory):
+        """Cached decision for a repo-relative directory ('' is the root)"""
+        decision = self._dir_cache.get(directory)
+        if decision is None:
+            if not directory:
+                decision = False
+            else:
+                parent = directory.rsplit('/', 1)[0] if '/' in directory else ''
+                decision = self._dir_ignored(parent) or self._match(directory, True)
+            self._dir_cache[directory] = decision
+        return decision
+
+    def is_ignored(self, relative_path, is_dir=False):
+        """Check a repo-relative, '/'-separated path against git's ignore rules"""
+        relative_path = relative_path.strip('/')
+        if not relative_path:
+            return False
+        if is_dir:
+            return self._dir_ignored(relative_path)
+        parent = relative_path.rsplit('/', 1)[0] if '/' in relative_path else ''
+        return self._dir_ignored(parent) or self._match(relative_path, False)
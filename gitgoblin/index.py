@@ -0,0 +1,421 @@
+"""
+GitGoblin Index Reader - Peeks at .git/index without forking git status
+"""
+
+import mmap
+import os
+import stat
+import struct
+import subprocess
+import zlib
+from pathlib import Path
+
+from .ignore import GoblinIgnore
+
+
+class GitIndexError(Exception):
+    """The index cannot be read in-process; the caller should ask git instead"""
+
+
+class IndexEntry:
+    """Cached stat data and blob id of one tracked path"""
+
+    __slots__ = ('ctime', 'mtime', 'ino', 'mode', 'size', 'sha', 'stage', 'assume_valid', 'skip_worktree')
+
+    def __init__(self, ctime, mtime, ino, mode, size, sha, stage, assume_valid, skip_worktree):
+        self.ctime = ctime
+        self.mtime = mtime
+        self.ino = ino
+        self.mode = mode
+        self.size = size
+        self.sha = sha
+        self.stage = stage
+        self.assume_valid = assume_valid
+        self.skip_worktree = skip_worktree
+
+
+_ENTRY_HEAD = struct.Struct('>10I')
+
+
+def resolve_git_dir(repo_path):
+    """Locate the git directory, following the 'gitdir:' file used by worktrees"""
+    dot_git = Path(repo_path) / '.git'
+    if dot_git.is_file():
+        content = dot_git.read_text(encoding='utf-8', errors='replace').strip()
+        if content.startswith('gitdir:'):
+            git_dir = Path(content[len('gitdir:'):].strip())
+            return git_dir if git_dir.is_absolute() else (Path(repo_path) / git_dir).resolve()
+    return dot_git
+
+
+def ref_dirs(git_dir):
+    """The git directory plus the common one shared by linked worktrees"""
+    dirs = [git_dir]
+    try:
+        common = (git_dir / 'commondir').read_text(encoding='utf-8').strip()
+        dirs.append((git_dir / common).resolve())
+    except OSError:
+        pass
+    return dirs
+
+
+def read_ref(git_dir, ref):
+    """Resolve a ref from loose files or packed-refs"""
+    for directory in ref_dirs(git_dir):
+        try:
+            return (directory / ref).read_text(encoding='utf-8').strip()
+        except OSError:
+            pass
+        try:
+            with open(directory / 'packed-refs', 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2 and parts[1] == ref:
+                        return parts[0]
+        except OSError:
+            pass
+    return None
+
+
+def read_head(git_dir):
+    """(ref HEAD points at or None when detached, commit id or None when unborn)"""
+    try:
+        head = (git_dir / 'HEAD').read_text(encoding='utf-8').strip()
+    except OSError:
+        return None, None
+    if head.startswith('ref:'):
+        ref = head[4:].strip()
+        return ref, read_ref(git_dir, ref)
+    return None, head or None
+
+
+def read_loose_object(git_dir, sha):
+    """Body of a loose object, or None when it is packed (or missing)"""
+    for directory in ref_dirs(git_dir):
+        try:
+            raw = zlib.decompress((directory / 'objects' / sha[:2] / sha[2:]).read_bytes())
+        except (OSError, zlib.error):
+            continue
+        return raw[raw.index(b'\0') + 1:]
+    return None
+
+
+class GitIndex:
+    """Pure-Python reader for .git/index versions 2, 3 and 4
+
+    The index is memory-mapped and parsed once; ``status`` then compares the
+    cached stat data of the requested paths (or of every tracked path) with
+    the working tree, exactly like git's own racy-aware stat check. Entries
+    whose stat data changed but whose size did not are ambiguous and are
+    settled by a single ``git status`` call restricted to those paths.
+    """
+
+    def __init__(self, repo_path='.'):
+        self.repo_path = Path(repo_path).resolve()
+        self.git_dir = resolve_git_dir(self.repo_path)
+        self.index_file = self.git_dir / 'index'
+        self.entries = {}
+        self.version = None
+        self.cache_tree_root = None
+        self._index_mtime = None
+        self._tracked_dirs = None
+        self._load()
+
+    @staticmethod
+    def _hash_size(git_dir):
+        """20 for SHA-1 repositories, 32 for SHA-256 ones"""
+        try:
+            config = (git_dir / 'config').read_text(encoding='utf-8', errors='replace').lower()
+        except OSError:
+            return 20
+        return 32 if 'objectformat = sha256' in config.replace('\t', ' ') else 20
+
+    def _load(self):
+        """Memory-map and parse the index file"""
+        try:
+            st = os.stat(self.index_file)
+        except FileNotFoundError:
+            # A fresh repository without an index tracks nothing yet
+            self.version = 2
+            return
+        except OSError as e:
+            raise GitIndexError(f"cannot stat index: {e}")
+        self._index_mtime = (st.st_mtime_ns // 10 ** 9, st.st_mtime_ns % 10 ** 9)
+        if st.st_size < 12:
+            raise GitIndexError("index is truncated")
+
+        with open(self.index_file, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                self._parse(data, self._hash_size(self.git_dir))
+
+    def _parse(self, data, hash_size):
+        """Parse the header, every entry and the cache-tree extension"""
+        signature, version, count = struct.unpack_from('>4sII', data, 0)
+        if signature != b'DIRC' or version not in (2, 3, 4):
+            raise GitIndexError(f"unsupported index (version {version})")
+        self.version = version
+
+        offset = 12
+        previous = b''
+        end = len(data) - hash_size
+        for _ in range(count):
+            start = offset
+            (ctime_s, ctime_ns, mtime_s, mtime_ns, _dev, ino,
+             mode, _uid, _gid, size) = _ENTRY_HEAD.unpack_from(data, offset)
+            offset += 40
+            sha = data[offset:offset + hash_size].hex()
+            offset += hash_size
+            (flags,) = struct.unpack_from('>H', data, offset)
+            offset += 2
+            skip_worktree = False
+            if version >= 3 and flags & 0x4000:
+                (extended,) = struct.unpack_from('>H', data, offset)
+                offset += 2
+                skip_worktree = bool(extended & 0x4000)
+
+            if version == 4:
+                strip, offset = self._varint(data, offset)
+                nul = data.find(b'\0', offset)
+                name = previous[:len(previous) - strip] + data[offset:nul]
+                offset = nul + 1
+            else:
+                nul = data.find(b'\0', offset)
+                name = data[offset:nul]
+                # Entries are NUL-padded to a multiple of eight bytes
+                offset = start + ((nul - start + 8) & ~7)
+            previous = name
+
+            path = name.decode('utf-8', 'surrogateescape')
+            entry = IndexEntry(
+                (ctime_s, ctime_ns), (mtime_s, mtime_ns), ino, mode, size, sha,
+                (flags >> 12) & 3, bool(flags & 0x8000), skip_worktree
+            )
+            # Conflicted paths have several stages; any of them marks the path
+            if path not in self.entries or entry.stage:
+                self.entries[path] = entry
+
+        while offset + 8 <= end:
+            signature, size = struct.unpack_from('>4sI', data, offset)
+            offset += 8
+            if signature == b'link':
+                raise GitIndexError("split index is not supported")
+            if signature == b'sdir':
+                raise GitIndexError("sparse index is not supported")
+            if signature == b'TREE':
+                self.cache_tree_root = self._cache_tree_root(data[offset:offset + size], hash_size)
+            offset += size
+
+    @staticmethod
+    def _varint(data, offset):
+        """Decode git's offset-style varint used by index version 4"""
+        c = data[offset]
+        offset += 1
+        value = c & 0x7f
+        while c & 0x80:
+            value += 1
+            c = data[offset]
+            offset += 1
+            value = (value << 7) + (c & 0x7f)
+        return value, offset
+
+    @staticmethod
+    def _cache_tree_root(extension, hash_size):
+        """Tree id the cache-tree records for the root, or None if invalidated"""
+        nul = extension.find(b'\0')
+        newline = extension.find(b'\n', nul)
+        if nul != 0 or newline < 0:
+            return None
+        entry_count = int(extension[nul + 1:newline].split(b' ')[0])
+        if entry_count < 0:
+            return None
+        return extension[newline + 1:newline + 1 + hash_size].hex()
+
+    def head_tree(self):
+        """Tree id of HEAD read straight from .git, or None when it needs git (packed objects)"""
+        _, commit = read_head(self.git_dir)
+        body = read_loose_object(self.git_dir, commit) if commit else None
+        if body and body.startswith(b'tree '):
+            return body[5:body.index(b'\n')].decode()
+        return None
+
+    def has_staged_changes(self):
+        """False when the index matches HEAD, True/None when it differs or is unknown"""
+        if self.cache_tree_root is None:
+            return None
+        head_tree = self.head_tree()
+        if head_tree is None:
+            return None
+        return self.cache_tree_root != head_tree
+
+    def _is_racy(self, entry):
+        """Entries written in the same second as the index cannot be trusted"""
+        return self._index_mtime is not None and entry.mtime >= self._index_mtime
+
+    def _check(self, path, entry):
+        """Compare one entry with the working tree: 'clean', 'M', 'D', 'T' or 'ambiguous'"""
+        if entry.stage:
+            return 'U'
+        if entry.skip_worktree or entry.assume_valid:
+            return 'clean'
+        try:
+            st = os.lstat(self.repo_path / path)
+        except FileNotFoundError:
+            return 'D'
+        except NotADirectoryError:
+            return 'D'
+        except OSError:
+            return 'ambiguous'
+
+        if stat.S_ISDIR(st.st_mode):
+            # A submodule (gitlink) or a file replaced by a directory
+            return 'ambiguous' if entry.mode == 0o160000 else 'T'
+        if stat.S_ISLNK(st.st_mode) != stat.S_ISLNK(entry.mode):
+            return 'T'
+        if stat.S_ISREG(st.st_mode) and (st.st_mode & 0o100) != (entry.mode & 0o100):
+            return 'M'
+        if st.st_size & 0xffffffff != entry.size:
+            return 'M'
+
+        mtime = (st.st_mtime_ns // 10 ** 9, st.st_mtime_ns % 10 ** 9)
+        ctime = (st.st_ctime_ns // 10 ** 9, st.st_ctime_ns % 10 ** 9)
+        if mtime != entry.mtime or ctime != entry.ctime or (st.st_ino & 0xffffffff) != entry.ino:
+            return 'ambiguous'
+        if self._is_racy(entry):
+            return 'ambiguous'
+        return 'clean'
+
+    def _ask_git(self, paths):
+        """Settle ambiguous paths with one git status restricted to them"""
+        if not paths:
+            return []
+        result = subprocess.run(
+            # Read-only: no opportunistic index refresh racing the commit loop's index.lock
+            ['git', '--no-optional-locks', 'status', '--porcelain', '-z', '--untracked-files=no', '--'] + paths,
+            cwd=self.repo_path,
+            capture_output=True,
+            timeout=30
+        )
+        changes = []
+        for record in result.stdout.split(b'\0'):
+            if len(record) > 3:
+                code = record[:2].decode()
+                if code[1] != ' ':
+                    changes.append((code[1], record[3:].decode('utf-8', 'surrogateescape')))
+        return changes
+
+    def _tracked_directories(self):
+        """Every directory that holds at least one tracked path"""
+        if self._tracked_dirs is None:
+            dirs = set()
+            for path in self.entries:
+                while '/' in path:
+                    path = path.rsplit('/', 1)[0]
+                    if path in dirs:
+                        break
+                    dirs.add(path)
+            self._tracked_dirs = dirs
+        return self._tracked_dirs
+
+    def _untracked(self, ignore, stop_at_first=False, root=''):
+        """Walk the working tree, or one tracked directory, for untracked paths"""
+        tracked_dirs = self._tracked_directories()
+        found = []
+
+        def has_files(relative_dir):
+            for walk_root, dirnames, filenames in os.walk(self.repo_path / relative_dir):
+                base = Path(walk_root).relative_to(self.repo_path).as_posix()
+                if any(not ignore.is_ignored(f"{base}/{name}") for name in filenames):
+                    return True
+                dirnames[:] = [d for d in dirnames if not ignore.is_ignored(f"{base}/{d}", is_dir=True)]
+            return False
+
+        stack = [root]
+        while stack:
+            relative_dir = stack.pop()
+            try:
+                with os.scandir(self.repo_path / relative_dir) as entries:
+                    children = list(entries)
+            except OSError:
+                continue
+            for child in children:
+                if child.name == '.git':
+                    continue
+                path = f"{relative_dir}/{child.name}" if relative_dir else child.name
+                try:
+                    is_dir = child.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if ignore.is_ignored(path, is_dir=is_dir):
+                    continue
+                if is_dir:
+                    if path in tracked_dirs:
+                        stack.append(path)
+                    elif path not in self.entries and has_files(path):
+                        found.append(('?', path + '/'))
+                elif path not in self.entries:
+                    found.append(('?', path))
+                if stop_at_first and found:
+                    return found
+        return found
+
+    def status(self, paths=None, untracked=True, stop_at_first=False):
+        """Working-tree changes as a list of (code, path)
+
+        Codes follow the second column of ``git status --porcelain``: 'M',
+        'D', 'T', 'U' and '?' for untracked. With ``paths`` only those paths
+        are checked (the watcher's dirty set); without, every tracked entry
+        is checked and the working tree is walked for untracked files.
+        """
+        changes = []
+        ambiguous = []
+        # Tracked directories among the paths, walked for untracked files below
+        directories = []
+
+        if paths is None:
+            candidates = self.entries.items()
+        else:
+            candidates = []
+            for path in paths:
+                path = str(path).replace(os.sep, '/').rstrip('/')
+                entry = self.entries.get(path)
+                if entry is not None:
+                    candidates.append((path, entry))
+                elif path in self._tracked_directories():
+                    prefix = path + '/'
+                    candidates.extend((p, e) for p, e in self.entries.items() if p.startswith(prefix))
+                    directories.append(path)
+                elif untracked and os.path.lexists(self.repo_path / path):
+                    changes.append(('?', path))
+
+        for path, entry in candidates:
+            result = self._check(path, entry)
+            if result == 'ambiguous':
+                ambiguous.append(path)
+            elif result != 'clean':
+                changes.append((result, path))
+                if stop_at_first:
+                    return changes
+
+        changes.extend(self._ask_git(ambiguous))
+        if stop_at_first and changes:
+            return changes
+
+        if untracked and (paths is None or directories):
+            # git's own ignore rules only: the goblin's built-in junk patterns
+            # would hide files git status reports
+            ignore = GoblinIgnore(self.repo_path, builtins=False)
+            for root in ([''] if paths is None else directories):
+                changes.extend(self._untracked(ignore, stop_at_first, root))
+                if stop_at_first and changes:
+                    break
+        return changes
+
+    def is_dirty(self, paths=None):
+        """True/False when the answer is certain, None when git must be asked"""
+        if paths is None:
+            staged = self.has_staged_changes()
+            if staged is None:
+                return None
+            if staged:
+                return True
+        return bool(self.status(paths, stop_at_first=True))
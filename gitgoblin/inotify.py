@@ -0,0 +1,141 @@
+"""
+GitGoblin Inotify - One inotify instance per repository, watching only what git looks at
+"""
+
+import errno
+import os
+import threading
+
+from watchdog.observers.api import DEFAULT_OBSERVER_TIMEOUT, BaseObserver
+from watchdog.observers.inotify import InotifyEmitter
+from watchdog.observers.inotify_buffer import InotifyBuffer
+from watchdog.observers.inotify_c import Inotify, inotify_rm_watch
+from watchdog.utils import BaseThread
+from watchdog.utils.delayed_queue import DelayedQueue
+
+
+class _PrunedInotify(Inotify):
+    """An inotify instance whose directory watches are added and removed one by one
+
+    Removing a watch leaves its bookkeeping in place until the kernel's
+    IN_IGNORED event for it arrives, so events already queued for that
+    watch still resolve to a path.
+    """
+
+    def __init__(self, path):
+        super().__init__(path, recursive=False)
+        self._removed = set()
+
+    def add_watch(self, path):
+        with self._lock:
+            wd = self._wd_for_path.get(path)
+            if wd is not None and wd not in self._removed:
+                return
+            self._add_watch(path, self._event_mask)
+
+    def remove_watch(self, path):
+        with self._lock:
+            wd = self._wd_for_path.get(path)
+            if wd is None or wd in self._removed or path == self._path:
+                return
+            self._removed.add(wd)
+            inotify_rm_watch(self._inotify_fd, wd)
+
+    def read_events(self, *args, **kwargs):
+        events = super().read_events(*args, **kwargs)
+        for event in events:
+            if event.is_ignored:
+                with self._lock:
+                    self._removed.discard(event.wd)
+        return events
+
+
+class _PrunedBuffer(InotifyBuffer):
+    """InotifyBuffer (move pairing and all) over a _PrunedInotify"""
+
+    def __init__(self, path):
+        BaseThread.__init__(self)
+        self._queue = DelayedQueue(self.delay)
+        self._inotify = _PrunedInotify(path)
+        self.start()
+
+    @property
+    def inotify(self):
+        return self._inotify
+
+
+class _PrunedEmitter(InotifyEmitter):
+    """Emitter for a repository root whose subdirectories are watched one by one
+
+    The directories to watch are handed over with ``add_directory`` and
+    ``remove_directory``, before or after the emitter starts, and all of
+    them share one inotify file descriptor and one reading thread.
+    """
+
+    def __init__(self, event_queue, watch, **kwargs):
+        super().__init__(event_queue, watch, **kwargs)
+        self._directories = set()
+        self._guard = threading.Lock()
+        self._warned = False
+
+    def on_thread_start(self):
+        buffer = _PrunedBuffer(os.fsencode(self.watch.path))
+        with self._guard:
+            self._inotify = buffer
+            for directory in sorted(self._directories):
+                self._add(directory)
+
+    def on_thread_stop(self):
+        with self._guard:
+            super().on_thread_stop()
+
+    def _add(self, directory):
+        """Watch a directory on the live instance (caller holds the guard)"""
+        try:
+            self._inotify.inotify.add_watch(directory)
+        except OSError as e:
+            if e.errno == errno.ENOSPC and not self._warned:
+                self._warned = True
+                print(f"⚠️  The goblin ran out of inotify watches ({e}); "
+                      "raise fs.inotify.max_user_watches to see everything")
+            return False
+        return True
+
+    def add_directory(self, path):
+        """Start watching one directory; False if the kernel refused"""
+        directory = os.fsencode(path)
+        with self._guard:
+            self._directories.add(directory)
+            if self._inotify is None:
+                return True
+            return self._add(directory)
+
+    def remove_directory(self, path):
+        """Stop watching one directory"""
+        directory = os.fsencode(path)
+        with self._guard:
+            self._directories.discard(directory)
+            if self._inotify is not None:
+                try:
+                    self._inotify.inotify.remove_watch(directory)
+                except OSError:
+                    pass
+
+
+class GoblinObserver(BaseObserver):
+    """An inotify observer that costs one instance per repository
+
+    watchdog's own observer gives every scheduled watch its own inotify
+    instance, and the kernel allows only ``fs.inotify.max_user_instances``
+    (128 by default) of those per user. Here a repository root is
+    scheduled once, non-recursively, and GoblinWatchTree adds its other
+    directories to that root's instance through ``emitter_for``.
+    """
+
+    def __init__(self, timeout=DEFAULT_OBSERVER_TIMEOUT):
+        super().__init__(_PrunedEmitter, timeout=timeout)
+
+    def emitter_for(self, watch):
+        """The emitter serving a scheduled watch, or None"""
+        with self._lock:
+            return self._emitter_for_watch.get(watch)
@@ -0,0 +1,153 @@
+"""
+GitGoblin Journal - Remembers unsettled changes across crashes and restarts
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+class GoblinJournal:
+    """Append-only log of what the goblin has seen, committed and pushed
+
+    Every path that starts changing is appended to ``.git/gitgoblin.journal``
+    once, and again when a commit settles it. Commits waiting for a push and
+    finished pushes are logged too. Replaying the log on start gives back
+    the changes a killed goblin never committed and the commits it never
+    pushed, without scanning the tree. Lines are flushed as they are written
+    and fsync()ed at most every ``fsync_interval`` seconds; once the log
+    grows past ``compact_bytes`` it is rewritten as a single snapshot.
+    """
+
+    def __init__(self, repo_path='.', compact_bytes=262144, fsync_interval=1.0):
+        self.repo_path = Path(repo_path).resolve()
+        self.path = self.repo_path / '.git' / 'gitgoblin.journal'
+        self.compact_bytes = compact_bytes
+        self.fsync_interval = fsync_interval
+
+        # The state the log describes
+        self.pending = set()
+        self.unpushed = 0
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._last_sync = 0.0
+
+    def _apply(self, entry):
+        """Fold one log entry into the in-memory state"""
+        op = entry.get('op')
+        if op == 'snapshot':
+            self.pending = set(entry.get('pending', ()))
+            self.unpushed = int(entry.get('unpushed', 0))
+        elif op == 'change':
+            self.pending.update(entry['paths'])
+        elif op == 'settle':
+            self.pending.difference_update(entry['paths'])
+            if entry.get('push'):
+                self.unpushed += 1
+        elif op == 'push':
+            self.unpushed = max(0, self.unpushed - int(entry.get('count', 0)))
+
+    def replay(self):
+        """Load the log and open it for appending; returns (pending paths, unpushed commits)"""
+        with self._lock:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            self._apply(json.loads(line))
+                        except (ValueError, KeyError, TypeError, AttributeError):
+                            # A torn last line from a crash mid-write
+                            continue
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"⚠️  The goblin's journal is unreadable: {e}")
+            self._compact()
+            return sorted(self.pending), self.unpushed
+
+    def _append(self, entry):
+        """Write one entry (caller holds the lock)"""
+        if self._file is None:
+            return
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        try:
+            self._file.write(line)
+            self._file.flush()
+            now = time.monotonic()
+            if now - self._last_sync >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._last_sync = now
+        except OSError as e:
+            print(f"⚠️  The goblin could not write its journal: {e}")
+            return
+        self._size += len(line.encode('utf-8'))
+        if self._size > self.compact_bytes:
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the log as one snapshot of the current state (caller holds the lock)"""
+        snapshot = {'op': 'snapshot', 'pending': sorted(self.pending), 'unpushed': self.unpushed,
+                    'at': time.time()}
+        data = json.dumps(snapshot, separators=(',', ':')) + '\n'
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=str(self.path.parent), prefix='.gitgoblin.journal.')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except OSError:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self._file = open(self.path, 'a', encoding='utf-8')
+        except OSError as e:
+            print(f"⚠️  The goblin could not write its journal: {e}")
+            return
+        self._size = len(data.encode('utf-8'))
+        self._last_sync = time.monotonic()
+
+    def changed(self, paths):
+        """Log paths that started changing (each only once until it settles)"""
+        with self._lock:
+            new = [path for path in paths if path not in self.pending]
+            if new:
+                self.pending.update(new)
+                self._append({'op': 'change', 'paths': new})
+
+    def settled(self, paths, committed=False, push=False):
+        """Log paths that were committed (or turned out to need no commit)"""
+        with self._lock:
+            entry = {'op': 'settle', 'paths': list(paths)}
+            if committed and push:
+                entry['push'] = True
+            self._apply(entry)
+            self._append(entry)
+
+    def pushed(self, count):
+        """Log a push that took queued commits to the remote"""
+        with self._lock:
+            entry = {'op': 'push', 'count': count}
+            self._apply(entry)
+            self._append(entry)
+
+    def close(self):
+        """Leave a compact snapshot behind and close the log"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._compact()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
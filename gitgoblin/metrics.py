@@ -0,0 +1,249 @@
+"""
+GitGoblin Metrics - Times every stage of the hoarding pipeline
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: only flushes from this process are kept apart
+    fcntl = None
+
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Pipeline stages in the order a change goes through them
+STAGES = ('debounce', 'stage', 'message', 'commit', 'push', 'sneak')
+
+# Every GoblinMetrics in this process merges into the files one at a time
+_merge_lock = threading.Lock()
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, as Prometheus exposes them"""
+
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                break
+        else:
+            index = len(BUCKETS)
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def to_dict(self):
+        return {'buckets': list(self.counts), 'count': self.count, 'sum': self.sum, 'max': self.max}
+
+
+def quantile(histogram, q):
+    """Estimate a quantile from a histogram snapshot, or None when it is empty"""
+    count = histogram['count']
+    if not count:
+        return None
+    target = q * count
+    seen = 0
+    lower = 0.0
+    for index, bucket in enumerate(histogram['buckets']):
+        upper = BUCKETS[index] if index < len(BUCKETS) else histogram['max']
+        if bucket and seen + bucket >= target:
+            estimate = lower + (upper - lower) * (target - seen) / bucket
+            return min(estimate, histogram['max'])
+        seen += bucket
+        lower = upper
+    return histogram['max']
+
+
+class GoblinMetrics:
+    """Per-stage latency histograms, error counts and event counters
+
+    Totals go to ``.git/gitgoblin.metrics.json`` (read back by
+    ``crystalball``) and ``.git/gitgoblin.prom`` in the Prometheus textfile
+    format, e.g. for node_exporter's textfile collector. Both are rewritten
+    atomically, at most every ``flush_interval`` seconds.
+    """
+
+    def __init__(self, repo_path='.', flush_interval=1.0):
+        self.repo_path = Path(repo_path).resolve()
+        self.json_file = self.repo_path / '.git' / 'gitgoblin.metrics.json'
+        self.prom_file = self.repo_path / '.git' / 'gitgoblin.prom'
+        self.lock_file = self.repo_path / '.git' / 'gitgoblin.metrics.lock'
+        self.flush_interval = flush_interval
+        self.started_at = time.time()
+
+        self.histograms = {}
+        self.errors = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self._timer = None
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block as one run of a stage; exceptions count as errors"""
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException:
+            self.error(name)
+            raise
+        finally:
+            self.observe(name, time.monotonic() - started)
+
+    def observe(self, name, seconds):
+        """Record one duration for a stage"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def error(self, name):
+        """Count a failed run of a stage"""
+        with self._lock:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def count(self, name, amount=1):
+        """Bump an event counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def render_prometheus(self, snapshot):
+        """A snapshot in Prometheus text exposition format"""
+        lines = [
+            '# HELP gitgoblin_stage_seconds Time spent in each stage of the commit pipeline.',
+            '# TYPE gitgoblin_stage_seconds histogram',
+        ]
+        for name, histogram in sorted(snapshot['stages'].items()):
+            cumulative = 0
+            for index, bound in enumerate(BUCKETS):
+                cumulative += histogram['buckets'][index]
+                lines.append(f'gitgoblin_stage_seconds_bucket{{stage="{name}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'gitgoblin_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {histogram["count"]}')
+            lines.append(f'gitgoblin_stage_seconds_sum{{stage="{name}"}} {histogram["sum"]:.6f}')
+            lines.append(f'gitgoblin_stage_seconds_count{{stage="{name}"}} {histogram["count"]}')
+        lines += [
+            '# HELP gitgoblin_stage_errors_total Failed runs of each stage.',
+            '# TYPE gitgoblin_stage_errors_total counter',
+        ]
+        for name, value in sorted(snapshot['errors'].items()):
+            lines.append(f'gitgoblin_stage_errors_total{{stage="{name}"}} {value}')
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f'# TYPE gitgoblin_{name}_total counter')
+            lines.append(f'gitgoblin_{name}_total {value}')
+        lines.append('# TYPE gitgoblin_start_time_seconds gauge')
+        lines.append(f'gitgoblin_start_time_seconds {snapshot["started_at"]:.3f}')
+        return '\n'.join(lines) + '\n'
+
+    def _write(self, path, data):
+        """Replace a file atomically"""
+        fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f'.{path.name}.')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @contextmanager
+    def _merging(self):
+        """Hold the snapshot files against every other flush, in any process"""
+        with _merge_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_file, 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def flush(self, force=False):
+        """Add what was recorded since the last flush to the snapshot files
+
+        Runs at most every flush_interval seconds; an earlier call schedules
+        one for the end of the interval. The files hold totals across every
+        goblin process of the repository (the daemon, sneak, ...), so each
+        process only ever adds its own new observations to them, reading and
+        replacing them under ``.git/gitgoblin.metrics.lock``.
+        """
+        with self._lock:
+            wait = self._last_flush + self.flush_interval - time.monotonic()
+            if not force and wait > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(wait, self.flush, kwargs={'force': True})
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._last_flush = time.monotonic()
+            histograms, errors, counters = self.histograms, self.errors, self.counters
+            self.histograms, self.errors, self.counters = {}, {}, {}
+        if not (histograms or errors or counters):
+            return
+
+        try:
+            with self._merging():
+                self._merge(histograms, errors, counters)
+        except OSError as e:
+            print(f"⚠️  Could not save the goblin's metrics: {e}")
+
+    def _merge(self, histograms, errors, counters):
+        """Add new observations to the snapshot files (caller holds the merge lock)"""
+        snapshot = load_metrics(self.repo_path) or {
+            'started_at': self.started_at, 'stages': {}, 'errors': {}, 'counters': {}
+        }
+        for name, histogram in histograms.items():
+            total = snapshot['stages'].get(name)
+            if total is None or len(total.get('buckets', ())) != len(histogram.counts):
+                snapshot['stages'][name] = histogram.to_dict()
+                continue
+            total['buckets'] = [a + b for a, b in zip(total['buckets'], histogram.counts)]
+            total['count'] += histogram.count
+            total['sum'] += histogram.sum
+            total['max'] = max(total['max'], histogram.max)
+        for name, value in errors.items():
+            snapshot['errors'][name] = snapshot['errors'].get(name, 0) + value
+        for name, value in counters.items():
+            snapshot['counters'][name] = snapshot['counters'].get(name, 0) + value
+        snapshot['updated_at'] = time.time()
+
+        self._write(self.json_file, json.dumps(snapshot, separators=(',', ':')))
+        self._write(self.prom_file, self.render_prometheus(snapshot))
+
+    def close(self):
+        """Write a final snapshot"""
+        self.flush(force=True)
+
+
+def load_metrics(repo_path='.'):
+    """The last metrics snapshot written for a repository, or None"""
+    try:
+        with open(Path(repo_path).resolve() / '.git' / 'gitgoblin.metrics.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
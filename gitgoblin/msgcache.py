@@ -0,0 +1,175 @@
+"""
+GitGoblin Message Cache - Remembers inscriptions for diffs the goblin has seen before
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+# Lines that change between otherwise identical diffs
+_INDEX_LINE = re.compile(r'^index [0-9a-f]+\.\.[0-9a-f]+.*$', re.MULTILINE)
+_HUNK_HEADER = re.compile(r'^@@ -\d+(?:,\d+)? \+\d+(?:,\d+)? @@', re.MULTILINE)
+
+
+def normalize_diff(diff):
+    """Drop blob ids, hunk positions and trailing whitespace from a diff"""
+    diff = _INDEX_LINE.sub('', diff)
+    diff = _HUNK_HEADER.sub('@@', diff)
+    return '\n'.join(line.rstrip() for line in diff.splitlines() if line.strip())
+
+
+def cache_key(diff, status, prompt_version, model):
+    """Content address of an AI request"""
+    digest = hashlib.sha256()
+    for part in (prompt_version, model, normalize_diff(diff or ''), status or ''):
+        digest.update(str(part).encode('utf-8', 'surrogateescape'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class MessageCache:
+    """LRU cache of generated commit messages
+
+    Messages live in a compact JSON store at ``.git/gitgoblin.msgcache.json``
+    that is loaded once and kept in memory (re-read only when another process
+    rewrites it). The store keeps last-use timestamps and is trimmed, least
+    recently used first, past ``max_entries`` or ``max_bytes``. New messages
+    are written right away; hits, misses and last-use times are written at
+    most every ``flush_interval`` seconds and on ``flush``, so a lookup never
+    rewrites the file. The counters are persisted so that ``crystalball``
+    can show them from another process.
+    """
+
+    def __init__(self, repo_path='.', max_entries=256, max_bytes=1_000_000, flush_interval=5.0):
+        self.repo_path = Path(repo_path).resolve()
+        self.store_file = self.repo_path / '.git' / 'gitgoblin.msgcache.json'
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._store = None
+        self._store_stamp = None
+
+        # Not written yet: counters, last-use times and new messages
+        self._hits = 0
+        self._misses = 0
+        self._touched = {}
+        self._added = {}
+        self._flushed_at = time.monotonic()
+
+    def _load_store(self):
+        """Load the on-disk store, re-reading it if another process rewrote it"""
+        try:
+            st = os.stat(self.store_file)
+            stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            stamp = None
+        if self._store is not None and stamp == self._store_stamp:
+            return self._store
+
+        store = {'hits': 0, 'misses': 0, 'entries': {}}
+        if stamp is not None:
+            try:
+                with open(self.store_file, 'r', encoding='utf-8') as f:
+                    loaded = json.load(f)
+                store['hits'] = int(loaded.get('hits', 0))
+                store['misses'] = int(loaded.get('misses', 0))
+                store['entries'] = dict(loaded.get('entries', {}))
+            except (OSError, ValueError, TypeError, AttributeError):
+                pass
+        self._store = store
+        self._store_stamp = stamp
+        return store
+
+    def _save_store(self):
+        """Write the store atomically, evicting the oldest entries past max_entries or max_bytes"""
+        store = self._store
+        entries = store['entries']
+        if len(entries) > self.max_entries:
+            oldest = sorted(entries, key=lambda key: entries[key][1])
+            for key in oldest[:len(entries) - self.max_entries]:
+                del entries[key]
+        data = json.dumps(store, separators=(',', ':'))
+        excess = len(data) - self.max_bytes
+        if excess > 0:
+            # Drop least recently used entries until the store fits
+            for key, value in sorted(entries.items(), key=lambda item: item[1][1]):
+                excess -= len(json.dumps(key)) + len(json.dumps(value, separators=(',', ':'))) + 2
+                del entries[key]
+                if excess <= 0:
+                    break
+            data = json.dumps(store, separators=(',', ':'))
+        try:
+            self.store_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(self.store_file.parent), prefix='.gitgoblin.msgcache.')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.store_file)
+            st = os.stat(self.store_file)
+            self._store_stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError as e:
+            print(f"⚠️  Could not save the message cache: {e}")
+
+    def _flush(self, force=False):
+        """Merge what is pending into the store and write it (caller holds the lock)"""
+        if not (self._hits or self._misses or self._touched or self._added):
+            return
+        if not force and time.monotonic() - self._flushed_at < self.flush_interval:
+            return
+        store = self._load_store()
+        store['hits'] += self._hits
+        store['misses'] += self._misses
+        store['entries'].update(self._added)
+        for key, used_at in self._touched.items():
+            entry = store['entries'].get(key)
+            if entry is not None and entry[1] < used_at:
+                entry[1] = used_at
+        self._hits = self._misses = 0
+        self._touched = {}
+        self._added = {}
+        self._save_store()
+        self._flushed_at = time.monotonic()
+
+    def get(self, key):
+        """Cached message for a key, or None (counts a hit or a miss)"""
+        with self._lock:
+            entry = self._added.get(key) or self._load_store()['entries'].get(key)
+            if entry is None:
+                self._misses += 1
+                message = None
+            else:
+                self._hits += 1
+                self._touched[key] = time.time()
+                message = entry[0]
+            self._flush()
+            return message
+
+    def put(self, key, message):
+        """Remember a freshly generated message"""
+        if not message:
+            return
+        with self._lock:
+            self._added[key] = [message, time.time()]
+            self._touched.pop(key, None)
+            self._flush(force=True)
+
+    def flush(self):
+        """Write pending counters and last-use times now"""
+        with self._lock:
+            self._flush(force=True)
+
+    def stats(self):
+        """Hit/miss counters and entry count, including what is not written yet"""
+        with self._lock:
+            store = self._load_store()
+            return {
+                'hits': store['hits'] + self._hits,
+                'misses': store['misses'] + self._misses,
+                'entries': len(set(store['entries']) | set(self._added)),
+            }
@@ -0,0 +1,163 @@
+"""
+GitGoblin Push Scheduler - Yeets hoarded commits to the remote off the watch loop
+"""
+
+import contextlib
+import subprocess
+import threading
+import time
+
+
+class GoblinPusher:
+    """Push commits from a background thread
+
+    Any number of commits queued while a push is waiting or in flight are
+    collapsed into a single ``git push``. Pushes are spaced at least
+    ``min_interval`` seconds apart, and when the remote is unreachable the
+    goblin backs off exponentially up to ``max_backoff`` seconds. A
+    ``gate`` semaphore, shared with other git work (the hive's), is held
+    for the length of each push.
+    """
+
+    def __init__(self, repo_path, min_interval=5, max_backoff=300, timeout=30, metrics=None, journal=None,
+                 gate=None):
+        self.repo_path = repo_path
+        self.metrics = metrics
+        self.journal = journal
+        self.gate = gate
+        self.min_interval = min_interval
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._pending = 0
+        self._last_push = 0.0
+        self._retry_at = 0.0
+        self._failures = 0
+
+        # Counters for the curious
+        self.pushes = 0
+        self.failed_pushes = 0
+        self.coalesced = 0
+
+    def start(self):
+        """Start the push thread"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._loop, name='goblin-pusher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the push thread, making one last attempt for anything pending"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def request(self, count=1):
+        """Queue a push for freshly made commits"""
+        with self._cond:
+            self._pending += count
+            self._cond.notify_all()
+
+    def configure(self, min_interval=None, max_backoff=None, timeout=None):
+        """Change the push settings of a running scheduler"""
+        with self._cond:
+            if min_interval is not None:
+                self.min_interval = min_interval
+            if max_backoff is not None:
+                self.max_backoff = max_backoff
+            if timeout is not None:
+                self.timeout = timeout
+            self._cond.notify_all()
+
+    def push_now(self):
+        """Push whatever is queued without waiting out the interval or a backoff"""
+        with self._cond:
+            self._last_push = 0.0
+            self._retry_at = 0.0
+            self._cond.notify_all()
+            return self._pending
+
+    def pending(self):
+        """Number of commits waiting for a push"""
+        with self._cond:
+            return self._pending
+
+    def _loop(self):
+        """Wait for queued commits and push them, respecting interval and backoff"""
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+
+                # While running, honour the interval and backoff; on shutdown push at once
+                wait_until = max(self._last_push + self.min_interval, self._retry_at)
+                delay = wait_until - time.monotonic()
+                if self._running and delay > 0:
+                    self._cond.wait(delay)
+                    continue
+
+                batch = self._pending
+                self._pending = 0
+                stopping = not self._running
+
+            with self.gate or contextlib.nullcontext():
+                started = time.monotonic()
+                ok = self._push(batch)
+            if self.metrics:
+                self.metrics.observe('push', time.monotonic() - started)
+                if ok:
+                    self.metrics.count('pushes')
+                else:
+                    self.metrics.error('push')
+                self.metrics.flush()
+            if ok and self.journal:
+                self.journal.pushed(batch)
+
+            with self._cond:
+                self._last_push = time.monotonic()
+                if ok:
+                    self.pushes += 1
+                    self.coalesced += batch - 1
+                    self._failures = 0
+                    self._retry_at = 0.0
+                else:
+                    # Requeue and back off: min_interval, 2x, 4x ... max_backoff
+                    self.failed_pushes += 1
+                    self._pending += batch
+                    self._failures += 1
+                    backoff = min(self.max_backoff, max(1, self.min_interval) * 2 ** (self._failures - 1))
+                    self._retry_at = self._last_push + backoff
+                    print(f"🌧️  The abyss is unreachable, the goblin will retry in {backoff:g}s")
+                if stopping:
+                    return
+
+    def _push(self, batch):
+        """Run a single git push for all queued commits"""
+        print(f"🚀 Yeeting {batch} hoarded commit(s) to the GitHub abyss...")
+        try:
+            subprocess.run(
+                ['git', 'push'],
+                cwd=self.repo_path,
+                check=True,
+                timeout=self.timeout,
+                capture_output=True
+            )
+            print("✅ The cloud vault has caught up with the hoard")
+            return True
+        except subprocess.CalledProcessError as e:
+            detail = (e.stderr or b'').decode('utf-8', 'replace').strip().splitlines()
+            print(f"❌ The push was repelled: {detail[0] if detail else e}")
+            return False
+        except (subprocess.TimeoutExpired, OSError) as e:
+            print(f"❌ The push was lost in the void: {e}")
+            return False
@@ -0,0 +1,161 @@
+"""
+GitGoblin Rate Limiting - Keeps the goblin polite when the AI realm is busy or broken
+"""
+
+import random
+import re
+import threading
+import time
+
+
+class AIUnavailable(Exception):
+    """The AI realm is rate-limited or down; use the fallback message right away"""
+
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+
+
+def parse_duration(value):
+    """Parse reset durations such as '7.66s', '2m59.56s' or '120ms' into seconds"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    scale = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def backoff_delay(attempt, base=0.5, cap=8.0):
+    """Full-jitter exponential backoff for a retry attempt (1, 2, ...)"""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class TokenBucket:
+    """Client-side request budget that also obeys the server's rate-limit headers
+
+    Tokens refill at ``rate_per_minute``; ``update`` reads Groq's
+    ``x-ratelimit-remaining-*`` / ``x-ratelimit-reset-*`` and ``retry-after``
+    headers and blocks the bucket until the server says quota is back.
+    """
+
+    def __init__(self, rate_per_minute=30, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst or max(1, rate_per_minute // 6))
+        self.tokens = self.capacity
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, max_wait=0):
+        """Take a token, waiting up to max_wait seconds; False if that is not enough"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, self.blocked_until - now)
+            if self.tokens < 1:
+                wait = max(wait, (1 - self.tokens) / self.rate if self.rate else float('inf'))
+            if wait > max_wait:
+                return False
+            # Reserve the token now so concurrent callers queue behind us
+            self.tokens -= 1
+        if wait:
+            time.sleep(wait)
+        return True
+
+    def update(self, headers):
+        """Learn from the response headers of a request"""
+        now = time.monotonic()
+        blocked = 0.0
+        retry_after = parse_duration(headers.get('retry-after'))
+        if retry_after:
+            blocked = retry_after
+        for kind in ('requests', 'tokens'):
+            remaining = headers.get(f'x-ratelimit-remaining-{kind}')
+            if remaining is not None and str(remaining).strip() in ('0', '0.0'):
+                blocked = max(blocked, parse_duration(headers.get(f'x-ratelimit-reset-{kind}')) or 0)
+        if blocked:
+            with self._lock:
+                self.blocked_until = max(self.blocked_until, now + blocked)
+
+
+class CircuitBreaker:
+    """Stop calling a failing service, probing in the background until it recovers
+
+    After ``failure_threshold`` consecutive failures the breaker opens:
+    ``allow`` returns False immediately and a probe thread calls ``probe``
+    with exponential backoff (``probe_interval`` up to ``max_probe_interval``).
+    The first successful probe or request closes the breaker again.
+    """
+
+    def __init__(self, probe=None, failure_threshold=3, probe_interval=5, max_probe_interval=60):
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.max_probe_interval = max_probe_interval
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._prober = None
+        self._stopped = False
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        """Whether a real request may go out"""
+        return not self.is_open
+
+    def record_success(self):
+        """A request or probe succeeded; close the breaker"""
+        with self._lock:
+            self.failures = 0
+            if self.opened_at is not None:
+                print("🌤️  The AI spirits answer again, the goblin resumes consulting them")
+            self.opened_at = None
+
+    def record_failure(self):
+        """A request failed; open the breaker once failures pile up"""
+        with self._lock:
+            self.failures += 1
+            if self.opened_at is not None or self.failures < self.failure_threshold:
+                return
+            self.opened_at = time.monotonic()
+            self.trips += 1
+            print(f"⛈️  The AI spirits are unreachable, the goblin grumbles on its own until they return")
+            if self.probe and not self._stopped and (self._prober is None or not self._prober.is_alive()):
+                self._prober = threading.Thread(target=self._probe_loop, name='goblin-ai-probe', daemon=True)
+                self._prober.start()
+
+    def _probe_loop(self):
+        """Probe with growing intervals while the breaker is open"""
+        interval = self.probe_interval
+        while self.is_open and not self._stopped:
+            self._wake.wait(interval)
+            if self._stopped or not self.is_open:
+                return
+            try:
+                healthy = self.probe()
+            except Exception:
+                healthy = False
+            if healthy:
+                self.record_success()
+                return
+            interval = min(self.max_probe_interval, interval * 2)
+
+    def stop(self):
+        """Stop probing"""
+        self._stopped = True
+        self._wake.set()
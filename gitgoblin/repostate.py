@@ -0,0 +1,196 @@
+"""
+GitGoblin Repo State - Everything crystalball shows, in as few forks as possible
+
+Branch, upstream, ahead/behind and the dirty counts come from a single
+``git status --porcelain=v2 --branch -z``. The last commit and the remote
+are read straight from ``.git``; git is only asked about a commit when it
+has been packed.
+"""
+
+import re
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .index import read_head, read_loose_object, ref_dirs, resolve_git_dir
+
+
+GIT_TIMEOUT = 5
+
+_SECTION = re.compile(r'^\s*\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+_ENTRY = re.compile(r'^\s*([A-Za-z][A-Za-z0-9-]*)\s*(?:=\s*(.*))?$')
+
+
+class WorkTreeStatus:
+    """What one porcelain v2 status run says about the repository"""
+
+    def __init__(self):
+        self.branch = None
+        self.upstream = None
+        self.ahead = 0
+        self.behind = 0
+        self.staged = 0
+        self.unstaged = 0
+        self.untracked = 0
+        self.conflicted = 0
+        self.entries = 0
+
+    @classmethod
+    def parse(cls, data):
+        """Parse NUL-separated ``git status --porcelain=v2 --branch -z`` output"""
+        status = cls()
+        records = iter(data.split('\0'))
+        for record in records:
+            if record.startswith('# '):
+                header, _, value = record[2:].partition(' ')
+                if header == 'branch.head':
+                    status.branch = None if value == '(detached)' else value
+                elif header == 'branch.upstream':
+                    status.upstream = value
+                elif header == 'branch.ab':
+                    ahead, behind = value.split()
+                    status.ahead, status.behind = int(ahead), -int(behind)
+                continue
+            kind = record[:1]
+            if kind in ('1', '2'):
+                status.entries += 1
+                xy = record[2:4]
+                status.staged += xy[0] != '.'
+                status.unstaged += xy[1] != '.'
+                if kind == '2':
+                    # Renames carry their original path as a separate record
+                    next(records, None)
+            elif kind == 'u':
+                status.entries += 1
+                status.conflicted += 1
+            elif kind == '?':
+                status.entries += 1
+                status.untracked += 1
+        return status
+
+
+def read_status(repo_path):
+    """One ``git status`` for branch, upstream, ahead/behind and dirty counts; None on failure"""
+    try:
+        result = subprocess.run(
+            # crystalball --watch polls this under a running goblin: never take index.lock
+            ['git', '--no-optional-locks', 'status', '--porcelain=v2', '--branch', '-z'],
+            cwd=repo_path,
+            capture_output=True,
+            timeout=GIT_TIMEOUT
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return WorkTreeStatus.parse(result.stdout.decode('utf-8', 'replace'))
+
+
+def read_config(git_dir):
+    """{(section, subsection, key): value} from the repository's config file
+
+    Good enough for remotes and branches; include directives and the
+    user's global config are not followed.
+    """
+    values = {}
+    for directory in reversed(ref_dirs(git_dir)):
+        try:
+            lines = (directory / 'config').read_text(encoding='utf-8', errors='replace').splitlines()
+        except OSError:
+            continue
+        section = subsection = None
+        for line in lines:
+            match = _SECTION.match(line)
+            if match:
+                section, subsection = match.group(1).lower(), match.group(2)
+                if subsection is None and '.' in section:
+                    # Old-style [remote.origin]
+                    section, subsection = section.split('.', 1)
+                continue
+            match = _ENTRY.match(line)
+            if match and section:
+                value = (match.group(2) or 'true').strip()
+                value = re.split(r'\s[;#]', value, 1)[0].strip()
+                if len(value) >= 2 and value[0] == value[-1] == '"':
+                    value = value[1:-1]
+                values[(section, subsection, match.group(1).lower())] = value
+    return values
+
+
+def read_remote_url(repo_path, upstream=None):
+    """Push URL of the upstream's remote (else origin, else any remote), from .git/config"""
+    config = read_config(resolve_git_dir(repo_path))
+    remotes = []
+    for section, subsection, key in config:
+        if section == 'remote' and subsection and subsection not in remotes:
+            remotes.append(subsection)
+    preferred = [name for name in remotes if upstream and upstream.startswith(name + '/')]
+    preferred += [name for name in ('origin',) if name in remotes] + remotes
+    for name in preferred:
+        url = config.get(('remote', name, 'pushurl')) or config.get(('remote', name, 'url'))
+        if url:
+            return url
+    return None
+
+
+def read_last_commit(repo_path):
+    """(subject, commit time) of HEAD, asking git only when the commit is packed"""
+    git_dir = resolve_git_dir(repo_path)
+    _, commit = read_head(git_dir)
+    if not commit:
+        return None, None
+    body = read_loose_object(git_dir, commit)
+    if body is None:
+        return _ask_git_last_commit(repo_path)
+    headers, _, message = body.decode('utf-8', 'replace').partition('\n\n')
+    committed_at = None
+    for line in headers.splitlines():
+        if line.startswith('committer '):
+            try:
+                committed_at = int(line.rsplit(' ', 2)[-2])
+            except (ValueError, IndexError):
+                pass
+    return message.strip().split('\n', 1)[0], committed_at
+
+
+def _ask_git_last_commit(repo_path):
+    """The packed-commit fallback of read_last_commit"""
+    try:
+        result = subprocess.run(
+            ['git', 'log', '-1', '--format=%s%x00%ct'],
+            cwd=repo_path,
+            capture_output=True,
+            text=True,
+            timeout=GIT_TIMEOUT
+        )
+        subject, _, committed_at = result.stdout.strip().partition('\0')
+        return (subject, int(committed_at)) if subject else (None, None)
+    except (OSError, subprocess.TimeoutExpired, ValueError):
+        return None, None
+
+
+def time_ago(timestamp, now=None):
+    """'5 minutes ago', like git's relative dates"""
+    if timestamp is None:
+        return 'at an unknown hour'
+    seconds = max(0, int((now or time.time()) - timestamp))
+    for unit, size in (('year', 365 * 86400), ('month', 30 * 86400), ('week', 7 * 86400),
+                       ('day', 86400), ('hour', 3600), ('minute', 60)):
+        if seconds >= size * (2 if unit in ('month', 'week') else 1):
+            amount = seconds // size
+            return f"{amount} {unit}{'s' if amount != 1 else ''} ago"
+    return f"{seconds} second{'s' if seconds != 1 else ''} ago"
+
+
+def collect(repo_path, extra=None):
+    """Status, last commit and remote at once; ``extra`` is another callable run alongside
+
+    Returns (WorkTreeStatus or None, (subject, committed_at), remote url, extra result).
+    """
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        status = pool.submit(read_status, repo_path)
+        commit = pool.submit(read_last_commit, repo_path)
+        other = pool.submit(extra) if extra else None
+        status = status.result()
+        remote = read_remote_url(repo_path, status.upstream if status else None)
+        return status, commit.result(), remote, other.result() if other else None
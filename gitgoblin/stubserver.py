@@ -0,0 +1,199 @@
+"""
+GitGoblin Stub Server - A pretend AI realm for offline runs and load tests
+
+Speaks just enough of the OpenAI chat completions API for GitGoblin:
+
+    python -m gitgoblin.stubserver --port 8765 --latency 0.2 --error-rate 0.1
+
+then point the goblin at it with ``ai_backend: "local"`` in
+.git/gitgoblin.config.json.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Answer chat completions with canned inscriptions"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.stub.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        stub = self.server.stub
+        if self.path.rstrip('/').endswith('/models'):
+            self._reply(200, {'object': 'list', 'data': [{'id': stub.model, 'object': 'model'}]})
+        else:
+            self._reply(404, {'error': {'message': 'not found'}})
+
+    def do_POST(self):
+        stub = self.server.stub
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._reply(404, {'error': {'message': 'not found'}})
+            return
+
+        fault = stub.next_fault()
+        stub.sleep()
+        if fault == 'rate_limit':
+            self._reply(429, {'error': {'message': 'rate limited'}}, {
+                'retry-after': str(stub.retry_after),
+                'x-ratelimit-remaining-requests': '0',
+                'x-ratelimit-reset-requests': f"{stub.retry_after}s",
+            })
+            return
+        if fault == 'error':
+            self._reply(500, {'error': {'message': 'injected failure'}})
+            return
+
+        try:
+            prompt = json.loads(body)['messages'][-1]['content']
+        except (ValueError, KeyError, IndexError, TypeError):
+            self._reply(400, {'error': {'message': 'bad request'}})
+            return
+        self._reply(200, {
+            'id': f"stub-{stub.requests}",
+            'object': 'chat.completion',
+            'model': stub.model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': stub.inscription(prompt)},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': 12},
+        })
+
+
+class StubAIServer:
+    """An OpenAI-compatible server with configurable latency and fault injection
+
+    ``latency`` seconds (plus up to ``jitter`` more) are spent on every
+    completion. ``error_rate`` is the share of requests answered with HTTP
+    500, ``rate_limit_rate`` the share answered with 429 and a retry-after
+    of ``retry_after`` seconds. Run it in-process with ``start``/``stop``
+    or from the command line.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8765, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, retry_after=1, model='goblin-stub', seed=None, verbose=False):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.model = model
+        self.verbose = verbose
+        self.requests = 0
+        self.faults = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}/v1"
+
+    def next_fault(self):
+        """Count a request and decide whether it fails: None, 'error' or 'rate_limit'"""
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+            if roll < self.error_rate:
+                self.faults += 1
+                return 'error'
+            if roll < self.error_rate + self.rate_limit_rate:
+                self.faults += 1
+                return 'rate_limit'
+            return None
+
+    def sleep(self):
+        """Pretend to think"""
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    @staticmethod
+    def inscription(prompt):
+        """A plausible conventional commit message for a prompt"""
+        files = re.findall(r'^diff --git a/\S+ b/(\S+)$', prompt, re.MULTILINE)
+        if not files:
+            files = re.findall(r'^(?:File modified: |- )(\S+)$', prompt, re.MULTILINE)
+        if not files:
+            return "chore: update files"
+        name = files[0].rsplit('/', 1)[-1]
+        more = f" and {len(files) - 1} more" if len(files) > 1 else ''
+        return f"chore: update {name}{more}"
+
+    def start(self):
+        """Serve in a background thread; returns self (port 0 picks a free port)"""
+        self._server = ThreadingHTTPServer((self.host, self.port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='goblin-stub-ai', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def serve_forever(self):
+        """Serve in the foreground until interrupted"""
+        self.start()
+        print(f"🧪 Stub AI realm listening on {self.base_url} (latency {self.latency}s, "
+              f"errors {self.error_rate:.0%}, rate limits {self.rate_limit_rate:.0%})")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='OpenAI-compatible stub server for GitGoblin')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds spent per completion')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random latency, up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests failing with HTTP 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='share of requests answered with 429')
+    parser.add_argument('--retry-after', type=float, default=1, help='retry-after seconds sent with 429s')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+    StubAIServer(
+        args.host, args.port, args.latency, args.jitter, args.error_rate,
+        args.rate_limit_rate, args.retry_after, seed=args.seed, verbose=args.verbose
+    ).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
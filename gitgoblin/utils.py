@@ -2,9 +2,11 @@
 GitGoblin Utilities - Status, formatting, and helpers
 """
 
-import subprocess
+import contextlib
+import io
+import sys
+import time
 from pathlib import Path
-from datetime import datetime
 import click
 from .config import GoblinConfig
 
@@ -44,6 +46,29 @@ def print_warning(message):
     click.echo(click.style(f"⚠️  [OMEN] {message}", fg='yellow'))
 
 
+def _format_seconds(seconds):
+    """Short human duration for latency tables"""
+    if seconds is None:
+        return '-'
+    if seconds < 1:
+        return f"{seconds * 1000:.0f}ms"
+    return f"{seconds:.2f}s"
+
+
+def _format_uptime(seconds):
+    """Short human uptime, e.g. '3h 12m'"""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    if minutes:
+        return f"{minutes}m {seconds}s"
+    return f"{seconds}s"
+
+
 class GoblinStatus:
     """Display GitGoblin status and activity"""
     
@@ -51,9 +76,22 @@ class GoblinStatus:
         self.repo_path = Path(repo_path).resolve()
         self.pid_file = self.repo_path / '.git' / 'gitgoblin.pid'
         self.config = GoblinConfig(repo_path)
+        self._daemon = None
+    
+    def daemon_status(self):
+        """What a running goblin says about itself over its socket, or None"""
+        from . import control
+        
+        if self._daemon is None:
+            self._daemon = control.request(self.repo_path, 'status') or {}
+        return self._daemon if self._daemon.get('ok') else None
     
     def is_active(self):
         """Check if GitGoblin is currently running"""
+        if self.daemon_status():
+            return True
+        
+        # Goblins without a socket only leave their pid behind
         if not self.pid_file.exists():
             return False
         
@@ -70,76 +108,70 @@ class GoblinStatus:
     
     def get_last_commit(self):
         """Get the last commit information"""
-        try:
-            result = subprocess.run(
-                ['git', 'log', '-1', '--pretty=format:%s|||%ar'],
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            if result.stdout:
-                message, time_ago = result.stdout.split('|||')
-                return message, time_ago
-            return None, None
-            
-        except:
+        from . import repostate
+        
+        message, committed_at = repostate.read_last_commit(self.repo_path)
+        if not message:
             return None, None
+        return message, repostate.time_ago(committed_at)
     
     def get_remote_status(self):
         """Check remote repository status"""
-        try:
-            result = subprocess.run(
-                ['git', 'remote', '-v'],
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            if result.stdout:
-                for line in result.stdout.split('\n'):
-                    if 'push' in line:
-                        parts = line.split()
-                        if len(parts) >= 2:
-                            return parts[1]
-            return None
-        except:
-            return None
+        from . import repostate
+        
+        return repostate.read_remote_url(self.repo_path)
     
     def get_branch(self):
         """Get current branch"""
-        try:
-            result = subprocess.run(
-                ['git', 'branch', '--show-current'],
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            return result.stdout.strip() or 'unknown'
-        except:
-            return 'unknown'
+        from . import repostate
+        
+        status = repostate.read_status(self.repo_path)
+        return (status and status.branch) or 'unknown'
     
     def get_uncommitted_changes(self):
         """Count uncommitted changes"""
-        try:
-            result = subprocess.run(
-                ['git', 'status', '--porcelain'],
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            lines = [l for l in result.stdout.split('\n') if l.strip()]
-            return len(lines)
-        except:
-            return 0
+        from . import repostate
+        
+        status = repostate.read_status(self.repo_path)
+        return status.entries if status else 0
+    
+    def display_latency(self):
+        """Print the per-stage latency table from the metrics snapshot; False if there is none"""
+        from . import control
+        from .metrics import STAGES, load_metrics, quantile
+        
+        snapshot = None
+        if self.daemon_status():
+            # A running goblin flushes what it has not written yet first
+            snapshot = (control.request(self.repo_path, 'metrics') or {}).get('metrics')
+        snapshot = snapshot or load_metrics(self.repo_path)
+        if not snapshot or not snapshot.get('stages'):
+            return False
+        
+        click.echo(click.style("⏱️  THE GOBLIN'S PACE (Stage Latency):", fg='cyan', bold=True))
+        click.echo(f"   {'Stage':<10}{'Runs':>7}{'Errors':>8}{'p50':>10}{'p99':>10}{'Max':>10}")
+        stages = snapshot['stages']
+        names = [name for name in STAGES if name in stages] + sorted(set(stages) - set(STAGES))
+        for name in names:
+            histogram = stages[name]
+            cells = [quantile(histogram, 0.5), quantile(histogram, 0.99), histogram['max']]
+            cells = [_format_seconds(value) for value in cells]
+            errors = snapshot.get('errors', {}).get(name, 0)
+            click.echo(f"   {name:<10}{histogram['count']:>7}{errors:>8}{cells[0]:>10}{cells[1]:>10}{cells[2]:>10}")
+        counters = snapshot.get('counters', {})
+        if counters:
+            click.echo("   " + ", ".join(f"{name.replace('_', ' ')}: {value}" for name, value in sorted(counters.items())))
+        return True
     
     def display(self):
         """Display complete status"""
+        from . import repostate
+        from .msgcache import MessageCache
+        
+        # Git status, the last commit and the goblin's own answer, all at once
+        self._daemon = None
+        status, (last_message, committed_at), remote, _ = repostate.collect(self.repo_path, self.daemon_status)
+        
         click.echo("📜 " + "=" * 57)
         click.echo(click.style("👺 THE GOBLIN'S CHRONICLE (Status Report)", fg='green', bold=True))
         click.echo("📜 " + "=" * 57)
@@ -147,12 +179,20 @@ class GoblinStatus:
         
         # Active status
         is_active = self.is_active()
-        if is_active:
+        daemon = self.daemon_status()
+        if daemon and daemon.get('paused'):
+            click.echo(click.style("🟡 SPIRIT STATUS: AWAKENED BUT SLUMBERING (Paused)", fg='yellow', bold=True))
+            click.echo("   The goblin is still watching, but hoards nothing. Use 'gitgoblin whisper resume'.")
+        elif is_active:
             click.echo(click.style("🟢 SPIRIT STATUS: AWAKENED & HUNGRY", fg='green', bold=True))
             click.echo("   The goblin is lurking in the shadows, hoarding your edits.")
         else:
             click.echo(click.style("🔴 SPIRIT STATUS: BANISHED TO THE VOID", fg='red', bold=True))
             click.echo("   The dungeon is quiet. Use 'gitgoblin summon' to wake the beast.")
+        if daemon:
+            click.echo(f"   Spirit PID: {daemon['pid']}, awake for {_format_uptime(daemon['uptime'])}")
+            click.echo(f"   Debouncing: {daemon['pending_changes']} change(s), "
+                       f"awaiting the abyss: {daemon['pending_pushes']} commit(s)")
         
         click.echo()
         click.echo("⚔️ " + "-" * 58)
@@ -161,9 +201,15 @@ class GoblinStatus:
         # Repository info
         click.echo(click.style("🏰 CURRENT DUNGEON (Repository):", fg='cyan', bold=True))
         click.echo(f"   Realm Path: {self.repo_path}")
-        click.echo(f"   Guild Branch: {self.get_branch()}")
+        click.echo(f"   Guild Branch: {(status and status.branch) or 'unknown'}")
+        if status and status.upstream:
+            drift = []
+            if status.ahead:
+                drift.append(f"{status.ahead} ahead")
+            if status.behind:
+                drift.append(f"{status.behind} behind")
+            click.echo(f"   Sworn to: {status.upstream} ({', '.join(drift) or 'in step'})")
         
-        remote = self.get_remote_status()
         if remote:
             click.echo(f"   Magic Portal (Remote): {remote}")
         
@@ -174,35 +220,49 @@ class GoblinStatus:
         ai_enabled = self.config.is_ai_enabled()
         api_key = self.config.get_api_key()
         
-        if api_key:
-            masked_key = api_key[:8] + "..." + api_key[-4:] if len(api_key) > 12 else "***"
-            click.echo(f"   Secret Key: {masked_key}")
+        if api_key or not self.config.needs_api_key():
+            click.echo(f"   AI Realm: {self.config.get_config('ai_backend')}")
+            if api_key:
+                masked_key = api_key[:8] + "..." + api_key[-4:] if len(api_key) > 12 else "***"
+                click.echo(f"   Secret Key: {masked_key}")
+            else:
+                click.echo("   Secret Key: Not needed by this realm")
             click.echo(f"   AI Voice: {'✅ Awakened' if ai_enabled else '❌ Silenced'}")
+            cache = MessageCache(self.repo_path).stats()
+            if cache['hits'] or cache['misses']:
+                click.echo(f"   Memory Hoard: {cache['hits']} hit(s), {cache['misses']} miss(es), "
+                           f"{cache['entries']} inscription(s) remembered")
         else:
             click.echo("   Secret Key: None. The goblin is currently witless.")
         
         click.echo()
         
         # Last commit
-        last_message, time_ago = self.get_last_commit()
         if last_message:
             click.echo(click.style("💎 LATEST HOARDED TREASURE (Last Commit):", fg='cyan', bold=True))
             click.echo(f"   Inscription: {last_message}")
-            click.echo(f"   Discovery: {time_ago}")
+            click.echo(f"   Discovery: {repostate.time_ago(committed_at)}")
         else:
             click.echo(click.style("💎 TREASURES: None found. The vault is empty!", fg='yellow'))
         
         click.echo()
         
         # Uncommitted changes
-        changes = self.get_uncommitted_changes()
+        changes = status.entries if status else 0
         if changes > 0:
             click.echo(click.style(f"⚠️  LOOSE SHARDS: {changes} uncommitted file(s)", fg='yellow', bold=True))
+            kinds = [(status.staged, 'staged'), (status.unstaged, 'unstaged'),
+                     (status.untracked, 'untracked'), (status.conflicted, 'conflicted')]
+            click.echo("   " + ", ".join(f"{count} {name}" for count, name in kinds if count))
             click.echo("   💡 Tip: Use 'gitgoblin sneak' to snatch them now!")
         else:
             click.echo(click.style("✅ THE DUNGEON IS TIDY: Working Tree Clean", fg='green'))
         
         click.echo()
+        
+        # Where the time goes
+        if self.display_latency():
+            click.echo()
         click.echo("📜 " + "=" * 57)
         click.echo()
         
@@ -214,3 +274,24 @@ class GoblinStatus:
         
         print_info("The stealthy snatch: gitgoblin sneak")
         click.echo()
+    
+    def watch(self, interval=2.0):
+        """Redraw the status in place every interval seconds until Ctrl+C"""
+        color = sys.stdout.isatty()
+        previous = None
+        sys.stdout.write('\033[2J')
+        try:
+            while True:
+                # Render off-screen, then repaint in one write so nothing flickers
+                frame = io.StringIO()
+                with click.Context(click.Command('crystalball'), color=color), contextlib.redirect_stdout(frame):
+                    self.display()
+                    click.echo(f"🔄 Refreshing every {interval:g}s, Ctrl+C to stop")
+                frame = frame.getvalue()
+                if frame != previous:
+                    sys.stdout.write('\033[H' + frame.replace('\n', '\033[K\n') + '\033[J')
+                    sys.stdout.flush()
+                    previous = frame
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            click.echo()
@@ -0,0 +1,234 @@
+"""
+GitGoblin Watch Tree - Keeps the goblin's eyes off ignored directories
+"""
+
+import os
+import sys
+import threading
+import time
+
+from watchdog.events import FileCreatedEvent
+
+
+def make_observer():
+    """The observer the goblin (or the hive) watches with
+
+    On Linux that is GoblinObserver, which keeps every repository inside a
+    single inotify instance; elsewhere watchdog's platform observer.
+    """
+    if sys.platform.startswith('linux'):
+        from watchdog.utils import UnsupportedLibcError
+        try:
+            from .inotify import GoblinObserver
+        except (ImportError, UnsupportedLibcError):
+            pass
+        else:
+            return GoblinObserver()
+    from watchdog.observers import Observer
+    return Observer()
+
+
+class _DirNode:
+    """A scanned directory: whether its subtree holds no ignored directory"""
+
+    __slots__ = ('relative_path', 'clean', 'children')
+
+    def __init__(self, relative_path, clean, children):
+        self.relative_path = relative_path
+        self.clean = clean
+        self.children = children
+
+
+class GoblinWatchTree:
+    """Place observer watches only on directories git does not ignore
+
+    With a GoblinObserver (Linux), the repository root is scheduled once
+    and every directory git does not ignore is added to that one inotify
+    instance, so a repository costs one instance however it is laid out.
+    With other observers a recursive watch covers every subtree that
+    contains no ignored directory, and directories on the way down to an
+    ignored one get a non-recursive watch each. Either way node_modules,
+    build outputs, virtualenvs and .git never receive a single watch.
+    """
+
+    def __init__(self, observer, handler, repo_path, ignore):
+        self.observer = observer
+        self.handler = handler
+        self.repo_path = repo_path
+        self.ignore = ignore
+
+        # relative path ('' is the root) -> (ObservedWatch, recursive)
+        self.watches = {}
+        # The root watch and its emitter, when directories share one instance
+        self._root = None
+        self._emitter = None
+        # Ignored directories left without a watch
+        self.pruned = set()
+        self.directories = 0
+        self._lock = threading.RLock()
+
+    def _abs(self, relative_path):
+        """Absolute path string for a repo-relative directory"""
+        return str(self.repo_path / relative_path) if relative_path else str(self.repo_path)
+
+    def _scan(self, relative_path):
+        """Walk a directory, pruning ignored children, and count what is left"""
+        children = []
+        clean = True
+        try:
+            with os.scandir(self._abs(relative_path)) as entries:
+                for entry in entries:
+                    try:
+                        if not entry.is_dir(follow_symlinks=False):
+                            continue
+                    except OSError:
+                        continue
+                    child = f"{relative_path}/{entry.name}" if relative_path else entry.name
+                    if self.ignore.is_ignored(child, is_dir=True):
+                        self.pruned.add(child)
+                        clean = False
+                        continue
+                    node = self._scan(child)
+                    clean = clean and node.clean
+                    children.append(node)
+        except OSError:
+            pass
+        self.directories += 1
+        return _DirNode(relative_path, clean, children)
+
+    def _schedule(self, node, catch_up=False):
+        """Watch a scanned subtree with as few observer watches as possible"""
+        if self._emitter is not None:
+            if self._emitter.add_directory(self._abs(node.relative_path)):
+                self.watches[node.relative_path] = (self._root, False)
+                if catch_up:
+                    self._catch_up(node)
+                for child in node.children:
+                    self._schedule(child, catch_up)
+            return
+        try:
+            watch = self.observer.schedule(self.handler, self._abs(node.relative_path), recursive=node.clean)
+        except OSError as e:
+            print(f"⚠️  The goblin cannot watch {node.relative_path or '.'}: {e}")
+            return
+        self.watches[node.relative_path] = (watch, node.clean)
+        if not node.clean:
+            for child in node.children:
+                self._schedule(child)
+
+    def _catch_up(self, node):
+        """Pick up what appeared in a new directory between its scan and its watch
+
+        Nothing reports those entries otherwise: files are announced as
+        created and directories missed by the scan join the subtree.
+        """
+        known = {child.relative_path for child in node.children}
+        try:
+            with os.scandir(self._abs(node.relative_path)) as entries:
+                entries = list(entries)
+        except OSError:
+            return
+        for entry in entries:
+            child = f"{node.relative_path}/{entry.name}" if node.relative_path else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if not is_dir:
+                self._emitter.queue_event(FileCreatedEvent(entry.path))
+            elif child not in known:
+                if self.ignore.is_ignored(child, is_dir=True):
+                    self.pruned.add(child)
+                else:
+                    node.children.append(self._scan(child))
+
+    def _unschedule(self, relative_path):
+        """Drop every watch at or below a directory"""
+        prefix = relative_path + '/' if relative_path else ''
+        for watched in [p for p in self.watches if p == relative_path or p.startswith(prefix)]:
+            watch, _ = self.watches.pop(watched)
+            if self._emitter is not None:
+                # The root watch holds the instance open until close()
+                if watched:
+                    self._emitter.remove_directory(self._abs(watched))
+                continue
+            try:
+                self.observer.unschedule(watch)
+            except (KeyError, OSError):
+                pass
+
+    def _watch_subtree(self, relative_path, catch_up=False):
+        """Scan and watch one directory subtree"""
+        self._schedule(self._scan(relative_path), catch_up)
+
+    def start(self):
+        """Place the initial watches, returning (directories, watches, seconds)"""
+        started = time.monotonic()
+        with self._lock:
+            self.directories = 0
+            self.pruned = set()
+            if hasattr(self.observer, 'emitter_for'):
+                self._root = self.observer.schedule(self.handler, self._abs(''), recursive=False)
+                self._emitter = self.observer.emitter_for(self._root)
+            self._watch_subtree('')
+            return self.directories, len(self.watches), time.monotonic() - started
+
+    def replan(self):
+        """Rebuild every watch, e.g. after an ignore file changed"""
+        with self._lock:
+            self._unschedule('')
+            self.directories = 0
+            self.pruned = set()
+            self._watch_subtree('')
+
+    def unwatched(self):
+        """Ignored directories that have no watch, sorted"""
+        with self._lock:
+            return sorted(self.pruned)
+
+    def close(self):
+        """Drop every watch"""
+        with self._lock:
+            self._unschedule('')
+            root, self._root, self._emitter = self._root, None, None
+            if root is not None:
+                try:
+                    self.observer.unschedule(root)
+                except (KeyError, OSError):
+                    pass
+
+    def _covering(self, relative_path):
+        """Nearest watched ancestor of a path, as (path, recursive) or (None, None)"""
+        parent = relative_path
+        while parent:
+            parent = parent.rsplit('/', 1)[0] if '/' in parent else ''
+            if parent in self.watches:
+                return parent, self.watches[parent][1]
+        return None, None
+
+    def directory_created(self, relative_path):
+        """A directory appeared (or was moved in)"""
+        with self._lock:
+            ignored = self.ignore.is_ignored(relative_path, is_dir=True)
+            ancestor, recursive = self._covering(relative_path)
+            if ancestor is None:
+                return
+            if ignored:
+                self.pruned.add(relative_path)
+            if recursive:
+                # A recursive watch would follow the new ignored directory in:
+                # split the covering watch so it is pruned again
+                if ignored:
+                    self._unschedule(ancestor)
+                    self._watch_subtree(ancestor)
+                return
+            parent = relative_path.rsplit('/', 1)[0] if '/' in relative_path else ''
+            if not ignored and ancestor == parent:
+                self._watch_subtree(relative_path, catch_up=True)
+
+    def directory_removed(self, relative_path):
+        """A directory disappeared (or was moved out)"""
+        with self._lock:
+            self._unschedule(relative_path)
+            prefix = relative_path + '/'
+            self.pruned = {p for p in self.pruned if p != relative_path and not p.startswith(prefix)}
@@ -0,0 +1,33 @@
+import subprocess
+
+import pytest
+
+
+def git(repo, *args, check=True):
+    """Run git in a test repository and return its stdout"""
+    result = subprocess.run(['git'] + list(args), cwd=repo, capture_output=True, text=True, check=check)
+    return result.stdout
+
+
+def porcelain(repo):
+    """git status --porcelain as a set of (XY code, path)"""
+    out = git(repo, 'status', '--porcelain', '-z', '--untracked-files=all')
+    return {(record[:2], record[3:]) for record in out.split('\0') if record}
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A fresh repository with one commit of a few nested files"""
+    path = tmp_path / 'dungeon'
+    path.mkdir()
+    git(path, 'init', '-q')
+    git(path, 'config', 'user.email', 'goblin@example.com')
+    git(path, 'config', 'user.name', 'Goblin')
+    git(path, 'config', 'commit.gpgsign', 'false')
+    (path / 'd' / 'sub').mkdir(parents=True)
+    (path / 'd' / 'a.txt').write_text('a\n')
+    (path / 'd' / 'sub' / 'b.txt').write_text('b\n')
+    (path / 'c.txt').write_text('c\n')
+    git(path, 'add', '-A')
+    git(path, 'commit', '-q', '-m', 'init')
+    return path
@@ -0,0 +1,53 @@
+from gitgoblin.ai_commit import AICommitGenerator
+from gitgoblin.backends import make_backend
+from gitgoblin.stubserver import StubAIServer
+
+
+def test_connection_stats_count_the_pooled_keep_alive_connection(repo):
+    stub = StubAIServer(port=0).start()
+    generator = AICommitGenerator(
+        None, repo_path=repo, backend=make_backend('local', base_url=stub.base_url, model='goblin-stub'),
+        requests_per_minute=600, min_confidence=None
+    )
+    try:
+        assert generator.connection_stats() == {'requests': 0, 'connections': 0, 'reused': 0}
+        for _ in range(5):
+            assert generator._call_groq_api('diff --git a/c.txt b/c.txt\n')
+        stats = generator.connection_stats()
+        assert stats['requests'] == 5
+        assert stats['connections'] == 1
+        assert stats['reused'] == 4
+    finally:
+        generator.close()
+        stub.stop()
+
+
+def test_hung_git_diff_is_killed_at_the_deadline(repo):
+    import time
+
+    generator = AICommitGenerator(None, repo_path=repo, backend=make_backend('local'), diff_timeout=0.3)
+    started = time.monotonic()
+    diff = generator._stream_diff(['sh', '-c', 'echo "diff --git a/x b/x"; exec sleep 30'])
+    assert time.monotonic() - started < 5
+    assert diff == 'diff --git a/x b/x\n'
+
+
+def test_diff_stops_at_the_byte_budget(repo):
+    (repo / 'c.txt').write_text(''.join(f'line {i}\n' for i in range(100000)))
+    generator = AICommitGenerator(None, repo_path=repo, backend=make_backend('local'), diff_max_bytes=8192)
+    diff = generator.get_git_diff('c.txt')
+    assert diff.startswith('diff --git a/c.txt b/c.txt')
+    assert len(diff) < 8192 + 4096
+
+
+def test_untracked_file_content_is_in_the_diff(repo):
+    (repo / 'new.py').write_text('def hello():\n    return "goblin"\n')
+    generator = AICommitGenerator(None, repo_path=repo, backend=make_backend('local'))
+    diff = generator.get_git_diff('new.py')
+    assert 'new file mode' in diff
+    assert '+def hello():' in diff
+
+    (repo / 'c.txt').write_text('changed\n')
+    diff = generator.get_git_diff(['c.txt', 'new.py'])
+    assert 'diff --git a/c.txt b/c.txt' in diff
+    assert '+    return "goblin"' in diff
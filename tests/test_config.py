@@ -0,0 +1,88 @@
+import json
+import os
+import threading
+
+from gitgoblin.ai_commit import AIMessagePool
+from gitgoblin.config import GoblinConfig
+
+
+def rewrite(config, **values):
+    """Replace the config file the way another process would"""
+    data = dict(config.get_all_config(), **values)
+    tmp = config.config_file.with_suffix('.tmp')
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, config.config_file)
+
+
+def test_listeners_only_hear_changes_on_refresh(repo):
+    config = GoblinConfig(repo)
+    config.set_config('debounce_seconds', 2)
+    config.refresh()
+    heard = []
+    config.add_listener(lambda old, new: heard.append((old, new, threading.current_thread())))
+
+    rewrite(config, debounce_seconds=3)
+    assert config.get_config('debounce_seconds') == 3
+    rewrite(config, debounce_seconds=4)
+    assert config.get_config('debounce_seconds') == 4
+    assert heard == []
+
+    config.refresh()
+    assert len(heard) == 1
+    old, new, thread = heard[0]
+    assert (old['debounce_seconds'], new['debounce_seconds']) == (2, 4)
+    assert thread is threading.current_thread()
+
+    config.refresh()
+    assert len(heard) == 1
+
+    # Writes from this process are heard the same way
+    config.set_config('debounce_seconds', 5)
+    assert len(heard) == 1
+    config.refresh()
+    assert heard[1][1]['debounce_seconds'] == 5
+
+
+def test_null_min_confidence_means_always_ask(repo):
+    config = GoblinConfig(repo)
+    config.set_config('heuristic_min_confidence', None)
+    assert config.get_ai_http_settings()['min_confidence'] is None
+
+
+class SlowGenerator:
+    def __init__(self):
+        self.release = threading.Event()
+        self.closed = threading.Event()
+
+    def generate_commit_message(self, file_path):
+        self.release.wait(5)
+        return f"update {file_path}"
+
+    def close(self):
+        self.closed.set()
+
+
+def test_retired_generator_closes_after_its_requests():
+    old = SlowGenerator()
+    pool = AIMessagePool(old, workers=2)
+    try:
+        future = pool.submit('a.txt')
+        pool.generator = SlowGenerator()
+        pool.retire(old)
+        assert not old.closed.is_set()
+
+        old.release.set()
+        assert future.result(5) == 'update a.txt'
+        assert old.closed.wait(5)
+    finally:
+        pool.shutdown()
+
+
+def test_idle_generator_retires_at_once():
+    old = SlowGenerator()
+    pool = AIMessagePool(old, workers=1)
+    try:
+        pool.retire(old)
+        assert old.closed.is_set()
+    finally:
+        pool.shutdown()
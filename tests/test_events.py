@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from gitgoblin.events import ChangeCoalescer
+
+from conftest import porcelain
+
+
+def kinds(coalescer):
+    return {path: record.kind for path, record in coalescer.changes.items()}
+
+
+@pytest.mark.parametrize('events, expected', [
+    ([('created', 'new.txt')], {'new.txt': 'added'}),
+    ([('created', 'new.txt'), ('modified', 'new.txt')], {'new.txt': 'added'}),
+    ([('created', 'tmp.txt'), ('deleted', 'tmp.txt')], {}),
+    ([('modified', 'c.txt'), ('modified', 'c.txt')], {'c.txt': 'modified'}),
+    ([('deleted', 'c.txt')], {'c.txt': 'deleted'}),
+    ([('deleted', 'c.txt'), ('created', 'c.txt')], {'c.txt': 'modified'}),
+    ([('modified', 'c.txt'), ('deleted', 'c.txt')], {'c.txt': 'deleted'}),
+    ([('moved', 'c.txt', 'e.txt')], {'c.txt': 'deleted', 'e.txt': 'modified'}),
+    ([('created', 'a'), ('moved', 'a', 'b')], {'b': 'modified'}),
+    ([('moved', 'c.txt', None)], {'c.txt': 'deleted'}),
+    ([('moved', None, 'e.txt')], {'e.txt': 'modified'}),
+])
+def test_sequences(events, expected):
+    coalescer = ChangeCoalescer()
+    for name, *args in events:
+        getattr(coalescer, name)(*args)
+    assert kinds(coalescer) == expected
+
+
+def test_deleted_directory_covers_its_subtree():
+    coalescer = ChangeCoalescer()
+    coalescer.modified('d/a.txt')
+    coalescer.created('d/sub/new.txt')
+    assert coalescer.deleted('d', is_dir=True) == ['d']
+    assert kinds(coalescer) == {'d': 'deleted'}
+    assert coalescer.changes['d'].is_dir
+
+
+def test_moved_directory_covers_both_subtrees():
+    coalescer = ChangeCoalescer()
+    coalescer.modified('d/a.txt')
+    coalescer.modified('e/old.txt')
+    assert coalescer.moved('d', 'e', is_dir=True) == ['d', 'e']
+    assert kinds(coalescer) == {'d': 'deleted', 'e': 'modified'}
+
+
+def test_live_paths_and_pop():
+    coalescer = ChangeCoalescer()
+    assert coalescer.created('x', now=1.0) == ['x']
+    assert coalescer.deleted('x', now=2.0) == []
+    coalescer.modified('c.txt', now=3.0)
+    record = coalescer.pop('c.txt')
+    assert record.kind == 'modified' and record.changed_at == 3.0
+    assert coalescer.pop('c.txt') is None
+
+
+def test_editor_save_dance_matches_git(repo):
+    # Write a temp file, then rename it over the original, as many editors do
+    coalescer = ChangeCoalescer()
+    (repo / '.c.txt.swp').write_text('c, edited\n')
+    coalescer.created('.c.txt.swp')
+    os.replace(repo / '.c.txt.swp', repo / 'c.txt')
+    coalescer.moved('.c.txt.swp', 'c.txt')
+
+    assert kinds(coalescer) == {'c.txt': 'modified'}
+    assert porcelain(repo) == {(' M', 'c.txt')}
+
+
+def test_recreated_file_matches_git(repo):
+    coalescer = ChangeCoalescer()
+    (repo / 'c.txt').unlink()
+    coalescer.deleted('c.txt')
+    (repo / 'c.txt').write_text('c\n')
+    coalescer.created('c.txt')
+    (repo / 'brief.txt').write_text('gone soon\n')
+    coalescer.created('brief.txt')
+    (repo / 'brief.txt').unlink()
+    coalescer.deleted('brief.txt')
+
+    # Net: c.txt is the same content again and brief.txt never existed
+    assert kinds(coalescer) == {'c.txt': 'modified'}
+    assert porcelain(repo) == set()
@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+
+import pytest
+
+from gitgoblin import fsmonitor
+from gitgoblin.control import GoblinControl
+from gitgoblin.fsmonitor import ASLEEP_TOKEN, GoblinFsmonitor
+
+from conftest import git, porcelain
+
+
+def test_changes_since_a_token():
+    monitor = GoblinFsmonitor()
+    start = monitor.token()
+    monitor.touched('a.txt')
+    monitor.touched('d', is_dir=True)
+    middle = monitor.token()
+    monitor.touched('b.txt')
+    monitor.touched('a.txt')
+
+    token, paths = monitor.changed_since(start)
+    assert token == monitor.token()
+    assert sorted(paths) == ['a.txt', 'b.txt', 'd/']
+    assert sorted(monitor.changed_since(middle)[1]) == ['a.txt', 'b.txt']
+    assert monitor.changed_since(token)[1] == []
+
+
+def test_git_dir_and_root_are_never_reported():
+    monitor = GoblinFsmonitor()
+    start = monitor.token()
+    for path in ('.git', '.git/index', '.', ''):
+        monitor.touched(path)
+    assert monitor.changed_since(start) == (start, [])
+
+
+def test_tokens_from_other_sessions_ask_for_a_full_scan():
+    monitor = GoblinFsmonitor()
+    monitor.touched('a.txt')
+    old = monitor.token()
+    for token in (ASLEEP_TOKEN, '', 'gitgoblin:other:1', old[:-1] + 'x', old[:-1] + '99'):
+        assert monitor.changed_since(token)[1] is None
+
+    monitor.forget()
+    assert monitor.changed_since(old)[1] is None
+    assert monitor.full_scans == 6
+
+
+def test_tokens_older_than_the_evicted_paths_ask_for_a_full_scan():
+    monitor = GoblinFsmonitor(max_paths=2)
+    start = monitor.token()
+    monitor.touched('a.txt')
+    after_a = monitor.token()
+    monitor.touched('b.txt')
+    monitor.touched('c.txt')
+
+    # a.txt was dropped, so only tokens taken after it are still exact
+    assert monitor.changed_since(start)[1] is None
+    assert sorted(monitor.changed_since(after_a)[1]) == ['b.txt', 'c.txt']
+
+
+def test_unwatched_directories_are_always_reported():
+    monitor = GoblinFsmonitor()
+    monitor.watch_tree = SimpleNamespace(unwatched=lambda: ['.git', 'node_modules'])
+    assert monitor.changed_since(monitor.token())[1] == ['node_modules/']
+
+
+def test_install_and_uninstall(repo):
+    assert not fsmonitor.is_installed(repo)
+    assert fsmonitor.install(repo)
+    assert fsmonitor.is_installed(repo)
+    assert git(repo, 'config', 'core.fsmonitorHookVersion').strip() == '2'
+    assert fsmonitor.hook_path(repo).exists()
+
+    assert fsmonitor.uninstall(repo)
+    assert not fsmonitor.is_installed(repo)
+    assert not fsmonitor.hook_path(repo).exists()
+    assert git(repo, 'config', 'core.fsmonitor', check=False) == ''
+
+
+def test_uninstall_leaves_a_foreign_fsmonitor_alone(repo):
+    git(repo, 'config', 'core.fsmonitor', 'true')
+    assert not fsmonitor.uninstall(repo)
+    assert git(repo, 'config', 'core.fsmonitor').strip() == 'true'
+
+
+def test_git_status_without_a_goblin_scans_everything(repo):
+    fsmonitor.install(repo)
+    (repo / 'c.txt').write_text('changed\n')
+    (repo / 'new.txt').write_text('new\n')
+    assert porcelain(repo) == {(' M', 'c.txt'), ('??', 'new.txt')}
+
+
+def test_git_status_asks_the_goblin(repo):
+    fsmonitor.install(repo)
+    monitor = GoblinFsmonitor()
+    control = GoblinControl(SimpleNamespace(repo_path=repo, fsmonitor=monitor))
+    if not control.start():
+        pytest.skip('no unix socket here')
+    try:
+        # The first query is from another session, so git scans and stores our token
+        assert porcelain(repo) == set()
+
+        # An edit the goblin reports is seen
+        (repo / 'c.txt').write_text('changed\n')
+        monitor.touched('c.txt')
+        assert porcelain(repo) == {(' M', 'c.txt')}
+
+        # One it never saw is trusted to be unchanged
+        (repo / 'd' / 'a.txt').write_text('unseen\n')
+        assert (' M', 'd/a.txt') not in porcelain(repo)
+        monitor.touched('d/a.txt')
+        assert (' M', 'd/a.txt') in porcelain(repo)
+        assert monitor.queries >= 4
+    finally:
+        control.stop()
@@ -0,0 +1,124 @@
+import shutil
+from types import SimpleNamespace
+
+from gitgoblin.gitsession import GitSession, GitSessionError
+
+from conftest import git, porcelain
+
+
+def commit(repo, paths, message='goblin'):
+    """Commit paths the way the watcher does: plumbing when supported, porcelain otherwise"""
+    session = GitSession(str(repo))
+    try:
+        if session.supports(paths):
+            prepared = session.prepare(paths)
+            if prepared is not None:
+                session.commit(prepared, message)
+            return True
+        git(repo, 'add', '-A', '--', *[p for p in paths if (repo / p).exists()])
+        gone = [p for p in paths if not (repo / p).exists()]
+        if gone:
+            git(repo, 'rm', '-r', '-q', '--cached', '--ignore-unmatch', '--', *gone)
+        git(repo, 'commit', '-q', '-m', message)
+        return False
+    finally:
+        session.close()
+
+
+def test_modified_and_new_files_commit_through_plumbing(repo):
+    (repo / 'c.txt').write_text('changed\n')
+    (repo / 'd' / 'new.txt').write_text('new\n')
+    assert commit(repo, ['c.txt', 'd/new.txt'])
+    assert porcelain(repo) == set()
+    assert git(repo, 'show', 'HEAD:d/new.txt') == 'new\n'
+
+
+def test_deleted_file(repo):
+    (repo / 'c.txt').unlink()
+    assert commit(repo, ['c.txt'])
+    assert porcelain(repo) == set()
+    assert 'c.txt' not in git(repo, 'ls-files')
+
+
+def test_deleted_directory_goes_to_porcelain(repo):
+    shutil.rmtree(repo / 'd')
+    assert not GitSession(str(repo)).supports(['d'])
+    commit(repo, ['d'])
+    assert porcelain(repo) == set()
+    assert git(repo, 'ls-files').split() == ['c.txt']
+
+
+def test_moved_file(repo):
+    (repo / 'c.txt').rename(repo / 'd' / 'moved.txt')
+    assert commit(repo, ['c.txt', 'd/moved.txt'])
+    assert porcelain(repo) == set()
+    assert git(repo, 'show', 'HEAD:d/moved.txt') == 'c\n'
+
+
+def test_moved_directory(repo):
+    (repo / 'd').rename(repo / 'e')
+    commit(repo, ['d', 'e'])
+    assert porcelain(repo) == set()
+    assert sorted(git(repo, 'ls-files').split()) == ['c.txt', 'e/a.txt', 'e/sub/b.txt']
+
+
+def test_unchanged_paths_prepare_nothing(repo):
+    session = GitSession(str(repo))
+    try:
+        assert session.prepare(['c.txt']) is None
+    finally:
+        session.close()
+
+
+def failing(session, *commands):
+    """Make some of the session's one-off git commands fail"""
+    real = session._git
+
+    def _git(args, data=None):
+        if args[0] in commands:
+            raise GitSessionError(f"git {args[0]} failed")
+        return real(args, data)
+    session._git = _git
+
+
+def test_index_sync_failure_after_the_ref_moved_still_commits(repo):
+    (repo / 'c.txt').write_text('changed\n')
+    head = git(repo, 'rev-parse', 'HEAD').strip()
+    session = GitSession(str(repo))
+    try:
+        failing(session, 'update-index', 'reset')
+        sha = session.commit(session.prepare(['c.txt']), 'goblin')
+    finally:
+        session.close()
+    assert git(repo, 'rev-parse', 'HEAD').strip() == sha != head
+    assert porcelain(repo) == set()
+
+
+def test_watcher_pushes_a_commit_whose_index_sync_failed(repo):
+    from gitgoblin.core import GoblinWatcher
+
+    (repo / 'c.txt').write_text('changed\n')
+    watcher = GoblinWatcher(repo, debounce_seconds=0.1)
+    watcher.git_session = GitSession(str(repo))
+    failing(watcher.git_session, 'update-index', 'reset', 'read-tree')
+    pushes = []
+    watcher.pusher = SimpleNamespace(request=lambda: pushes.append(1))
+    try:
+        assert watcher.commit_and_push('c.txt', message='goblin')
+    finally:
+        watcher.git_session.close()
+    assert pushes == [1]
+    assert git(repo, 'log', '--format=%s').splitlines() == ['goblin', 'init']
+    assert git(repo, 'show', 'HEAD:c.txt') == 'changed\n'
+
+
+def test_paths_hash_object_would_misread_go_to_porcelain(repo):
+    session = GitSession(str(repo))
+    try:
+        for name in ('two\nlines.txt', '"quoted".txt'):
+            (repo / name).write_text('odd\n')
+            assert not session.supports([name])
+    finally:
+        session.close()
+    commit(repo, ['two\nlines.txt', '"quoted".txt'])
+    assert porcelain(repo) == set()
@@ -0,0 +1,36 @@
+import pytest
+
+from gitgoblin.ai_commit import AICommitGenerator
+from gitgoblin.backends import make_backend
+from gitgoblin.heuristics import FileChange, changes_from_diff, classify
+
+THRESHOLD = 0.8
+
+
+@pytest.mark.parametrize('path', ['src/app/service.py', 'new.py'])
+def test_new_source_file_is_left_to_the_ai(path):
+    guess = classify(changes_from_diff('', [path]))
+    assert guess.type == 'feat'
+    assert guess.confidence < THRESHOLD
+
+    guess = classify([FileChange(path, 'A', added=40)])
+    assert guess.confidence < THRESHOLD
+
+
+@pytest.mark.parametrize('path, kind', [
+    ('README.md', 'docs'),
+    ('tests/test_service.py', 'test'),
+    ('.github/workflows/ci.yml', 'chore'),
+])
+def test_new_non_code_file_is_still_guessed(path, kind):
+    guess = classify(changes_from_diff('', [path]))
+    assert guess.type == kind
+    assert guess.confidence >= THRESHOLD
+
+
+def test_untracked_file_diff_reads_as_an_add(repo):
+    (repo / 'service.py').write_text('def serve():\n    pass\n')
+    generator = AICommitGenerator(None, repo_path=repo, backend=make_backend('local'))
+    changes = changes_from_diff(generator.get_git_diff('service.py'), ['service.py'])
+    assert [(c.path, c.kind, c.added) for c in changes] == [('service.py', 'A', 2)]
+    assert classify(changes).confidence < THRESHOLD
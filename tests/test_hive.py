@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from gitgoblin.hive import GoblinHive, HiveRegistry
+
+from conftest import git
+from test_watches import inotify_instances, wait_for
+
+
+def make_repo(path, directories=6):
+    path.mkdir()
+    git(path, 'init', '-q')
+    git(path, 'config', 'user.email', 'goblin@example.com')
+    git(path, 'config', 'user.name', 'Goblin')
+    git(path, 'config', 'commit.gpgsign', 'false')
+    for index in range(directories):
+        (path / f'top{index}').mkdir()
+        (path / f'top{index}' / 'file.txt').write_text(f'{index}\n')
+    (path / 'build').mkdir()
+    (path / '.gitignore').write_text('build/\n')
+    git(path, 'add', '-A')
+    git(path, 'commit', '-q', '-m', 'init')
+    return path
+
+
+@pytest.fixture
+def hive(tmp_path):
+    registry = HiveRegistry(tmp_path / 'hive.json')
+    registry._save({'repos': [], 'debounce': 0.1})
+    hive = GoblinHive(registry, hoard_mode=True)
+    thread = threading.Thread(target=hive.run, daemon=True)
+    yield hive, registry, thread
+    hive.stop()
+    thread.join(30)
+
+
+def commits(repo):
+    return int(git(repo, 'rev-list', '--count', 'HEAD'))
+
+
+def test_thirty_repositories_share_the_kernel_budget(hive, tmp_path):
+    hive, registry, thread = hive
+    repos = [make_repo(tmp_path / f'repo{index}') for index in range(30)]
+    for repo in repos:
+        registry.add(repo)
+
+    before = inotify_instances()
+    thread.start()
+    assert wait_for(lambda: len(hive.repos) == 30, timeout=30)
+    assert inotify_instances() - before <= 30
+
+    for repo in (repos[0], repos[29]):
+        (repo / 'top5' / 'file.txt').write_text('changed\n')
+    assert wait_for(lambda: commits(repos[0]) == 2 and commits(repos[29]) == 2, timeout=30)
+
+
+def test_hive_repositories_answer_on_their_own_socket(hive, tmp_path):
+    from gitgoblin import control
+    from gitgoblin.config import GoblinConfig
+
+    hive, registry, thread = hive
+    own, shared = make_repo(tmp_path / 'own', 1), make_repo(tmp_path / 'shared', 1)
+    GoblinConfig(own).set_config('debounce_seconds', 0.5)
+    registry.add(own)
+    registry.add(shared)
+    thread.start()
+    assert wait_for(lambda: len(hive.repos) == 2, timeout=10)
+
+    assert control.request(own, 'status')['debounce'] == 0.5
+    assert control.request(shared, 'status')['debounce'] == 0.1
+
+    GoblinConfig(shared).set_config('debounce_seconds', 0.3)
+    assert control.request(shared, 'reload')['applied'] is True
+    assert control.request(shared, 'status')['debounce'] == 0.3
+
+    assert control.request(own, 'shutdown')['ok']
+    assert control.wait_until_gone(own)
+    assert str(own) not in hive.repos and str(shared) in hive.repos
+
+
+def test_waiting_for_the_ai_holds_no_git_slot(tmp_path):
+    from concurrent.futures import Future
+    from types import SimpleNamespace
+
+    from gitgoblin.hive import _HiveRepo
+
+    hive = GoblinHive(HiveRegistry(tmp_path / 'hive.json'))
+    hive.git_gate = threading.BoundedSemaphore(1)
+    future = Future()
+    future.goblin_deadline = time.monotonic() + 5
+    repo = _HiveRepo('repo', SimpleNamespace(), SimpleNamespace())
+    repo.futures['a.txt'] = future
+    repo.busy = True
+    hive._in_flight = 1
+    messages = []
+    hive._run_job = lambda repo, files, ai_future=None: messages.append(ai_future.result())
+
+    job = threading.Thread(target=hive._job_done_after, args=(repo, ['a.txt']))
+    job.start()
+    time.sleep(0.1)
+    assert hive.git_gate.acquire(blocking=False)
+    hive.git_gate.release()
+
+    future.set_result('feat: slow spirits')
+    job.join(5)
+    assert messages == ['feat: slow spirits']
+    assert not repo.busy and hive._in_flight == 0
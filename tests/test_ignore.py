@@ -0,0 +1,103 @@
+import subprocess
+
+import pytest
+
+from gitgoblin.ignore import GoblinIgnore
+
+from conftest import git
+
+
+ROOT_RULES = """
+# comment
+*.log
+!keep.log
+/rooted.txt
+build/
+docs/**/*.pdf
+**/cache
+a/**/z
+temp?.txt
+[abc]x.bin
+trailing\\ 
+\\#hash
+\\!bang
+"""
+
+NESTED_RULES = """
+*.txt
+!important.txt
+/only-here
+"""
+
+PATHS = [
+    ('app.log', False), ('keep.log', False), ('src/deep/app.log', False),
+    ('rooted.txt', False), ('src/rooted.txt', False),
+    ('build', True), ('build/out.o', False), ('src/build', True), ('build.txt', False),
+    ('docs/a/b/manual.pdf', False), ('docs/manual.pdf', False), ('other/manual.pdf', False),
+    ('cache', True), ('src/cache', True), ('src/cache/x', False),
+    ('a/z', False), ('a/b/c/z', False), ('b/a/z', False),
+    ('temp1.txt', False), ('temp12.txt', False),
+    ('ax.bin', False), ('dx.bin', False),
+    ('trailing ', False), ('#hash', False), ('!bang', False),
+    ('nested/notes.txt', False), ('nested/important.txt', False), ('nested/deeper/notes.txt', False),
+    ('nested/only-here', False), ('nested/deeper/only-here', False), ('only-here', False),
+    ('excluded.dat', False), ('fine.py', False),
+]
+
+
+@pytest.fixture
+def rules_repo(repo):
+    (repo / '.gitignore').write_text(ROOT_RULES)
+    (repo / 'nested').mkdir()
+    (repo / 'nested' / '.gitignore').write_text(NESTED_RULES)
+    (repo / '.git' / 'info').mkdir(exist_ok=True)
+    (repo / '.git' / 'info' / 'exclude').write_text('*.dat\n')
+    git(repo, 'config', 'core.excludesFile', str(repo / 'no-global-excludes'))
+    for path, is_dir in PATHS:
+        full = repo / path
+        if is_dir:
+            full.mkdir(parents=True, exist_ok=True)
+        else:
+            full.parent.mkdir(parents=True, exist_ok=True)
+            full.write_text('x\n')
+    return repo
+
+
+def check_ignore(repo, paths):
+    """The subset of paths git check-ignore says are ignored"""
+    result = subprocess.run(
+        ['git', 'check-ignore', '--no-index', '-z', '--stdin'],
+        cwd=repo, input='\0'.join(paths), capture_output=True, text=True
+    )
+    return {path for path in result.stdout.split('\0') if path}
+
+
+def test_matches_git_check_ignore(rules_repo):
+    ignore = GoblinIgnore(rules_repo, builtins=False)
+    expected = check_ignore(rules_repo, [path for path, _ in PATHS])
+    actual = {path for path, is_dir in PATHS if ignore.is_ignored(path, is_dir)}
+    assert actual == expected
+
+
+def test_builtin_junk_is_ignored_by_default(repo):
+    git(repo, 'config', 'core.excludesFile', str(repo / 'no-global-excludes'))
+    goblin = GoblinIgnore(repo)
+    plain = GoblinIgnore(repo, builtins=False)
+    for path, is_dir in (('.env', False), ('debug.log', False), ('node_modules', True), ('.git', True)):
+        assert goblin.is_ignored(path, is_dir)
+        assert not plain.is_ignored(path, is_dir)
+
+
+def test_repo_rules_override_builtins(repo):
+    git(repo, 'config', 'core.excludesFile', str(repo / 'no-global-excludes'))
+    (repo / '.gitignore').write_text('!.env\n')
+    assert not GoblinIgnore(repo).is_ignored('.env')
+
+
+def test_new_rules_after_invalidate(repo):
+    git(repo, 'config', 'core.excludesFile', str(repo / 'no-global-excludes'))
+    ignore = GoblinIgnore(repo, builtins=False)
+    assert not ignore.is_ignored('loot.bin')
+    (repo / '.gitignore').write_text('*.bin\n')
+    ignore.invalidate()
+    assert ignore.is_ignored('loot.bin')
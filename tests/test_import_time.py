@@ -0,0 +1,57 @@
+import importlib.util
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_spec = importlib.util.spec_from_file_location('import_time', ROOT / 'benchmarks' / 'import_time.py')
+import_time = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(import_time)
+
+BUDGET_MS = 100
+
+# Subcommands run from shell prompts and editor hooks
+LIGHTWEIGHT = [
+    ['crystalball'],
+    ['enchant', '--show'],
+    ['whisper', 'status'],
+    ['banish'],
+]
+
+RUN_COMMANDS = """
+import json, sys
+from gitgoblin.cli import cli
+for args in json.loads(sys.argv[1]):
+    try:
+        cli.main(args + ['--path', sys.argv[2]], standalone_mode=False)
+    except SystemExit:
+        pass
+print(json.dumps(sorted(sys.modules)), file=sys.stderr)
+"""
+
+
+def heavy(modules):
+    return [name for name in modules
+            if any(name == prefix or name.startswith(prefix + '.') for prefix in import_time.HEAVY_MODULES)]
+
+
+def test_cli_import_stays_within_budget():
+    best_us = min(import_time.import_profile('gitgoblin.cli')[0] for _ in range(3))
+    assert best_us / 1000 <= BUDGET_MS
+    assert heavy(import_time.loaded_modules('gitgoblin.cli')) == []
+
+
+@pytest.mark.parametrize('args', LIGHTWEIGHT, ids=' '.join)
+def test_lightweight_commands_load_no_heavy_modules(repo, args):
+    result = subprocess.run(
+        [sys.executable, '-c', RUN_COMMANDS, json.dumps([args]), str(repo)],
+        cwd=ROOT, capture_output=True, text=True, timeout=60
+    )
+    modules = json.loads(result.stderr.strip().splitlines()[-1])
+    assert 'gitgoblin.cli' in modules
+    assert heavy(modules) == []
+    assert 'watchdog' not in modules and 'requests' not in modules and 'gitgoblin.core' not in modules
@@ -0,0 +1,110 @@
+import os
+import time
+
+import pytest
+
+from gitgoblin.index import GitIndex
+
+from conftest import git
+
+
+def git_changes(repo):
+    """(worktree code, path) pairs git status reports, untracked directories collapsed"""
+    out = git(repo, 'status', '--porcelain', '-z')
+    changes = set()
+    for record in out.split('\0'):
+        if record and record[1] != ' ':
+            changes.add((record[1], record[3:]))
+    return changes
+
+
+def settle(repo):
+    """Backdate the tracked files and refresh the index, so no entry is racily clean"""
+    past = time.time() - 60
+    for path in git(repo, 'ls-files', '-z').split('\0'):
+        if path:
+            os.utime(repo / path, (past, past))
+    git(repo, 'update-index', '-q', '--really-refresh')
+
+
+@pytest.fixture(params=[2, 3, 4])
+def indexed(request, repo):
+    """The test repository with its index written in each supported version"""
+    git(repo, 'update-index', '--index-version', str(request.param))
+    settle(repo)
+    return repo
+
+
+def test_clean_tree(indexed):
+    index = GitIndex(indexed)
+    assert index.status() == []
+    assert index.is_dirty() is False
+    assert git_changes(indexed) == set()
+
+
+def test_matches_git_status(indexed):
+    (indexed / 'c.txt').write_text('changed, and longer\n')
+    (indexed / 'd' / 'a.txt').unlink()
+    (indexed / 'd' / 'sub' / 'new.txt').write_text('new\n')
+    (indexed / 'fresh').mkdir()
+    (indexed / 'fresh' / 'x.txt').write_text('x\n')
+    (indexed / 'top.txt').write_text('top\n')
+
+    assert set(GitIndex(indexed).status()) == git_changes(indexed)
+    assert GitIndex(indexed).is_dirty() is True
+
+
+def test_same_size_edit_is_settled_by_git(indexed):
+    (indexed / 'c.txt').write_text('C\n')
+    os.utime(indexed / 'c.txt', (time.time() + 5, time.time() + 5))
+    assert GitIndex(indexed).status(['c.txt']) == [('M', 'c.txt')]
+
+
+def test_touched_but_unchanged_file_is_clean(indexed):
+    os.utime(indexed / 'c.txt', (time.time() + 5, time.time() + 5))
+    assert GitIndex(indexed).status(['c.txt']) == []
+
+
+def test_untracked_files_git_does_not_ignore(repo):
+    # The goblin's own junk patterns must not hide these from the check
+    (repo / '.env').write_text('SECRET=1\n')
+    (repo / 'debug.log').write_text('log\n')
+    assert GitIndex(repo).is_dirty() is True
+    assert set(GitIndex(repo).status()) == git_changes(repo) == {('?', '.env'), ('?', 'debug.log')}
+
+
+def test_gitignored_files_stay_hidden(repo):
+    (repo / '.gitignore').write_text('*.log\nbuild/\n')
+    git(repo, 'add', '.gitignore')
+    git(repo, 'commit', '-q', '-m', 'ignore')
+    settle(repo)
+    (repo / 'debug.log').write_text('log\n')
+    (repo / 'build').mkdir()
+    (repo / 'build' / 'out.o').write_text('o\n')
+    assert GitIndex(repo).status() == []
+    assert git_changes(repo) == set()
+
+
+def test_clean_tracked_directory_path(indexed):
+    assert GitIndex(indexed).status(['d']) == []
+    assert GitIndex(indexed).is_dirty(['d']) is False
+
+
+def test_tracked_directory_path_with_changes(indexed):
+    (indexed / 'd' / 'sub' / 'b.txt').write_text('bigger b\n')
+    (indexed / 'd' / 'extra.txt').write_text('extra\n')
+    assert set(GitIndex(indexed).status(['d'])) == {('M', 'd/sub/b.txt'), ('?', 'd/extra.txt')}
+
+
+def test_deleted_tracked_directory_path(indexed):
+    for path in ('d/sub/b.txt', 'd/a.txt'):
+        (indexed / path).unlink()
+    (indexed / 'd' / 'sub').rmdir()
+    (indexed / 'd').rmdir()
+    assert set(GitIndex(indexed).status(['d'])) == {('D', 'd/a.txt'), ('D', 'd/sub/b.txt')}
+
+
+def test_untracked_path(repo):
+    (repo / 'loot.txt').write_text('gold\n')
+    assert GitIndex(repo).status(['loot.txt']) == [('?', 'loot.txt')]
+    assert GitIndex(repo).status(['loot.txt'], untracked=False) == []
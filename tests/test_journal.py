@@ -0,0 +1,53 @@
+from gitgoblin.journal import GoblinJournal
+
+
+def test_replay_returns_unsettled_changes_and_unpushed_commits(repo):
+    journal = GoblinJournal(repo)
+    assert journal.replay() == ([], 0)
+    journal.changed(['a.txt', 'b.txt'])
+    journal.settled(['a.txt'], committed=True, push=True)
+    journal.changed(['c.txt'])
+    journal._file.close()
+    journal._file = None
+
+    assert GoblinJournal(repo).replay() == (['b.txt', 'c.txt'], 1)
+
+
+def test_pushes_and_compaction(repo):
+    journal = GoblinJournal(repo, compact_bytes=300)
+    journal.replay()
+    for i in range(20):
+        journal.changed([f'f{i}'])
+        journal.settled([f'f{i}'], committed=True, push=True)
+    journal.pushed(15)
+    journal.changed(['left'])
+    journal.close()
+
+    assert (repo / '.git' / 'gitgoblin.journal').stat().st_size < 300
+    assert GoblinJournal(repo).replay() == (['left'], 5)
+
+
+def test_torn_last_line_is_skipped(repo):
+    journal = GoblinJournal(repo)
+    journal.replay()
+    journal.changed(['kept'])
+    journal._file.write('{"op":"chan')
+    journal._file.close()
+    journal._file = None
+
+    assert GoblinJournal(repo).replay() == (['kept'], 0)
+
+
+def test_declined_ritual_is_not_replayed(repo, monkeypatch):
+    import click
+    from gitgoblin.core import GoblinWatcher
+
+    watcher = GoblinWatcher(repo, debounce_seconds=0.1)
+    watcher.journal = GoblinJournal(repo)
+    watcher.journal.replay()
+    watcher.journal.changed(['c.txt'])
+    monkeypatch.setattr(click, 'confirm', lambda *args, **kwargs: False)
+
+    assert not watcher._ritual_confirm('chore: update c.txt', ['c.txt'])
+    watcher.journal.close()
+    assert GoblinJournal(repo).replay() == ([], 0)
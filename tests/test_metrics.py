@@ -0,0 +1,46 @@
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from gitgoblin.metrics import GoblinMetrics, load_metrics
+
+ROOT = Path(__file__).resolve().parent.parent
+
+FLUSHER = """
+import sys
+from gitgoblin.metrics import GoblinMetrics
+metrics = GoblinMetrics(sys.argv[1])
+for _ in range(int(sys.argv[2])):
+    metrics.count('commits')
+    metrics.observe('commit', 0.01)
+    metrics.flush(force=True)
+"""
+
+
+def test_concurrent_flushes_lose_nothing(repo):
+    rounds = 40
+    processes = [
+        subprocess.Popen([sys.executable, '-c', FLUSHER, str(repo), str(rounds)], cwd=ROOT)
+        for _ in range(3)
+    ]
+
+    def flush_in_thread():
+        metrics = GoblinMetrics(repo)
+        for _ in range(rounds):
+            metrics.count('commits')
+            metrics.observe('commit', 0.01)
+            metrics.flush(force=True)
+
+    threads = [threading.Thread(target=flush_in_thread) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for process in processes:
+        assert process.wait(60) == 0
+
+    snapshot = load_metrics(repo)
+    assert snapshot['counters']['commits'] == 6 * rounds
+    assert snapshot['stages']['commit']['count'] == 6 * rounds
+    assert f'gitgoblin_commits_total {6 * rounds}' in (repo / '.git' / 'gitgoblin.prom').read_text()
@@ -0,0 +1,49 @@
+import os
+
+from gitgoblin.msgcache import MessageCache, cache_key
+
+
+def test_key_ignores_blob_ids_and_hunk_positions():
+    a = "diff --git a/x b/x\nindex 1111111..2222222 100644\n@@ -1,3 +1,4 @@\n+gold\n"
+    b = "diff --git a/x b/x\nindex 3333333..4444444 100644\n@@ -10,3 +10,4 @@\n+gold   \n"
+    assert cache_key(a, 'M x', 2, 'm') == cache_key(b, 'M x', 2, 'm')
+    assert cache_key(a, 'M x', 3, 'm') != cache_key(a, 'M x', 2, 'm')
+
+
+def test_lookups_do_not_rewrite_the_store(repo):
+    cache = MessageCache(repo, flush_interval=3600)
+    cache.put('k', 'feat: hoard gold')
+    stamp = os.stat(cache.store_file).st_mtime_ns, os.stat(cache.store_file).st_ino
+    for _ in range(10):
+        assert cache.get('k') == 'feat: hoard gold'
+        assert cache.get('missing') is None
+    assert (os.stat(cache.store_file).st_mtime_ns, os.stat(cache.store_file).st_ino) == stamp
+    assert cache.stats() == {'hits': 10, 'misses': 10, 'entries': 1}
+
+    cache.flush()
+    assert MessageCache(repo).stats() == {'hits': 10, 'misses': 10, 'entries': 1}
+
+
+def test_least_recently_used_entries_are_evicted(repo):
+    cache = MessageCache(repo, max_entries=2, flush_interval=0)
+    cache.put('old', 'one')
+    cache.put('mid', 'two')
+    cache.get('old')
+    cache.put('new', 'three')
+    fresh = MessageCache(repo)
+    assert fresh.get('old') == 'one'
+    assert fresh.get('new') == 'three'
+    assert fresh.get('mid') is None
+
+
+def test_messages_survive_another_process_rewriting_the_store(repo):
+    ours = MessageCache(repo, flush_interval=3600)
+    theirs = MessageCache(repo)
+    ours.put('a', 'fix: a')
+    ours.get('a')
+    theirs.put('b', 'fix: b')
+    ours.flush()
+    fresh = MessageCache(repo)
+    assert fresh.get('a') == 'fix: a'
+    assert fresh.get('b') == 'fix: b'
+    assert fresh.stats()['hits'] == 3
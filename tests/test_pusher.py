@@ -0,0 +1,37 @@
+import threading
+import time
+
+from gitgoblin.pusher import GoblinPusher
+
+from conftest import git
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_push_waits_for_a_gate_slot(repo, tmp_path):
+    remote = tmp_path / 'abyss.git'
+    git(tmp_path, 'init', '-q', '--bare', str(remote))
+    git(repo, 'remote', 'add', 'origin', str(remote))
+    git(repo, 'push', '-q', '-u', 'origin', 'HEAD')
+    (repo / 'c.txt').write_text('changed\n')
+    git(repo, 'commit', '-q', '-am', 'change')
+
+    gate = threading.BoundedSemaphore(1)
+    pusher = GoblinPusher(str(repo), min_interval=0, gate=gate)
+    pusher.start()
+    try:
+        with gate:
+            pusher.request()
+            time.sleep(0.3)
+            assert pusher.pushes == 0
+        assert wait_for(lambda: pusher.pushes == 1)
+    finally:
+        pusher.stop(5)
+    assert git(remote, 'rev-parse', 'HEAD') == git(repo, 'rev-parse', 'HEAD')
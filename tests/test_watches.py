@@ -0,0 +1,132 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+from watchdog.events import FileSystemEventHandler
+
+from gitgoblin.ignore import GoblinIgnore
+from gitgoblin.watches import GoblinWatchTree, make_observer
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'), reason='inotify only')
+
+
+def inotify_instances():
+    """inotify file descriptors this process holds"""
+    count = 0
+    for fd in os.listdir('/proc/self/fd'):
+        try:
+            count += os.readlink(f'/proc/self/fd/{fd}') == 'anon_inode:inotify'
+        except OSError:
+            pass
+    return count
+
+
+class Recorder(FileSystemEventHandler):
+    def __init__(self):
+        self.paths = set()
+        self.seen = threading.Event()
+
+    def on_any_event(self, event):
+        self.paths.add(event.src_path)
+        self.seen.set()
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def monorepo(tmp_path):
+    """A repository of 140 packages, each with src/ and an ignored node_modules/"""
+    root = tmp_path / 'mono'
+    (root / '.git').mkdir(parents=True)
+    (root / '.gitignore').write_text('node_modules/\n')
+    for index in range(140):
+        package = root / f'pkg{index}'
+        (package / 'src').mkdir(parents=True)
+        (package / 'node_modules' / 'dep').mkdir(parents=True)
+    return root
+
+
+def test_a_repository_costs_one_inotify_instance(monorepo):
+    before = inotify_instances()
+    observer = make_observer()
+    handler = Recorder()
+    tree = GoblinWatchTree(observer, handler, monorepo, GoblinIgnore(monorepo))
+    directories, watches, _ = tree.start()
+    observer.start()
+    try:
+        assert watches == 1 + 140 * 2
+        assert inotify_instances() - before == 1
+        assert 'pkg7/node_modules' in tree.unwatched()
+
+        (monorepo / 'pkg139' / 'src' / 'app.py').write_text('x = 1\n')
+        assert wait_for(lambda: str(monorepo / 'pkg139' / 'src' / 'app.py') in handler.paths)
+
+        (monorepo / 'pkg3' / 'node_modules' / 'dep' / 'index.js').write_text('x\n')
+        (monorepo / 'pkg3' / 'src' / 'marker.py').write_text('x\n')
+        assert wait_for(lambda: str(monorepo / 'pkg3' / 'src' / 'marker.py') in handler.paths)
+        assert not any('node_modules' in path for path in handler.paths)
+    finally:
+        tree.close()
+        observer.stop()
+        observer.join()
+    assert inotify_instances() == before
+
+
+def test_new_and_moved_directories_are_watched(monorepo):
+    observer = make_observer()
+    handler = Recorder()
+    tree = GoblinWatchTree(observer, handler, monorepo, GoblinIgnore(monorepo))
+    handler.on_created = lambda event: (
+        event.is_directory and tree.directory_created(os.path.relpath(event.src_path, monorepo)))
+    handler.on_moved = lambda event: (
+        tree.directory_removed(os.path.relpath(event.src_path, monorepo)),
+        tree.directory_created(os.path.relpath(event.dest_path, monorepo)))
+    tree.start()
+    observer.start()
+    try:
+        (monorepo / 'fresh' / 'deep').mkdir(parents=True)
+        assert wait_for(lambda: 'fresh/deep' in tree.watches)
+        (monorepo / 'fresh' / 'deep' / 'a.py').write_text('x\n')
+        assert wait_for(lambda: str(monorepo / 'fresh' / 'deep' / 'a.py') in handler.paths)
+
+        os.rename(monorepo / 'fresh', monorepo / 'moved')
+        assert wait_for(lambda: 'moved/deep' in tree.watches and 'fresh/deep' not in tree.watches)
+        (monorepo / 'moved' / 'deep' / 'b.py').write_text('x\n')
+        assert wait_for(lambda: str(monorepo / 'moved' / 'deep' / 'b.py') in handler.paths)
+
+        (monorepo / 'pkg0' / 'node_modules' / 'late').mkdir()
+        (monorepo / 'pkg0' / 'src' / 'after.py').write_text('x\n')
+        assert wait_for(lambda: str(monorepo / 'pkg0' / 'src' / 'after.py') in handler.paths)
+        assert 'pkg0/node_modules/late' not in tree.watches
+    finally:
+        tree.close()
+        observer.stop()
+        observer.join()
+
+
+def test_entries_made_before_a_new_directory_is_watched_are_reported(monorepo):
+    observer = make_observer()
+    handler = Recorder()
+    tree = GoblinWatchTree(observer, handler, monorepo, GoblinIgnore(monorepo))
+    tree.start()
+    observer.start()
+    try:
+        # As if the directory's own event were handled only after all of this
+        (monorepo / 'late' / 'deep').mkdir(parents=True)
+        (monorepo / 'late' / 'deep' / 'early.py').write_text('x\n')
+        tree.directory_created('late')
+        assert 'late/deep' in tree.watches
+        assert wait_for(lambda: str(monorepo / 'late' / 'deep' / 'early.py') in handler.paths)
+    finally:
+        tree.close()
+        observer.stop()
+        observer.join()